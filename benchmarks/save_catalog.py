@@ -0,0 +1,48 @@
+import argparse
+import tempfile
+import time
+from gamecore.constants import RACES, CLASSES
+from gamecore.saves.catalog import SaveCatalog
+
+
+def timed(callback, repeat: int):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = callback()
+    return result, (time.perf_counter() - start) / repeat
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Скорость каталога сохранений: открытие, фильтр и продолжение последней игры")
+    parser.add_argument("--saves", type=int, default=100_000)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        catalog = SaveCatalog(directory)
+        start = time.perf_counter()
+        for index in range(args.saves):
+            catalog.put(
+                f"{directory}/player{index}.sav", f"player{index}",
+                RACES[index % len(RACES)], CLASSES[index % len(CLASSES)],
+                1 + index % 40, index % 10, mtime=index * 1_000_000,
+            )
+        put_time = (time.perf_counter() - start) / args.saves
+        catalog.close()
+
+        catalog, open_time = timed(lambda: SaveCatalog(directory), 1)
+        menu, menu_time = timed(lambda: catalog.find(limit=20), args.repeat)
+        found, filter_time = timed(lambda: catalog.find(race=RACES[0], player_class=CLASSES[0], min_level=30), args.repeat)
+        last, last_time = timed(catalog.last, args.repeat)
+        catalog.close()
+
+    print(f"Сохранений: {args.saves}")
+    print(f"Запись:      {put_time * 1e6:>8.1f} мкс на сохранение")
+    print(f"Открытие:    {open_time * 1e3:>8.2f} мс")
+    print(f"Меню (20):   {menu_time * 1e3:>8.2f} мс")
+    print(f"Фильтр:      {filter_time * 1e3:>8.2f} мс, найдено {len(found)}")
+    print(f"Последняя:   {last_time * 1e3:>8.2f} мс ({last.name})")
+
+
+if __name__ == "__main__":
+    main()
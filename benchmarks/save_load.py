@@ -0,0 +1,96 @@
+import argparse
+import json
+import os
+import tempfile
+import time
+from gamecore.classes import Player, Weapon, Armor, Item
+from gamecore.constants import RACES, CLASSES, ELEMENTS, QUESTS
+from gamecore.rng import SessionRandom
+from gamecore.saves import encode_player, read_save
+from gamecore.saves.legacy import load_json_save
+
+
+def make_player(index: int):
+    player = Player(f"player{index}", RACES[index % len(RACES)], CLASSES[index % len(CLASSES)], rng=SessionRandom(index))
+    for _ in range(index % 10):
+        player.level_up()
+    for number in range(8):
+        player.pickup_item(Weapon(f"Меч {number}", 10 + number, 1 + number % 9, element=ELEMENTS[number % len(ELEMENTS)]))
+        player.pickup_item(Item(f"Зелье {number}", "consumable", 30))
+    player.pickup_item(Armor("Кожаная броня", 8, "armor"))
+    for quest_id in QUESTS:
+        player.add_quest(quest_id)
+    for material in ("железо", "травы", "уголь"):
+        player.add_material(material, index % 7 + 1)
+    return player
+
+
+def legacy_json(player):
+    # То, что писал прежний save_game
+    return json.dumps({
+        "name": player.name,
+        "race": player.race,
+        "class": player.player_class,
+        "lvl": player.lvl,
+        "xp": player.xp,
+        "xp_to_next": player.xp_to_next,
+        "hp": player.hp,
+        "max_hp": player.max_hp,
+        "mana": player.mana,
+        "max_mana": player.max_mana,
+        "power": player.power,
+        "agility": player.agility,
+        "wisdom": player.wisdom,
+        "money": player.money,
+        "weapon": player.equipment["weapon"].name if player.equipment["weapon"] else "",
+        "armor": player.equipment["armor"].name if player.equipment["armor"] else "",
+        "story_progress": player.story_progress,
+        "inventory": list(player.inventory.keys()),
+        "quests": {qid: q.to_dict() for qid, q in player.quests.items()},
+        "factions": player.factions,
+        "crafting_materials": player.crafting_materials,
+        "stats": player.stats,
+    }, indent=2)
+
+
+def timed(callback, items):
+    start = time.perf_counter()
+    results = [callback(item) for item in items]
+    return results, (time.perf_counter() - start) / len(items)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Размер и скорость загрузки сохранений: JSON против двоичного формата")
+    parser.add_argument("--saves", type=int, default=2000)
+    args = parser.parse_args()
+
+    players = [make_player(index) for index in range(args.saves)]
+
+    with tempfile.TemporaryDirectory() as directory:
+        json_paths, binary_paths = [], []
+        for index, player in enumerate(players):
+            path = os.path.join(directory, f"{index}.json")
+            with open(path, "w") as f:
+                f.write(legacy_json(player))
+            json_paths.append(path)
+
+        blobs, encode_time = timed(encode_player, players)
+        for index, blob in enumerate(blobs):
+            path = os.path.join(directory, f"{index}.sav")
+            with open(path, "wb") as f:
+                f.write(blob)
+            binary_paths.append(path)
+
+        _, json_load_time = timed(load_json_save, json_paths)
+        _, load_time = timed(read_save, binary_paths)
+
+        json_size = sum(os.path.getsize(path) for path in json_paths) / len(players)
+        binary_size = sum(os.path.getsize(path) for path in binary_paths) / len(players)
+
+    print(f"Сохранений: {args.saves}")
+    print(f"JSON:     {json_size:>8.0f} байт, загрузка {json_load_time * 1e6:>8.1f} мкс")
+    print(f"Двоичный: {binary_size:>8.0f} байт, загрузка {load_time * 1e6:>8.1f} мкс, запись {encode_time * 1e6:.1f} мкс")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+import argparse
+import gc
+import os
+import resource
+import tracemalloc
+from gamecore.classes import Player, Enemy, Weapon, Armor, Item
+from gamecore.constants import RACES, CLASSES, ELEMENTS, ENEMIES
+from gamecore.rng import SessionRandom
+
+
+def current_rss():
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except OSError:
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def make_session(index: int):
+    rng = SessionRandom(index)
+    player = Player(f"player{index}", RACES[index % len(RACES)], CLASSES[index % len(CLASSES)], rng=rng)
+    player.pickup_item(Weapon("Стальной меч", 15, 4, element=ELEMENTS[index % len(ELEMENTS)]))
+    player.pickup_item(Armor("Кожаная броня", 8, "armor"))
+    player.pickup_item(Item("Зелье здоровья", "consumable", 30))
+    player.pickup_item(Item("Железо", "material"))
+    player.add_quest("некроманты")
+    enemy = Enemy(player, ENEMIES[index % len(ENEMIES)])
+    return player, enemy
+
+
+def measure_rss(sessions: int):
+    gc.collect()
+    before = current_rss()
+    hosted = [make_session(index) for index in range(sessions)]
+    gc.collect()
+    return hosted, (current_rss() - before) / sessions
+
+
+def measure_traced(sessions: int):
+    gc.collect()
+    tracemalloc.start()
+    hosted = [make_session(index) for index in range(sessions)]
+    traced, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del hosted
+    return traced / sessions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Память на одну игровую сессию (игрок + текущий враг)")
+    parser.add_argument("--sessions", type=int, default=20000)
+    parser.add_argument("--budget", type=int, default=None, help="допустимый объем на сессию, байт")
+    args = parser.parse_args()
+
+    hosted, rss = measure_rss(args.sessions)
+    del hosted
+    traced = measure_traced(min(args.sessions, 2000))
+    print(f"Сессий: {args.sessions}")
+    print(f"Python-объекты: {traced:,.0f} байт/сессия")
+    print(f"RSS: {rss:,.0f} байт/сессия")
+
+    if args.budget is not None and traced > args.budget:
+        raise SystemExit(f"Превышен бюджет: {traced:,.0f} > {args.budget:,} байт")
+
+
+if __name__ == "__main__":
+    main()
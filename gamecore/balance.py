@@ -0,0 +1,138 @@
+import argparse
+import csv
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from itertools import product
+import numpy as np
+from rich.table import Table
+from gamecore.output import print
+from gamecore.constants import RACES, CLASSES, TERRAINS, ENEMIES
+from gamecore.classes import Player
+from gamecore.simulation import simulate_battles
+
+METRICS = {
+    "win_rate": "Процент побед",
+    "turns_to_kill": "Ходов до победы",
+    "hp_remaining": "Остаток HP",
+}
+
+
+def make_player(race: str, player_class: str, lvl: int):
+    player = Player("sweep", race, player_class)
+    for _ in range(lvl - 1):
+        player.level_up()
+    return player
+
+
+def sweep_cell(task):
+    cell, race, player_class, lvl, fights, seed, max_turns = task
+    player = make_player(race, player_class, lvl)
+    rng = np.random.default_rng([seed, cell])
+
+    terrain_idx = np.repeat(np.arange(len(TERRAINS)), fights)
+
+    rows = []
+    for enemy_name in ENEMIES:
+        batch = simulate_battles(player, enemy_name, len(terrain_idx), rng=rng, max_turns=max_turns, terrain_idx=terrain_idx)
+        for i, terrain in enumerate(TERRAINS):
+            result = batch.subset(slice(i * fights, (i + 1) * fights))
+            rows.append({
+                "race": race,
+                "class": player_class,
+                "lvl": lvl,
+                "enemy": enemy_name,
+                "terrain": terrain,
+                "win_rate": result.win_rate,
+                "turns_to_kill": result.mean_turns_to_kill,
+                "hp_remaining": result.mean_hp_remaining,
+            })
+    return rows
+
+
+def run_sweep(levels=range(1, 31), fights: int = 200, workers: int = None, seed: int = 0, max_turns: int = 200):
+    tasks = [
+        (cell, race, player_class, lvl, fights, seed, max_turns)
+        for cell, (race, player_class, lvl) in enumerate(product(RACES, CLASSES, levels))
+    ]
+
+    workers = workers or os.cpu_count()
+    chunksize = max(1, len(tasks) // (workers * 8))
+
+    rows = []
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        for cell_rows in executor.map(sweep_cell, tasks, chunksize=chunksize):
+            rows.extend(cell_rows)
+    return rows
+
+
+def merge_tables(rows):
+    tables = {metric: {} for metric in METRICS}
+    for metric in METRICS:
+        sums = {}
+        for row in rows:
+            value = row[metric]
+            if value != value:
+                continue
+            key = (row["race"], row["class"])
+            total, count = sums.get(key, (0.0, 0))
+            sums[key] = (total + value, count + 1)
+        tables[metric] = {key: total / count for key, (total, count) in sums.items()}
+    return tables
+
+
+def print_tables(tables):
+    for metric, title in METRICS.items():
+        table = Table(title=title)
+        table.add_column("Раса")
+        for player_class in CLASSES:
+            table.add_column(player_class, justify="right")
+
+        for race in RACES:
+            cells = []
+            for player_class in CLASSES:
+                value = tables[metric].get((race, player_class))
+                if value is None:
+                    cells.append("-")
+                elif metric == "win_rate":
+                    cells.append(f"{value * 100:.1f}%")
+                else:
+                    cells.append(f"{value:.2f}")
+            table.add_row(race, *cells)
+
+        print(table)
+
+
+def write_csv(rows, filename: str):
+    with open(filename, "w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=["race", "class", "lvl", "enemy", "terrain", *METRICS])
+        writer.writeheader()
+        writer.writerows(rows)
+
+
+def parse_levels(value: str):
+    if "-" in value:
+        first, last = value.split("-", 1)
+        return range(int(first), int(last) + 1)
+    return range(int(value), int(value) + 1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Баланс-свип: расы × классы × уровни × враги × местности")
+    parser.add_argument("--levels", default="1-30", help="диапазон уровней, например 1-30")
+    parser.add_argument("--fights", type=int, default=200, help="боев на каждую клетку сетки")
+    parser.add_argument("--workers", type=int, default=None, help="число процессов (по умолчанию все ядра)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--max-turns", type=int, default=200)
+    parser.add_argument("--out", default="sweep.csv", help="CSV со всеми клетками сетки")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    rows = run_sweep(parse_levels(args.levels), args.fights, args.workers, args.seed, args.max_turns)
+    write_csv(rows, args.out)
+    print_tables(merge_tables(rows))
+    print(f"[green]{len(rows)} клеток за {time.perf_counter() - start:.1f} с, результаты в {args.out}[/green]")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+from dataclasses import dataclass
+from functools import lru_cache
+from gamecore import constants
+from gamecore.ids import TERRAIN_IDS, dense
+from gamecore.constants import MAX_DANGER_LEVEL, TERRAINS
+
+ENEMY_ABILITIES = ("fire_breath", "poison_cloud", "summon_skeleton", "life_drain")
+RESISTANCE_ROLLS = tuple(range(-30, 31))
+
+
+@dataclass(frozen=True)
+class EnemyArchetype:
+    name: str
+    tags: frozenset
+    # abilities[danger_level] -> кортеж способностей для этого уровня опасности
+    abilities: tuple
+
+    @classmethod
+    def compile(cls, name: str):
+        lowered = name.lower()
+        tags = set()
+        for keyword, keyword_tags in constants.ENEMY_TAGS.items():
+            if keyword in lowered:
+                tags.update(keyword_tags)
+
+        tag_abilities = [ability for tag, ability in constants.ENEMY_TAG_ABILITIES.items() if tag in tags]
+
+        danger_abilities = sorted(constants.DANGER_ABILITIES.items())
+        abilities = []
+        for danger_level in range(MAX_DANGER_LEVEL + 1):
+            level_abilities = [ability for level, ability in danger_abilities if danger_level >= level]
+            abilities.append(tuple(level_abilities + tag_abilities))
+
+        return cls(name, frozenset(tags), tuple(abilities))
+
+    def abilities_for(self, danger_level: int):
+        return self.abilities[min(danger_level, MAX_DANGER_LEVEL)]
+
+
+def compile_terrain_modifiers(terrain: str):
+    effects = constants.TERRAIN_EFFECTS.get(terrain, {})
+    damage_mult = 1 + effects["урон"] if "урон" in effects else None
+    hp_mult = 1 + effects["защита"] if "защита" in effects else None
+    return damage_mult, hp_mult
+
+
+# Архетипы собираются при первой встрече с врагом
+BESTIARY = {}
+
+
+@lru_cache(maxsize=None)
+def terrain_modifiers_by_id():
+    return dense(TERRAIN_IDS, {terrain: compile_terrain_modifiers(terrain) for terrain in TERRAINS}, (None, None))
+
+
+def get_archetype(name: str):
+    archetype = BESTIARY.get(name)
+    if archetype is None:
+        archetype = BESTIARY[name] = EnemyArchetype.compile(name)
+    return archetype
+
+
+def max_danger_level(lvl: int):
+    return min(MAX_DANGER_LEVEL, max(1, lvl // 2))
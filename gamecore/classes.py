@@ -1,12 +1,24 @@
-from dataclasses import dataclass
-from random import randint, choice
-from gamecore.constants import *
-from rich import print
+from copy import copy
+from dataclasses import dataclass, field
+from functools import lru_cache
+from types import MappingProxyType
+from gamecore import constants
+from gamecore.constants import XP_MULTIPLIER, DAMAGE_MULTIPLIER, HEALING_MULTIPLIER, ELEMENTS, TERRAINS
+from gamecore.rng import SessionRandom
+from gamecore.effects import StatusEffects
+from gamecore.elements import NO_ELEMENT, element_id, resistance_vector
+from gamecore.bestiary import RESISTANCE_ROLLS, get_archetype, max_danger_level, terrain_modifiers_by_id
+from gamecore.ids import (
+    CLASS_IDS, NO_ID, RACE_IDS, class_id, dense, race_id, terrain_id,
+    HUMAN, HOBBIT, ORC, ELF, GNOME, DWARF, DEMON, WARRIOR, MAGE, ARCHER, ROGUE, PRIEST, NECROMANCER, PALADIN, DRUID,
+)
+from gamecore.quests import find_triggers, get_quest, quest_registry
+from gamecore.crafting import CraftingIndex, craft_kind, craftable_recipes
 
 def round_value(value):
     return round(value, 2)
 
-@dataclass
+@dataclass(slots=True)
 class AttackSpell:
     spell_name: str
     spell_desc: str
@@ -14,8 +26,12 @@ class AttackSpell:
     spell_damage: float
     element: str = None
     spell_type: str = "ATTACK"
+    element_id: int = field(default=NO_ELEMENT, init=False)
 
-@dataclass
+    def __post_init__(self):
+        self.element_id = element_id(self.element)
+
+@dataclass(slots=True)
 class HealthSpell:
     spell_name: str
     spell_desc: str
@@ -23,7 +39,7 @@ class HealthSpell:
     healing: float
     spell_type: str = "HEALTH"
 
-@dataclass
+@dataclass(slots=True)
 class ManaSpell:
     spell_name: str
     spell_desc: str
@@ -31,7 +47,7 @@ class ManaSpell:
     spell_type: str = "MANA"
     mana_cost: float = 0.0
 
-@dataclass
+@dataclass(slots=True)
 class PassiveAbility:
     name: str
     desc: str
@@ -39,63 +55,59 @@ class PassiveAbility:
     value: any
 
 class Quest:
-    def __init__(self, id: str, name: str, description: str, reward: dict, required: int = 1):
-        self.id = id
-        self.name = name
-        self.description = description
-        self.reward = reward
-        self.completed: bool = False
-        self.progress: int = 0
-        self.required: int = required
+    # Прогресс игрока по квесту; название, описание и награда берутся из общего quest_registry()
+    __slots__ = ("definition", "completed", "progress")
+
+    def __init__(self, quest_id: str, progress: int = 0, completed: bool = False):
+        self.definition = get_quest(quest_id)
+        self.completed: bool = completed
+        self.progress: int = progress
+
+    @property
+    def id(self):
+        return self.definition.id
+
+    @property
+    def name(self):
+        return self.definition.name
+
+    @property
+    def description(self):
+        return self.definition.description
+
+    @property
+    def reward(self):
+        return self.definition.reward
+
+    @property
+    def required(self):
+        return self.definition.required
 
     def to_dict(self):
         return {
             "id": self.id,
-            "name": self.name,
-            "description": self.description,
-            "reward": self.reward,
             "completed": self.completed,
             "progress": self.progress,
-            "required": self.required
         }
 
     @classmethod
     def from_dict(cls, data, qid):
-        quest = cls(
-            qid,
-            data["name"],
-            data["description"],
-            data["reward"],
-            data.get("required", 1)
-        )
-        quest.completed = data["completed"]
-        quest.progress = data["progress"]
-        return quest
-
-    def check_completion(self, enemy, player):
-        if self.completed:
-            return False
-
-        if self.id == "некроманты":
-            if "скелет" in enemy.name.lower():
-                self.progress += 1
-        elif self.id == "природа":
-            if "вредитель" in enemy.name.lower():
-                self.progress += 1
-
-        if self.progress >= self.required:
-            self.completed = True
-            return True
-        return False
+        # Старые сохранения содержат копию описания квеста, она игнорируется
+        return cls(qid, data["progress"], data["completed"])
 
 class Item:
+    __slots__ = ("name", "type", "value", "element", "element_id")
+
     def __init__(self, name: str, item_type: str, value: int = 0, element: str = None):
         self.name = name
         self.type = item_type
         self.value = value
         self.element = element
+        self.element_id = element_id(element)
 
 class Weapon(Item):
+    __slots__ = ("durability", "level", "crit_chance", "max_durability")
+
     def __init__(
         self,
         name: str,
@@ -147,8 +159,8 @@ class Weapon(Item):
         else:
             return "Сломанный"
 
-    def use(self):
-        self.durability = max(0, self.durability - randint(1, 3))
+    def use(self, rng):
+        self.durability = max(0, self.durability - rng.randint(1, 3))
         self.value = max(1, self.value * (self.durability/100))
         return self.value
 
@@ -174,57 +186,60 @@ class Weapon(Item):
             self.name = f"{level_prefixes.get(self.level, '')} {self.name.split(' ', 1)[1]}"
 
 class Armor(Item):
+    __slots__ = ("armor_type", "element_resist")
+
     def __init__(
         self, name: str, defense: int, armor_type: str, element_resist: dict = None
     ):
         super().__init__(name, "armor", defense)
         self.armor_type = armor_type
-        self.element_resist = element_resist or {}
+        self.element_resist = resistance_vector(element_resist)
 
 class Enemy:
+    __slots__ = (
+        "player", "rng", "name", "tags", "terrain", "terrain_id", "danger_level", "element_resistances",
+        "crit_chance", "crit_multiplier", "max_hp", "hp", "damage", "negative_effects", "abilities",
+    )
+
     def __init__(self, player, name: str, terrain: str = None):
+        archetype = get_archetype(name)
         self.player = player
+        self.rng = player.rng
+        spawn = self.rng.spawn
         self.name = name
-        self.terrain = terrain or choice(TERRAINS)
-        self.danger_level = randint(1, min(11, max(1, player.lvl // 2)))
-        self.element_resistances = {elem: randint(-30, 30) for elem in ELEMENTS}
+        self.tags = archetype.tags
+        self.terrain = terrain or spawn.choice(TERRAINS)
+        self.terrain_id = terrain_id(self.terrain)
+        self.danger_level = spawn.randint(1, max_danger_level(player.lvl))
+        self.element_resistances = resistance_vector(spawn.choices(RESISTANCE_ROLLS, k=len(ELEMENTS)))
         self.crit_chance = 0.1
         self.crit_multiplier = 1.5
-        self.max_hp = max(50, (randint(15, 60) * self.player.lvl * self.danger_level * DAMAGE_MULTIPLIER))
+        scale = self.player.lvl * self.danger_level * DAMAGE_MULTIPLIER
+        self.max_hp = max(50, spawn.randint(15, 60) * scale)
         self.hp = self.max_hp
-        self.damage = max(3, (randint(3, 25) * self.player.lvl * self.danger_level * DAMAGE_MULTIPLIER))
-        self.negative_effects = {}
+        self.damage = max(3, spawn.randint(3, 25) * scale)
+        self.negative_effects = StatusEffects()
         self.apply_terrain_effects()
-        self.abilities = self.get_enemy_abilities()
+        self.abilities = archetype.abilities_for(self.danger_level)
 
     def get_enemy_abilities(self):
-        abilities = []
-        if self.danger_level >= 5:
-            abilities.append("fire_breath")
-        if self.danger_level >= 7:
-            abilities.append("poison_cloud")
-        if "некромант" in self.name.lower():
-            abilities.append("summon_skeleton")
-        if "лиц" in self.name.lower():
-            abilities.append("life_drain")
-        return abilities
+        return get_archetype(self.name).abilities_for(self.danger_level)
 
     def apply_terrain_effects(self):
-        effects = TERRAIN_EFFECTS.get(self.terrain, {})
-        for effect, value in effects.items():
-            if effect == "урон":
-                self.damage = round_value(self.damage * (1 + value))
-            elif effect == "защита":
-                self.hp = round_value(self.hp * (1 + value))
+        damage_mult, hp_mult = terrain_modifiers_by_id()[self.terrain_id]
+        if damage_mult is not None:
+            self.damage = round_value(self.damage * damage_mult)
+        if hp_mult is not None:
+            self.hp = round_value(self.hp * hp_mult)
 
-    def apply_negative_effect(self, effect_name: str, effect_damage: str):
-        self.negative_effects[f"{effect_name}@{len(self.negative_effects)}"] = effect_damage
+    def apply_negative_effect(self, effect_name: str, effect_damage: float):
+        return self.negative_effects.apply(effect_name, effect_damage)
 
     @property
     def damage_attack(self):
-        base_damage = randint(int(self.damage * 0.8), int(self.damage * 1.2))
+        base_damage = self.rng.combat.randint(int(self.damage * 0.8), int(self.damage * 1.2))
 
-        crit_roll = randint(1, 100)
+        crit_roll = self.rng.combat.randint(1, 100)
         if crit_roll <= (self.crit_chance * 100):
             base_damage = round_value(base_damage * self.crit_multiplier)
         return base_damage
@@ -240,32 +255,63 @@ class Enemy:
 
     def choose_action(self, player):
         hp_percent = self.hp / self.max_hp
-        if hp_percent < 0.3 and randint(1, 100) > 70 and "heal" in self.abilities:
+        if hp_percent < 0.3 and self.rng.combat.randint(1, 100) > 70 and "heal" in self.abilities:
             return "heal"
-        if self.abilities and randint(1, 100) > 60:
+        if self.abilities and self.rng.combat.randint(1, 100) > 60:
             return "ability"
         return "attack"
 
     def use_ability(self, player):
-        ability = choice(self.abilities)
+        ability = self.rng.combat.choice(self.abilities)
         if ability == "fire_breath":
             damage = self.damage * 1.8
             player.take_damage(damage)
-            return f"[red]{self.name} использует Огненное дыхание! Нанесено {damage:.2f} урона![/red]"
+            return ability, damage
         elif ability == "poison_cloud":
-            self.apply_negative_effect("Яд", self.damage * 0.15)
-            return f"[green]{self.name} создает Ядовитое облако![/green]"
+            poison = self.damage * 0.15
+            self.apply_negative_effect("Яд", poison)
+            return ability, poison
         elif ability == "summon_skeleton":
-            self.hp += self.max_hp * 0.2
-            return f"[cyan]{self.name} призывает скелета! Восстановлено {self.max_hp * 0.2:.2f} HP[/cyan]"
+            heal_amount = self.max_hp * 0.2
+            self.hp += heal_amount
+            return ability, heal_amount
         elif ability == "life_drain":
             drain = player.hp * 0.15
             player.take_damage(drain)
             self.take_health(drain)
-            return f"[purple]{self.name} высасывает {drain:.2f} HP из вас![/purple]"
-        return f"[yellow]{self.name} использует неизвестную способность![/yellow]"
+            return ability, drain
+        return ability, 0.0
+
+RACE_BONUSES = dense(RACE_IDS, {
+    "орк": {"power": 3, "hp_mult": 1.25},
+    "эльф": {"wisdom": 3, "mana_mult": 1.5, "agility": 1},
+    "хоббит": {"agility": 3, "crit_chance": 0.08},
+    "человек": {"power": 1, "wisdom": 1, "agility": 1},
+    "гном": {"wisdom": 2, "hp_mult": 1.15},
+    "дварф": {"power": 2, "hp_mult": 1.3},
+    "демон": {"power": 3, "wisdom": 1, "hp_mult": 1.1},
+}, {})
+
+CLASS_BONUSES = dense(CLASS_IDS, {
+    "воин": {"power": 3, "hp_mult": 1.3},
+    "маг": {"wisdom": 4, "mana_mult": 2.0, "power": -1},
+    "лучник": {"agility": 4, "crit_chance": 0.15},
+    "плут": {"agility": 3, "crit_multiplier": 0.3},
+    "жрец": {"wisdom": 3, "mana_mult": 1.5},
+    "некромант": {"wisdom": 4, "power": -1},
+    "паладин": {"power": 2, "wisdom": 2, "hp_mult": 1.2},
+    "друид": {"wisdom": 3, "agility": 2, "mana_mult": 1.3},
+}, {})
 
 class Player:
+    __slots__ = (
+        "rng", "name", "race", "race_id", "player_class", "class_id", "lvl", "xp", "xp_to_next", "hp", "max_hp",
+        "passive_abilities", "modifiers", "modifier_sources", "crit_chance", "crit_multiplier",
+        "element_resistances", "terrain", "terrain_id", "story_progress", "quests", "factions", "crafting_materials", "crafting",
+        "equipment", "class_ability_available", "stats", "power", "agility", "wisdom", "hp_mult",
+        "mana_mult", "money", "damage", "mana", "max_mana", "negative_effects", "inventory", "spells",
+    )
+
     def __init__(
         self,
         name: str,
@@ -276,24 +322,27 @@ class Player:
         wisdom: int = 2,
         initial_hp: float = 100.0,
         initial_weapon: Weapon = None,
+        rng: SessionRandom = None,
     ):
+        self.rng = rng or SessionRandom()
         self.name = name
-        self.race = race.lower()
-        self.player_class = player_class.lower()
+        self.set_origin(race.lower(), player_class.lower())
         self.lvl = 1
         self.xp = 0
         self.xp_to_next = 1000
         self.hp = initial_hp
         self.max_hp = initial_hp
         self.passive_abilities = []
+        self.modifiers = {}
+        self.modifier_sources = {}
         self.crit_chance = 0.05
         self.crit_multiplier = 1.5
-        self.element_resistances = {elem: 0 for elem in ELEMENTS}
-        self.terrain = None
+        self.element_resistances = resistance_vector()
+        self.enter_terrain(None)
         self.story_progress = 0
         self.quests = {}
-        self.factions = FRACTIONS.copy()
-        self.crafting_materials = {}
+        self.factions = constants.FRACTIONS.copy()
+        self.set_materials({})
         self.equipment = {"weapon": None, "armor": None, "amulet": None, "ring": None}
         self.class_ability_available = True
         self.stats = {
@@ -307,42 +356,21 @@ class Player:
         self.agility = agility
         self.wisdom = wisdom
 
-        race_bonuses = {
-            "орк": {"power": 3, "hp_mult": 1.25},
-            "эльф": {"wisdom": 3, "mana_mult": 1.5, "agility": 1},
-            "хоббит": {"agility": 3, "crit_chance": 0.08},
-            "человек": {"power": 1, "wisdom": 1, "agility": 1},
-            "гном": {"wisdom": 2, "hp_mult": 1.15},
-            "дварф": {"power": 2, "hp_mult": 1.3},
-            "демон": {"power": 3, "wisdom": 1, "hp_mult": 1.1},
-        }
-
-        class_bonuses = {
-            "воин": {"power": 3, "hp_mult": 1.3},
-            "маг": {"wisdom": 4, "mana_mult": 2.0, "power": -1},
-            "лучник": {"agility": 4, "crit_chance": 0.15},
-            "плут": {"agility": 3, "crit_multiplier": 0.3},
-            "жрец": {"wisdom": 3, "mana_mult": 1.5},
-            "некромант": {"wisdom": 4, "power": -1},
-            "паладин": {"power": 2, "wisdom": 2, "hp_mult": 1.2},
-            "друид": {"wisdom": 3, "agility": 2, "mana_mult": 1.3},
-        }
-
-        bonus = race_bonuses.get(self.race, {})
+        race_bonus = bonus = RACE_BONUSES[self.race_id]
         self.power += bonus.get("power", 0)
         self.agility += bonus.get("agility", 0)
         self.wisdom += bonus.get("wisdom", 0)
         self.crit_chance += bonus.get("crit_chance", 0)
 
-        bonus = class_bonuses.get(self.player_class, {})
+        bonus = CLASS_BONUSES[self.class_id]
         self.power += bonus.get("power", 0)
         self.agility += bonus.get("agility", 0)
         self.wisdom += bonus.get("wisdom", 0)
         self.crit_chance += bonus.get("crit_chance", 0)
         self.crit_multiplier += bonus.get("crit_multiplier", 0)
 
-        self.hp_mult = bonus.get("hp_mult", 1.0) * race_bonuses.get(self.race, {}).get("hp_mult", 1.0)
-        self.mana_mult = bonus.get("mana_mult", 1.0) * race_bonuses.get(self.race, {}).get("mana_mult", 1.0)
+        self.hp_mult = bonus.get("hp_mult", 1.0) * race_bonus.get("hp_mult", 1.0)
+        self.mana_mult = bonus.get("mana_mult", 1.0) * race_bonus.get("mana_mult", 1.0)
 
         self.hp = round_value(self.hp * self.hp_mult)
         self.max_hp = self.hp
@@ -360,68 +388,78 @@ class Player:
         self.apply_race_class_abilities()
         self.calc_additional_params()
 
-        self.negative_effects = {}
+        self.negative_effects = StatusEffects()
         self.inventory = {}
         self.spells = self.get_class_spells()
         self.add_starter_quest()
 
+    def set_origin(self, race: str, player_class: str):
+        self.race = race
+        self.race_id = race_id(race)
+        self.player_class = player_class
+        self.class_id = class_id(player_class)
+
+    def enter_terrain(self, terrain: str):
+        self.terrain = terrain
+        self.terrain_id = terrain_id(terrain)
+
     def use_class_ability(self, enemy=None):
-        if self.player_class == "воин":
+        if self.class_id == WARRIOR:
             damage = self.damage * 2.2
             enemy.take_damage(damage)
-            print(f"[bold red]Сокрушительный удар![/bold red] Нанесено {damage:.2f} урона!")
-        elif self.player_class == "маг":
+            return damage
+        elif self.class_id == MAGE:
             self.mana += self.max_mana * 0.4
-            print("[bold cyan]Концентрация магии![/bold cyan] Восстановлено 40% маны")
-        elif self.player_class == "лучник":
+        elif self.class_id == ARCHER:
             self.crit_chance += 0.25
-            print("[bold yellow]Точный выстрел![/bold yellow] Шанс крита увеличен на 25%")
-        elif self.player_class == "плут":
-            print("[bold green]Теневой шаг![/bold green] Шанс уклонения увеличен на 40%")
-        elif self.player_class == "жрец":
+        elif self.class_id == PRIEST:
             heal_amount = self.max_hp * 0.35
             self.take_health(heal_amount)
-            print(f"[bold white]Божественное исцеление![/bold white] Восстановлено {heal_amount} HP")
-        elif self.player_class == "некромант":
+            return heal_amount
+        elif self.class_id == NECROMANCER:
             drain = enemy.hp * 0.15
             enemy.take_damage(drain)
             self.take_health(drain)
-            print(f"[bold purple]Похищение жизни![/bold purple] Вы забрали {drain:.2f} HP у врага")
-        elif self.player_class == "паладин":
+            return drain
+        elif self.class_id == PALADIN:
             self.damage *= 1.4
-            print("[bold yellow]Благословение оружия![/bold yellow] Урон увеличен на 40%")
-        elif self.player_class == "друид":
+        elif self.class_id == DRUID:
             heal_amount = self.max_hp * 0.25
             self.take_health(heal_amount)
             self.mana += self.max_mana * 0.25
-            print("[bold green]Сила природы![/bold green] Восстановлено 25% HP и маны")
+            return heal_amount
+        return None
 
     def get_class_spells(self):
+        return class_spells(self.player_class, self.lvl)
+
+    @staticmethod
+    def build_class_spells(player_class: str, lvl: int):
         base_spells = {
             "ФАЕРБОЛЛ": AttackSpell(
                 spell_name="Фаерболл",
                 spell_desc="Наносит огненный урон",
-                mana_cost=round_value(25.0 * self.lvl * DAMAGE_MULTIPLIER),
-                spell_damage=round_value(40.0 * self.lvl * DAMAGE_MULTIPLIER),
+                mana_cost=round_value(25.0 * lvl * DAMAGE_MULTIPLIER),
+                spell_damage=round_value(40.0 * lvl * DAMAGE_MULTIPLIER),
                 element="огонь",
             ),
             "ЛЕДЯНОЙ ШТОРМ": AttackSpell(
                 spell_name="Ледяной шторм",
                 spell_desc="Наносит ледяной урон",
-                mana_cost=round_value(20.0 * self.lvl * DAMAGE_MULTIPLIER),
-                spell_damage=round_value(35.0 * self.lvl * DAMAGE_MULTIPLIER),
+                mana_cost=round_value(20.0 * lvl * DAMAGE_MULTIPLIER),
+                spell_damage=round_value(35.0 * lvl * DAMAGE_MULTIPLIER),
                 element="лед",
             ),
             "ИСЦЕЛЕНИЕ": HealthSpell(
                 spell_name="Исцеление",
                 spell_desc="Восстанавливает здоровье",
-                mana_cost=round_value(15.0 * self.lvl * DAMAGE_MULTIPLIER),
-                healing=round_value(25.0 * self.lvl * HEALING_MULTIPLIER),
+                mana_cost=round_value(15.0 * lvl * DAMAGE_MULTIPLIER),
+                healing=round_value(25.0 * lvl * HEALING_MULTIPLIER),
             ),
             "МАЛОЕ ЗАПИТЫВАНИЕ": ManaSpell(
                 spell_name="Малое запитывание",
                 spell_desc="Восстанавливает ману",
-                mana=round_value(20.0 * self.lvl * HEALING_MULTIPLIER),
+                mana=round_value(20.0 * lvl * HEALING_MULTIPLIER),
             ),
         }
 
@@ -430,28 +468,28 @@ class Player:
                 "МОЛНИЯ": AttackSpell(
                     spell_name="Молния",
                     spell_desc="Наносит урон электричеством",
-                    mana_cost=round_value(35.0 * self.lvl * DAMAGE_MULTIPLIER),
-                    spell_damage=round_value(50.0 * self.lvl * DAMAGE_MULTIPLIER),
+                    mana_cost=round_value(35.0 * lvl * DAMAGE_MULTIPLIER),
+                    spell_damage=round_value(50.0 * lvl * DAMAGE_MULTIPLIER),
                     element="электричество",
                 ),
                 "ТЕЛЕПОРТАЦИЯ": ManaSpell(
                     spell_name="Телепортация",
                     spell_desc="Позволяет избежать боя",
-                    mana=round_value(40.0 * self.lvl * HEALING_MULTIPLIER),
-                    mana_cost=round_value(25.0 * self.lvl * DAMAGE_MULTIPLIER),
+                    mana=round_value(40.0 * lvl * HEALING_MULTIPLIER),
+                    mana_cost=round_value(25.0 * lvl * DAMAGE_MULTIPLIER),
                 ),
             },
             "жрец": {
                 "ВОСКРЕШЕНИЕ": HealthSpell(
                     spell_name="Воскрешение",
                     spell_desc="Восстанавливает большое количество здоровья",
-                    mana_cost=round_value(40.0 * self.lvl * DAMAGE_MULTIPLIER),
-                    healing=round_value(80.0 * self.lvl * HEALING_MULTIPLIER),
+                    mana_cost=round_value(40.0 * lvl * DAMAGE_MULTIPLIER),
+                    healing=round_value(80.0 * lvl * HEALING_MULTIPLIER),
                 ),
                 "СВЯТОЙ ЩИТ": HealthSpell(
                     spell_name="Святой щит",
                     spell_desc="Дает временную защиту",
-                    mana_cost=round_value(25.0 * self.lvl * DAMAGE_MULTIPLIER),
+                    mana_cost=round_value(25.0 * lvl * DAMAGE_MULTIPLIER),
                     healing=0,
                 ),
             },
@@ -459,56 +497,75 @@ class Player:
                 "ВОЗЗЫВАНИЕ МЕРТВЕЦОВ": AttackSpell(
                     spell_name="Воззвание мертвецов",
                     spell_desc="Призывает скелетов для атаки",
-                    mana_cost=round_value(50.0 * self.lvl * DAMAGE_MULTIPLIER),
-                    spell_damage=round_value(60.0 * self.lvl * DAMAGE_MULTIPLIER),
+                    mana_cost=round_value(50.0 * lvl * DAMAGE_MULTIPLIER),
+                    spell_damage=round_value(60.0 * lvl * DAMAGE_MULTIPLIER),
                     element="тьма",
                 ),
                 "ВЫСАСЫВАНИЕ ДУШИ": HealthSpell(
                     spell_name="Высасывание души",
                     spell_desc="Крадет здоровье у врага",
-                    mana_cost=round_value(35.0 * self.lvl * DAMAGE_MULTIPLIER),
-                    healing=round_value(40.0 * self.lvl * HEALING_MULTIPLIER),
+                    mana_cost=round_value(35.0 * lvl * DAMAGE_MULTIPLIER),
+                    healing=round_value(40.0 * lvl * HEALING_MULTIPLIER),
                 ),
             },
             "паладин": {
                 "СВЯЩЕННЫЙ УДАР": AttackSpell(
                     spell_name="Священный удар",
                     spell_desc="Наносит урон светом",
-                    mana_cost=round_value(30.0 * self.lvl * DAMAGE_MULTIPLIER),
-                    spell_damage=round_value(45.0 * self.lvl * DAMAGE_MULTIPLIER),
+                    mana_cost=round_value(30.0 * lvl * DAMAGE_MULTIPLIER),
+                    spell_damage=round_value(45.0 * lvl * DAMAGE_MULTIPLIER),
                     element="свет",
                 ),
                 "БЛАГОСЛОВЕНИЕ": HealthSpell(
                     spell_name="Благословение",
                     spell_desc="Исцеляет и усиливает",
-                    mana_cost=round_value(35.0 * self.lvl * DAMAGE_MULTIPLIER),
-                    healing=round_value(35.0 * self.lvl * HEALING_MULTIPLIER),
+                    mana_cost=round_value(35.0 * lvl * DAMAGE_MULTIPLIER),
+                    healing=round_value(35.0 * lvl * HEALING_MULTIPLIER),
                 ),
             },
             "друид": {
                 "ГНЕВ ПРИРОДЫ": AttackSpell(
                     spell_name="Гнев природы",
                     spell_desc="Наносит урон природной стихией",
-                    mana_cost=round_value(25.0 * self.lvl * DAMAGE_MULTIPLIER),
-                    spell_damage=round_value(40.0 * self.lvl * DAMAGE_MULTIPLIER),
+                    mana_cost=round_value(25.0 * lvl * DAMAGE_MULTIPLIER),
+                    spell_damage=round_value(40.0 * lvl * DAMAGE_MULTIPLIER),
                     element="природа",
                 ),
                 "ЦЕЛИТЕЛЬНЫЙ РОСТ": HealthSpell(
                     spell_name="Целительный рост",
                     spell_desc="Исцеляет союзников",
-                    mana_cost=round_value(20.0 * self.lvl * DAMAGE_MULTIPLIER),
-                    healing=round_value(30.0 * self.lvl * HEALING_MULTIPLIER),
+                    mana_cost=round_value(20.0 * lvl * DAMAGE_MULTIPLIER),
+                    healing=round_value(30.0 * lvl * HEALING_MULTIPLIER),
                 ),
             },
         }
 
         spells = base_spells
-        spells.update(class_spells.get(self.player_class, {}))
+        spells.update(class_spells.get(player_class, {}))
         return spells
 
+    def add_passive_ability(self, ability: PassiveAbility):
+        self.passive_abilities.append(ability)
+        self.rebuild_modifiers()
+
+    def rebuild_modifiers(self):
+        modifiers = {}
+        sources = {}
+        for ability in self.passive_abilities:
+            if isinstance(ability.value, bool):
+                modifiers[ability.param] = modifiers.get(ability.param, False) or ability.value
+            else:
+                modifiers[ability.param] = modifiers.get(ability.param, 0) + ability.value
+            sources.setdefault(ability.param, ability)
+        self.modifiers = modifiers
+        self.modifier_sources = sources
+
+    def get_modifier(self, param: str, default=0):
+        return self.modifiers.get(param, default)
+
     def apply_race_class_abilities(self):
-        if self.race == "человек":
-            self.passive_abilities.append(
+        if self.race_id == HUMAN:
+            self.add_passive_ability(
                 PassiveAbility(
                     name="Универсал",
                     desc="Каждый гейм-мув вы получаете дополнительную ману, монеты или XP.",
@@ -516,8 +573,8 @@ class Player:
                     value=8,
                 )
             )
-        elif self.race == "хоббит":
-            self.passive_abilities.append(
+        elif self.race_id == HOBBIT:
+            self.add_passive_ability(
                 PassiveAbility(
                     name="Скидка",
                     desc="Хоббиты обожают деньги и всегда могут получить скидку (25%).",
@@ -525,8 +582,8 @@ class Player:
                     value=25,
                 )
             )
-        elif self.race == "орк":
-            self.passive_abilities.append(
+        elif self.race_id == ORC:
+            self.add_passive_ability(
                 PassiveAbility(
                     name="Стойкость",
                     desc=f"Орочье наследие сделало вас невероятно стойким. Вы можете уходить в минус на {40 * self.lvl}HP.",
@@ -534,8 +591,8 @@ class Player:
                     value=40,
                 )
             )
-        elif self.race == "эльф":
-            self.passive_abilities.append(
+        elif self.race_id == ELF:
+            self.add_passive_ability(
                 PassiveAbility(
                     name="Мания маны",
                     desc="Эльфийская душа позволяет вам получить ману за убийство врага.",
@@ -543,8 +600,8 @@ class Player:
                     value=1.5,
                 )
             )
-        elif self.race == "гном":
-            self.passive_abilities.append(
+        elif self.race_id == GNOME:
+            self.add_passive_ability(
                 PassiveAbility(
                     name="Инженер",
                     desc="Гномы могут чинить оружие без затрат",
@@ -552,8 +609,8 @@ class Player:
                     value=True,
                 )
             )
-        elif self.race == "дварф":
-            self.passive_abilities.append(
+        elif self.race_id == DWARF:
+            self.add_passive_ability(
                 PassiveAbility(
                     name="Каменная кожа",
                     desc="Дварфы получают меньше урона",
@@ -561,8 +618,8 @@ class Player:
                     value=0.12,
                 )
             )
-        elif self.race == "демон":
-            self.passive_abilities.append(
+        elif self.race_id == DEMON:
+            self.add_passive_ability(
                 PassiveAbility(
                     name="Огненная аура",
                     desc="Демоны наносят дополнительный огненный урон",
@@ -571,8 +628,8 @@ class Player:
                 )
             )
 
-        if self.player_class == "лучник":
-            self.passive_abilities.append(
+        if self.class_id == ARCHER:
+            self.add_passive_ability(
                 PassiveAbility(
                     name="Меткий выстрел",
                     desc="Увеличивает шанс критического удара",
@@ -580,8 +637,8 @@ class Player:
                     value=0.08,
                 )
             )
-        elif self.player_class == "плут":
-            self.passive_abilities.append(
+        elif self.class_id == ROGUE:
+            self.add_passive_ability(
                 PassiveAbility(
                     name="Скрытность",
                     desc="Позволяет избегать урона",
@@ -589,8 +646,8 @@ class Player:
                     value=0.15,
                 )
             )
-        elif self.player_class == "жрец":
-            self.passive_abilities.append(
+        elif self.class_id == PRIEST:
+            self.add_passive_ability(
                 PassiveAbility(
                     name="Божественная защита",
                     desc="Уменьшает получаемый урон",
@@ -598,8 +655,8 @@ class Player:
                     value=0.08,
                 )
             )
-        elif self.player_class == "паладин":
-            self.passive_abilities.append(
+        elif self.class_id == PALADIN:
+            self.add_passive_ability(
                 PassiveAbility(
                     name="Светлая аура",
                     desc="Увеличивает сопротивление темной магии",
@@ -607,8 +664,8 @@ class Player:
                     value=0.25,
                 )
             )
-        elif self.player_class == "друид":
-            self.passive_abilities.append(
+        elif self.class_id == DRUID:
+            self.add_passive_ability(
                 PassiveAbility(
                     name="Единение с природой",
                     desc="Увеличивает эффективность в природных зонах",
@@ -618,17 +675,17 @@ class Player:
             )
 
     def calc_additional_params(self):
-        if self.race == "эльф":
+        if self.race_id == ELF:
             self.damage = round_value(self.damage * 0.95)
-        elif self.race == "орк":
+        elif self.race_id == ORC:
             self.damage = round_value(self.damage * 1.2)
-        elif self.race == "хоббит":
+        elif self.race_id == HOBBIT:
             self.damage = round_value(self.damage * 0.85)
             self.mana = round_value(self.mana * 0.9)
 
     def calc_damage(self):
         base_damage = self.power + self.equipment["weapon"].value
-        crit_roll = randint(1, 100)
+        crit_roll = self.rng.combat.randint(1, 100)
         is_crit = crit_roll <= (self.crit_chance * 100)
 
         if is_crit:
@@ -643,6 +700,7 @@ class Player:
         for ability in self.passive_abilities:
             if ability.value > 0:
                 ability.value = round_value(ability.value * 1.08)
+        self.rebuild_modifiers()
 
         self.max_hp = round_value(self.max_hp * 1.15)
         self.hp = self.max_hp
@@ -654,21 +712,15 @@ class Player:
 
         self.spells = self.get_class_spells()
         self.xp = 0
-        print(f"[bold green]Вы достигли {self.lvl} уровня![/bold green]")
 
-    def apply_negative_effect(self, effect_name: str, effect_damage: str):
-        self.negative_effects[f"{effect_name}#{len(self.negative_effects)}"] = effect_damage
+    def apply_negative_effect(self, effect_name: str, effect_damage: float):
+        return self.negative_effects.apply(effect_name, effect_damage)
 
     def is_dead(self):
         return self.hp <= 0
 
     def take_damage(self, damage: float):
-        reduction = 0
-        for ability in self.passive_abilities:
-            if ability.param == "damage_reduction":
-                reduction += ability.value
-
-        damage = max(1, damage * (1 - reduction))
+        damage = max(1, damage * (1 - self.modifiers.get("damage_reduction", 0)))
         self.hp = round_value(max(0, self.hp - damage))
         self.stats["damage_dealt"] += damage
 
@@ -687,9 +739,20 @@ class Player:
 
     def pickup_item(self, item: Item):
         if item.type == "material":
-            self.crafting_materials[item.name] = self.crafting_materials.get(item.name, 0) + 1
+            self.add_material(item.name)
         else:
-            self.inventory[item.name] = item
+            # Магазин отдает один и тот же объект при каждой покупке, в инвентарь кладем копию
+            self.put_item(copy(item))
+        self.trigger_quests("pickup", (item.name,))
+
+    def put_item(self, item: Item):
+        # Одинаковые предметы не перезаписывают друг друга: повтор получает номер.
+        # Ключ всегда равен имени, на этом держатся сохранения и журнал
+        name, number = item.name, 2
+        while item.name in self.inventory:
+            item.name = f"{name} ({number})"
+            number += 1
+        self.inventory[item.name] = item
 
     def drop_item(self, item_name: str):
         if item_name in self.inventory:
@@ -700,23 +763,16 @@ class Player:
             item = self.inventory[item_name]
             if item.type in self.equipment:
                 old_item = self.equipment[item.type]
+                del self.inventory[item_name]
                 if old_item:
-                    self.inventory[old_item.name] = old_item
+                    self.put_item(old_item)
                 self.equipment[item.type] = item
-                del self.inventory[item_name]
                 return True
         return False
 
     def add_quest(self, quest_id: str):
-        if quest_id in QUESTS and quest_id not in self.quests:
-            quest_data = QUESTS[quest_id]
-            self.quests[quest_id] = Quest(
-                quest_id,
-                quest_data["name"],
-                quest_data["description"],
-                quest_data["reward"],
-                quest_data.get("required", 1)
-            )
+        if quest_id in quest_registry() and quest_id not in self.quests:
+            self.quests[quest_id] = Quest(quest_id)
             return True
         return False
 
@@ -732,7 +788,7 @@ class Player:
             self.stats["quests_completed"] += 1
 
             if "item" in reward:
-                self.pickup_item(Item(reward["item"], "armor", randint(5, 15)))
+                self.pickup_item(Item(reward["item"], "armor", self.rng.loot.randint(5, 15)))
 
             if "reputation" in reward:
                 for faction, points in reward["reputation"].items():
@@ -749,40 +805,89 @@ class Player:
                 self.story_progress = 5
 
             # Добавление следующего квеста в цепочке
-            next_quest = QUEST_CHAINS.get(quest_id)
+            next_quest = quest.definition.next_quest
             if next_quest and next_quest not in self.quests:
                 self.add_quest(next_quest)
 
             return True
         return False
 
+    def trigger_quests(self, event: str, keys=(), terrain: int = NO_ID):
+        # Сначала отбираются активные квесты: квест, открытый наградой, не продвигается тем же событием
+        active = []
+        for trigger in find_triggers(event, keys, terrain):
+            quest = self.quests.get(trigger.quest_id)
+            if quest is not None and not quest.completed:
+                active.append((quest, trigger))
+
+        completed = []
+        for quest, trigger in active:
+            if quest.completed:
+                continue
+            quest.progress = min(quest.required, quest.progress + trigger.amount)
+            if quest.progress >= quest.required and self.complete_quest(quest.id):
+                completed.append(quest.id)
+        return completed
+
     def add_starter_quest(self):
         self.add_quest("начало")
 
-    def craft_item(self, item_name: str):
-        if item_name in CRAFT_RECIPES:
-            recipe = CRAFT_RECIPES[item_name]
-            for material, amount in recipe.items():
-                if self.crafting_materials.get(material, 0) < amount:
-                    return False
+    def set_materials(self, materials: dict):
+        self.crafting_materials = materials
+        self.crafting = CraftingIndex(materials)
+
+    def set_material(self, material: str, count: int):
+        # Все изменения материалов идут через эти методы, чтобы индекс рецептов не устаревал
+        if count > 0:
+            self.crafting_materials[material] = count
+        else:
+            self.crafting_materials.pop(material, None)
+        self.crafting.refresh((material,))
+
+    def add_material(self, material: str, amount: int = 1):
+        self.set_material(material, self.crafting_materials.get(material, 0) + amount)
 
+    def craft_item(self, item_name: str):
+        return self.craft_many(item_name, 1) == 1
+
+    def craft_many(self, item_name: str, count: int = None):
+        # count=None - столько, на сколько хватает материалов; возвращает число созданных предметов
+        count = self.crafting.count(item_name) if count is None else min(count, self.crafting.count(item_name))
+        if count <= 0:
+            return 0
+
+        recipe = craftable_recipes()[item_name]
+        crafted = 0
+        for _ in range(count):
+            crafted_item = self.make_crafted_item(item_name)
+            if crafted_item is None:
+                break
+            # Материалы списываются только за созданный предмет
             for material, amount in recipe.items():
                 self.crafting_materials[material] -= amount
                 if self.crafting_materials[material] <= 0:
                     del self.crafting_materials[material]
+            self.pickup_item(crafted_item)
+            crafted += 1
+        self.crafting.refresh(recipe)
+        return crafted
+
+    def make_crafted_item(self, item_name: str):
+        kind = craft_kind(item_name)
+        if kind == "consumable":
+            return Item(item_name, "consumable", self.rng.loot.randint(20, 50) * self.lvl)
+        elif kind == "weapon":
+            return Weapon(item_name, 15 + self.lvl * 2, 4)
+        elif kind == "armor":
+            return Armor(item_name, 20 + self.lvl * 3, "armor")
+        return None
 
-            crafted_item = None
-            if item_name.startswith("Зелье"):
-                crafted_item = Item(item_name, "consumable", randint(20, 50) * self.lvl)
-            elif item_name.startswith("Стальной"):
-                crafted_item = Weapon(item_name, 15 + self.lvl * 2, 4)
-            elif item_name.startswith("Мифриловые"):
-                crafted_item = Armor(item_name, 20 + self.lvl * 3, "armor")
+    def get_story_progress(self):
+        stages = constants.STORY_PROGRESS
+        return stages[min(self.story_progress, len(stages) - 1)]
 
-            if crafted_item:
-                self.pickup_item(crafted_item)
-                return True
-        return False
 
-    def get_story_progress(self):
-        return STORY_PROGRESS[min(self.story_progress, len(STORY_PROGRESS) - 1)]
+# Заклинания не меняются в бою, поэтому одна копия на (класс, уровень) делится всеми сессиями
+@lru_cache(maxsize=None)
+def class_spells(player_class: str, lvl: int):
+    return MappingProxyType(Player.build_class_spells(player_class, lvl))
@@ -0,0 +1,297 @@
+from dataclasses import dataclass, field
+from gamecore.constants import ELEMENTS
+from gamecore.elements import NO_ELEMENT, damage_multiplier
+from gamecore.ids import DEMON, HOBBIT, ORC
+
+FREE_ACTIONS = ("analyze",)
+
+
+@dataclass
+class BattleAction:
+    kind: str
+    target: str = None
+
+
+@dataclass
+class BattleEvent:
+    kind: str
+    value: float = 0.0
+    detail: str = None
+
+
+@dataclass
+class BattleResult:
+    outcome: str
+    turns: int
+    loot: float
+    xp_gain: float
+    player_hp: float
+    enemy_hp: float
+    events: list = field(default_factory=list)
+    completed_quests: list = field(default_factory=list)
+
+    @property
+    def won(self):
+        return self.outcome == "victory"
+
+
+def always_attack(battle):
+    return BattleAction("attack")
+
+
+def chain_listeners(*listeners):
+    listeners = [listener for listener in listeners if listener is not None]
+    if len(listeners) < 2:
+        return listeners[0] if listeners else None
+
+    def listener(event, battle):
+        for callback in listeners:
+            callback(event, battle)
+    return listener
+
+
+class Battle:
+    def __init__(self, player, enemy, action_source=always_attack, listener=None, record_events: bool = True, max_turns: int = None):
+        self.player = player
+        self.enemy = enemy
+        self.action_source = action_source
+        self.listener = listener
+        self.events = [] if record_events else None
+        self.max_turns = max_turns
+        self.turn = 0
+        self.rng = player.rng.combat
+
+        self.loot = max(10, (enemy.hp * (player.lvl * enemy.danger_level)) / 8)
+        self.xp_gain = max(5, self.loot / 2)
+
+        if player.race_id == HOBBIT:
+            self.loot *= 1.3
+        if player.race_id == ORC:
+            enemy.hp -= enemy.hp * 0.05
+
+        self.fortitude = None
+        if "health_fortitude" in player.modifiers:
+            self.fortitude = player.modifier_sources["health_fortitude"].value * player.lvl
+
+    def emit(self, kind: str, value: float = 0.0, detail: str = None):
+        if self.events is None and self.listener is None:
+            return
+        event = BattleEvent(kind, value, detail)
+        if self.events is not None:
+            self.events.append(event)
+        if self.listener is not None:
+            self.listener(event, self)
+
+    def run(self):
+        player, enemy = self.player, self.enemy
+
+        while enemy.hp > 0:
+            if player.hp <= 0:
+                if self.fortitude is None:
+                    break
+                player.hp = self.fortitude
+                self.emit("fortitude", self.fortitude)
+                self.fortitude = None
+
+            if self.max_turns is not None and self.turn >= self.max_turns:
+                return self.finish("draw")
+
+            self.turn += 1
+            action = self.action_source(self)
+            outcome = self.player_turn(action)
+
+            if outcome == "fled":
+                return self.finish("fled")
+            if outcome == "free":
+                continue
+
+            self.enemy_turn()
+            self.tick_effects()
+            self.emit("turn_end")
+
+        return self.finish("victory" if enemy.is_dead() else "defeat")
+
+    def player_turn(self, action: BattleAction):
+        player, enemy = self.player, self.enemy
+        kind = action.kind
+
+        if kind in FREE_ACTIONS:
+            self.emit(kind)
+            return "free"
+
+        if kind == "attack":
+            damage, is_crit = player.calc_damage()
+            if is_crit:
+                self.emit("crit", damage)
+
+            weapon = player.equipment["weapon"]
+            damage *= self.element_modifier(weapon.element_id)
+            enemy.take_damage(damage)
+            self.emit("attack", damage)
+            weapon.use(self.rng)
+        elif kind == "heal":
+            heal_amount = self.rng.randint(5, 15) * player.lvl
+            player.take_health(heal_amount)
+            self.emit("heal", heal_amount)
+        elif kind == "block":
+            if self.rng.randint(1, 100) <= player.agility * 5:
+                self.emit("block")
+                return "free"
+            self.emit("block_failed")
+        elif kind == "flee":
+            if self.rng.randint(1, 100) <= player.agility * 5:
+                self.emit("flee")
+                return "fled"
+            self.emit("flee_failed")
+        elif kind == "item":
+            item = player.inventory.get(action.target)
+            if item is None:
+                pass
+            elif item.type == "consumable":
+                player.take_health(item.value)
+                player.drop_item(action.target)
+                self.emit("item_used", item.value, action.target)
+            elif item.type in ("weapon", "armor"):
+                if player.equip_item(action.target):
+                    self.emit("equipped", detail=action.target)
+        elif kind == "spell":
+            return self.cast_spell(action.target)
+        elif kind == "class_ability":
+            if player.class_ability_available:
+                value = player.use_class_ability(enemy)
+                player.class_ability_available = False
+                self.emit("class_ability", value or 0.0, player.player_class)
+            else:
+                self.emit("class_ability_unavailable")
+
+        return "done"
+
+    def cast_spell(self, spell_name: str):
+        player, enemy = self.player, self.enemy
+        spell = player.spells.get(spell_name)
+        if spell is None:
+            return "done"
+
+        if player.mana < spell.mana_cost:
+            self.emit("no_mana", spell.mana_cost, spell.spell_name)
+            return "free"
+
+        player.mana -= spell.mana_cost
+        self.emit("spell", spell.mana_cost, spell.spell_name)
+
+        if spell.spell_type == "HEALTH":
+            heal_amount = spell.healing * (1 + player.wisdom / 100)
+            player.take_health(heal_amount)
+            self.emit("spell_heal", heal_amount)
+        elif spell.spell_type == "MANA":
+            mana_amount = spell.mana * (1 + player.wisdom / 100)
+            player.mana = min(player.max_mana, player.mana + mana_amount)
+            self.emit("spell_mana", mana_amount)
+        elif spell.spell_type == "ATTACK":
+            damage = spell.spell_damage * (1 + player.wisdom / 100)
+            damage *= self.element_modifier(spell.element_id)
+            enemy.take_damage(damage)
+            self.emit("spell_damage", damage)
+
+        if spell_name == "ТЕЛЕПОРТАЦИЯ":
+            self.emit("teleport")
+            return "fled"
+        return "done"
+
+    def element_modifier(self, element_id: int):
+        if element_id == NO_ELEMENT:
+            return 1.0
+
+        resistance = self.enemy.element_resistances[element_id]
+        if resistance != 0:
+            self.emit("element", resistance, ELEMENTS[element_id])
+        return damage_multiplier(resistance)
+
+    def enemy_turn(self):
+        player, enemy = self.player, self.enemy
+        self.emit("enemy_turn")
+
+        enemy_action = enemy.choose_action(player)
+        if enemy_action == "attack":
+            dmg = enemy.damage_attack
+            dodge_chance = player.modifiers.get("dodge_chance", 0) * 100
+
+            if self.rng.randint(1, 100) <= dodge_chance:
+                self.emit("dodge", dmg)
+            else:
+                player.take_damage(dmg)
+                self.emit("enemy_attack", dmg)
+        elif enemy_action == "heal":
+            heal_amount = enemy.max_hp * 0.15
+            enemy.take_health(heal_amount)
+            self.emit("enemy_heal", heal_amount)
+        elif enemy_action == "ability":
+            ability, value = enemy.use_ability(player)
+            self.emit("enemy_ability", value, ability)
+
+    def tick_effects(self):
+        player, enemy = self.player, self.enemy
+
+        if enemy.negative_effects:
+            ticking, expired = enemy.negative_effects.tick()
+            for effect in ticking:
+                effect_damage = effect.damage * effect.stacks * self.rng.randint(80, 120) / 100
+                enemy.take_damage(effect_damage)
+                self.emit("effect_tick", effect_damage, effect.name)
+            for effect in expired:
+                self.emit("effect_expired", effect.stacks, effect.name)
+
+        if player.negative_effects:
+            ticking, expired = player.negative_effects.tick()
+            for effect in ticking:
+                effect_damage = effect.damage * effect.stacks * self.rng.randint(80, 120) / 100
+                player.take_damage(effect_damage)
+                self.emit("player_effect_tick", effect_damage, effect.name)
+            for effect in expired:
+                self.emit("player_effect_expired", effect.stacks, effect.name)
+
+    def finish(self, outcome: str):
+        player, enemy = self.player, self.enemy
+        completed_quests = []
+
+        if outcome == "victory":
+            self.emit("victory", self.loot)
+
+            mana_loot = player.modifiers.get("mana_loot")
+            if mana_loot:
+                mana_gain = self.loot * mana_loot
+                player.mana = min(player.max_mana, player.mana + mana_gain)
+                self.emit("mana_loot", mana_gain)
+            if "fire_damage" in player.modifiers and player.race_id == DEMON:
+                self.emit("fire_aura")
+
+            player.money += self.loot
+            player.xp += self.xp_gain
+            player.hp += player.max_hp * 0.05
+            player.stats["enemies_killed"] += 1
+
+            completed_quests = player.trigger_quests("kill", enemy.tags, enemy.terrain_id)
+            for quest_id in completed_quests:
+                self.emit("quest_completed", detail=quest_id)
+        elif outcome == "defeat":
+            self.emit("defeat")
+            player.money = max(0, player.money * 0.8)
+            player.xp = max(0, player.xp * 0.9)
+
+        player.class_ability_available = True
+        self.emit("battle_end", player.hp, outcome)
+
+        return BattleResult(
+            outcome=outcome,
+            turns=self.turn,
+            loot=self.loot,
+            xp_gain=self.xp_gain,
+            player_hp=player.hp,
+            enemy_hp=enemy.hp,
+            events=self.events if self.events is not None else [],
+            completed_quests=completed_quests,
+        )
+
+
+def run_battle(player, enemy, action_source=always_attack, listener=None, record_events: bool = True, max_turns: int = None):
+    return Battle(player, enemy, action_source, listener, record_events, max_turns).run()
@@ -1,425 +1,25 @@
+# Игровой контент (расы, враги, предметы, квесты, тексты) живет в наборах gamecore/content/*/*.json
+# и подгружается из кэша по категориям при первом обращении: constants.DIALOGUES и т.п.
+from gamecore.content import CATEGORIES, load_category
+
 LOGO_COLORS = {"*": "red"}
 RIP_COLORS = {"*": "white"}
 
-RACES = ["орк", "эльф", "хоббит", "человек", "гном", "дварф", "демон"]
-CLASSES = ["воин", "маг", "лучник", "плут", "жрец", "некромант", "паладин", "друид"]
-
-FRACTIONS = {
-    "Орден Света": {"добро": 100, "зло": 0, "отношение": 50},
-    "Темное Братство": {"добро": 0, "зло": 100, "отношение": 0},
-    "Гильдия Магов": {"добро": 30, "зло": 30, "отношение": 40},
-    "Гильдия Воров": {"добро": 10, "зло": 60, "отношение": 30},
-    "Друиды Леса": {"добро": 70, "зло": 10, "отношение": 60},
-    "Клан Гномов": {"добро": 40, "зло": 20, "отношение": 50},
-    "Культ Демонов": {"добро": 0, "зло": 100, "отношение": 10},
-}
-
-CITIES = [
-    "Барагваль, город орков",
-    "Кургах-длань, столица орков",
-    "Дарсдах, город орков",
-    "Пракх, деревня орков",
-    "Бандарос, город людей",
-    "Люгенбург, столица людей",
-    "Штангерт, город людей",
-    "Вабария, деревня людей",
-    "Элас, город эльфов",
-    "Сильвер-форестия, столица эльфов",
-    "Мунлия, город эльфов",
-    "Улия, деревня эльфов",
-    "Лесопол, город хоббитов",
-    "Косбрим, столица хоббитов",
-    "Корнфилд, город хоббитов",
-    "Бентбрим, деревня хоббитов",
-    "Камнеград, город гномов",
-    "Подгорье, столица гномов",
-    "Твердыня, город дварфов",
-    "Черная Кузня, столица дварфов",
-    "Адское Пламя, город демонов",
-    "Бездна, столица демонов",
-]
+MAX_DANGER_LEVEL = 11
 
-ENEMIES = [
-    "Колдун",
-    "Некромант",
-    "Огр",
-    "Орк",
-    "Орк-бандит",
-    "Эльф-бандит",
-    "Человек-бандит",
-    "Хоббит-бандит",
-    "Тролль",
-    "Гоблин",
-    "Разбойник",
-    "Скелет",
-    "Мертвец",
-    "Призрак",
-    "Каменный тролль",
-    "Черный воин",
-    "Проклятый",
-    "Демон",
-    "Падший ангел",
-    "Лич",
-    "Вампир",
-    "Оборотень",
-    "Горгулья",
-    "Василиск",
-    "Минотавр",
-    "Химера",
-    "Дракон",
-    "Элементаль Огня",
-    "Элементаль Воды",
-    "Элементаль Земли",
-    "Элементаль Воздуха",
-    "Темный Рыцарь",
-    "Архимаг",
-    "Теневой Ассасин",
-    "Лесной Дух",
-    "Болотный Тварь",
-    "Пещерный Ужас",
-    "Лесной Вредитель",
-]
-
-WEAPONS = [
-    "Клинок теней",
-    "Серебряный меч",
-    "Стальной топор",
-    "Деревянный щит",
-    "Тинёвая булава",
-    "Зачарованная пика",
-    "Чёрный нож",
-    "Древесный копьё",
-    "Медный меч",
-    "Кристальный сабля",
-    "Ледяной топор",
-    "Железный алебарда",
-    "Огненный кинжал",
-    "Каменная булава",
-    "Золотой секир",
-    "Стальной колющий нож",
-    "Теневой щит",
-    "Ржавый меч",
-    "Костяная пика",
-    "Ядовитый нож",
-    "Кровавый молот",
-    "Лунный меч",
-    "Чугунный топор",
-    "Эбонитовый щит",
-    "Обсидиановая булава",
-    "Драконий меч",
-    "Плетёный щит",
-    "Огненный меч",
-    "Теневой кинжал",
-    "Серебряный шип",
-    "Бронированный сейф",
-    "Катана",
-    "Древесный сюрикен",
-    "Заточенный сляб",
-    "Чёрный алебарда",
-    "Зеркальный меч",
-    "Легкий щит",
-    "Каменный молот",
-    "Серебряная боевая секира",
-    "Зачарованный эссенемат",
-    "Облачный кинжал",
-    "Згнилой булыжник",
-    "Рубиновая пика",
-    "Громовой клинок",
-    "Стальные когти",
-    "Лодочный топор",
-    "Теневой крюк",
-    "Лунный шип",
-    "Мифриловый меч",
-    "Буревестник метательный",
-    "Эбеновый щит",
-    "Вишнёвый клинок",
-    "Кристальный топор",
-    "Древесная булава",
-    "Огненный меч",
-    "Теневой жезл",
-    "Янтарный топор",
-    "Магический нож",
-    "Проклятый щит",
-    "Крымский дельфин",
-    "Ледяная булава",
-    "Лунный молот",
-    "Серебряная цепь",
-    "Ядовитая кость",
-    "Черный клинок",
-    "Серебряная стрела",
-    "Громовой топор",
-    "Заряженный полуторный меч",
-    "Изогнутый лук",
-    "Пылающий кинжал",
-    "Тёмный щит",
-    "Бурый крест",
-    "Переливающийся меч",
-    "Запретный шип",
-    "Магма молот",
-    "Ужасная пика",
-    "Громовая булава",
-    "Светлый копьё",
-    "Талисманный клинок",
-    "Скальный топор",
-    "Отравленный щит",
-    "Хрустальный меч",
-    "Кровавый нагрудник",
-    "Смертельный нож",
-    "Мифриловый топор",
-    "Чёрный кастет",
-    "Заброшенный щит",
-    "Фиолетовый меч",
-    "Обожжённый калкан",
-    "Лавровый топор",
-    "Сердце дракона",
-    "Вихревой кинжал",
-    "Чистилище",
-    "Теневое копьё",
-    "Ящеричный клинок",
-    "Струна",
-    "Светило",
-    "Костяной нож",
-    "Пустынный шип",
-    "Молния меча",
-    "Крушитель",
-    "Скрижаль",
-    "Ловкий абордажный щит",
-    "Небесный меч",
-    "Фантомный клинок",
-]
-
-ARMOR = [
-    "Кожаный доспех",
-    "Кольчуга",
-    "Латы",
-    "Чешуйчатый доспех",
-    "Мифриловая броня",
-    "Драконья шкура",
-    "Призрачный плащ",
-    "Мантия мага",
-    "Роба друида",
-    "Плащ теней",
-    "Броня берсерка",
-    "Доспех паладина",
-    "Облачение некроманта",
-    "Костяная броня",
-    "Ледяные латы",
-    "Огненный нагрудник",
-    "Громовой щит",
-    "Броня элементаля",
-    "Теневые латы",
-    "Лунные доспехи",
-    "Кристальная броня",
-    "Броня валькирии",
-    "Адская броня",
-]
-
-ELEMENTS = [
-    "огонь",
-    "лед",
-    "яд",
-    "тьма",
-    "свет",
-    "электричество",
-    "природа",
-    "кровь",
-    "дух",
-    "металл",
-]
-
-TERRAINS = [
-    "лес",
-    "горы",
-    "болото",
-    "пустыня",
-    "пещеры",
-    "кладбище",
-    "руины",
-    "подземелье",
-    "вулкан",
-    "ледник",
-    "долина",
-    "джунгли",
-    "побережье",
-    "тайга",
-    "поляна",
-]
-
-TERRAIN_EFFECTS = {
-    "лес": {"уклон": 0.15, "маскировка": 0.25},
-    "горы": {"урон": 0.08, "защита": 0.12},
-    "болото": {"скорость": -0.25, "яд": 0.2},
-    "пустыня": {"мана": -0.15, "выносливость": -0.12},
-    "пещеры": {"тьма": 0.25, "крит": 0.08},
-    "кладбище": {"некромантия": 0.3, "страх": 0.15},
-    "руины": {"артефакты": 0.2, "ловушки": 0.25},
-    "подземелье": {"монстры": 0.3, "сокровища": 0.15},
-    "вулкан": {"огонь": 0.35, "урон": 0.15},
-    "ледник": {"лед": 0.35, "защита": 0.15},
-    "долина": {"здоровье": 0.08, "регенерация": 0.12},
-    "джунгли": {"яд": 0.25, "маскировка": 0.3},
-    "побережье": {"мана": 0.08, "скорость": 0.08},
-    "тайга": {"холод": 0.15, "выносливость": -0.08},
-    "поляна": {"свет": 0.25, "регенерация": 0.15},
-}
-
-QUESTS = {
-    "начало": {
-        "name": "Начало пути",
-        "description": "Поговорите с капитаном стражи в Люгенбурге",
-        "reward": {"xp": 500, "money": 100, "item": "Кожаный доспех"},
-        "required_level": 1,
-        "faction": "Орден Света",
-        "required": 1,
-    },
-    "некроманты": {
-        "name": "Угроза некромантов",
-        "description": "Уничтожьте 5 скелетов на кладбище",
-        "reward": {"xp": 1000, "money": 300, "reputation": {"Орден Света": 10}},
-        "required_level": 3,
-        "faction": "Орден Света",
-        "required": 5,
-    },
-    "дракон": {
-        "name": "Драконья угроза",
-        "description": "Победите дракона в горах",
-        "reward": {"xp": 5000, "money": 2000, "item": "Драконья шкура"},
-        "required_level": 10,
-        "faction": "Орден Света",
-        "required": 1,
-    },
-    "артефакт": {
-        "name": "Потерянный артефакт",
-        "description": "Найдите древний артефакт в руинах",
-        "reward": {"xp": 2000, "money": 800, "reputation": {"Гильдия Магов": 15}},
-        "required_level": 5,
-        "faction": "Гильдия Магов",
-        "required": 1,
-    },
-    "воровство": {
-        "name": "Воровское задание",
-        "description": "Украдите документы из особняка в Бандаросе",
-        "reward": {"xp": 1500, "money": 1000, "reputation": {"Гильдия Воров": 20}},
-        "required_level": 4,
-        "faction": "Гильдия Воров",
-        "required": 1,
-    },
-    "природа": {
-        "name": "Защита леса",
-        "description": "Уничтожьте 3 лесных вредителя",
-        "reward": {"xp": 1200, "money": 500, "reputation": {"Друиды Леса": 15}},
-        "required_level": 3,
-        "faction": "Друиды Леса",
-        "required": 3,
-    },
-    "некромантия": {
-        "name": "Тайны некромантии",
-        "description": "Соберите 5 темных артефактов",
-        "reward": {"xp": 2500, "money": 1500, "reputation": {"Темное Братство": 25}},
-        "required_level": 6,
-        "faction": "Темное Братство",
-        "required": 5,
-    },
-}
-
-QUEST_CHAINS = {
-    "начало": "некроманты",
-    "некроманты": "артефакт",
-    "артефакт": "дракон",
-}
-
-CRAFT_RECIPES = {
-    "Зелье здоровья": {"травы": 3, "вода": 1},
-    "Зелье маны": {"травы": 2, "кристалл": 1},
-    "Стальной меч": {"железо": 5, "уголь": 3},
-    "Мифриловые доспехи": {"мифрил": 8, "кожа": 4},
-    "Огненный посох": {"дерево": 3, "огненный кристалл": 2},
-    "Ледяной кинжал": {"железо": 3, "ледяной кристалл": 2},
-    "Ядовитый клинок": {"железо": 4, "яд": 3},
-    "Электрический топор": {"железо": 6, "электрический кристалл": 3},
-}
-
-DIALOGUES = {
-    "капитан_стражи": [
-        "Добро пожаловать в Люгенбург, странник.",
-        "Наши земли страдают от нашествия нежити.",
-        "Если вы ищете приключений, помогите нам очистить кладбище к северу от города.",
-        "За это вы получите достойную награду и уважение Ордена Света.",
-    ],
-    "гильдия_магов": [
-        "Приветствую тебя, искатель знаний.",
-        "Наши исследования указывают на древний артефакт в руинах Аэлиндала.",
-        "Принеси его нам, и мы щедро вознаградим тебя.",
-        "Будь осторожен - руины охраняются древними стражами.",
-    ],
-    "воровская_гильдия": [
-        "Тсс... Не привлекай внимания.",
-        "У нас есть для тебя деликатное задание.",
-        "Нужно проникнуть в особняк лорда Брандона и достать его финансовые документы.",
-        "Выполнишь - получишь хорошую плату и расположение нашей гильдии.",
-    ],
-    "друид": [
-        "Приветствую, дитя природы.",
-        "Леса страдают от нашествия вредителей.",
-        "Помоги нам очистить священные рощи от этих тварей.",
-        "Природа щедро вознаградит тебя за помощь.",
-    ],
-    "некромант": [
-        "Темные силы зовут тебя, смертный.",
-        "Я чувствую в тебе потенциал...",
-        "Собери для меня темные артефакты, и я поделюсь с тобой тайнами некромантии.",
-        "Но будь осторожен - светлые не одобрят нашего союза.",
-    ],
-}
+XP_MULTIPLIER = 1.15
+DAMAGE_MULTIPLIER = 1.3
+HEALING_MULTIPLIER = 0.9
 
-ACTIONS = [
-    "Тихая ночь окутала деревню, когда из леса раздался пронзительный вой. Он был так близок, что у жителей перехватило дыхание — это предзнаменование беды.",
-    "Лунный свет, пробиваясь сквозь облака, осветил старое кладбище, на котором могилы вдруг начали исползать черной лужей, словно мрак выползал из своих увлажненных недр.",
-    "В заброшенной усадьбе отголоски смеха, когда-то веселившего гостей, теперь звучат зловеще, пробуждая призраков старых обитателей, мстящих за свою заброшенность.",
-    "К сборищу эльфов в лесу пришел одинокий странник, на его одежде запечатлелись багровые пятна. Никто не заметил, как он исчез, оставив после себя только шептание листвы.",
-    "На рыночной площади лежит старый горшок, в котором безмолвно сидит очередная жертва проклятия: её глаза остекленели, а усталое сердце замерло в ожидании спасения, которого уже не будет.",
-    "Дождь, льющийся из серых облаков, оказывается не простым. По мере его падения местные жители начинают замечать, что капли сливаются в тени, образуя причудливые, но зловещие фигуры.",
-    "В подземной пещере, где никогда не стыл воздух, внезапно слышен шорох. Странное существо с горящими глазами наблюдает за сквозь каменные трещины, кажется, оно ждет.",
-    "В одном из домов опустевшего городка вечерний уют нарушает трескучий звук. Кто-то вновь открывает старую книгу заклинаний, но ни один её владелец не вернется, чтобы закрыть её.",
-    "Луга, когда-то полные красотой, теперь заполонены мычанием мрачных существ, ведь на горизонте замаячила черная туча, обещая грозу — нестихающее предвестие ужаса.",
-    "На стенах древнего храма начали проявляться загадочные руны — их надписи полны древних пророчеств, но никто не осмеливается читать их вслух.",
-    "На утреннем рассвете в болотах всплывают уносящиеся в небытие силуэты, обманчиво напоминающие людей: это просто души, которые давно потеряли свой путь.",
-    "Тень, пробегая по улочкам города, успела оставить свой след — стеклянные глаза бездны смотрят на мир с тревожным ожиданием.",
-    "В старом библиотечном архиве кто-то забывает томик ужасных историй, которые однажды изобличат читателя, заставив его вздрогнуть от ужаса.",
-    "Лунный свет, отражаясь в спокойной глади озера, вдруг начинает мерцать и колебаться, словно за ним скрывается нечто, внимательным взглядом ожидающее встречу.",
-    "Ночью из пещеры доносится песня, пропитанная тоской, которая привлекает отдаленные души, лишь для того, чтобы раствориться в ее бездне.",
-    "Около затопленной деревни люди начинают находить странные, искаженные черепа, будто сама земля требует от них забрать своих мертвецов обратно.",
-    "На одном из старых камней в лесу начертаны имена тех, кто шёл по этому пути — они выцветают, словно предзнаменуя забытость и предательство.",
-    "Эхо боевых кличей, раньше звучавших в краю, вдруг следует за каждым шагом путника, заставляя его чувствовать себя призраком среди теней.",
-    "На рынке появляется таинственная незнакомка в мантии, она предлагает загадочные артефакты, но внимание привлекает не товар, а шепоты о неизбежности гибели тех, кто их приобретает.",
-    "В полнолуние деревенский колодец вдруг испускал странный свет. Никто не отважился заглянуть внутрь, а народ поговаривал, что это место избранных — но избранные не возвращаются.",
-    "Надеясь переждать ненастье, группа странников укрылась в пещере, но вскоре поняла, что их окружает легкая игра теней, которая с каждым часом становится все более зловещей.",
-    "Возле зачарованного пруда местные жители стали находить следы маленьких сущесв. Но в то время как следы становились все глубже, сами существа исчезали навсегда.",
-    "Наступила ночь, и в полумраке леса раздавался странный звук, будто кто-то тихо плакал. Никто не знал, сколько невидимых душ потеряно среди деревьев.",
-    "На заброшенной ферме ветер шумел среди старых досок, как будто с ним разговаривали заблудшие души, не решившись оставить этот проклятый край.",
-    "Из глубины старой шахты доносились трели, слишком мелодичные, чтобы быть человеческими, но слишком пугающие, чтобы оставить их без внимания.",
-    "Каждую полнолуние на краю деревни появляются белые лошади, но лишь тем, кто осмелится взглянуть на их пустые глаза, суждено будет увидеть свою смерть.",
-    "Ночь была особенно темной, и местные жители заколачивали окна, когда из подвала ближайшего дома послышались странные звуки: эхом возвращались из тысячелетий.",
-    "На старом перекрестке, завуалированном пеленой тумана, мерзко ухало нечто, напоминающее полупрозрачную тень, держащую в руках светящийся шар.",
-    "В заброшенном храме бесколонном зале каждый вечер загораются свечи, но знакомые лица тех, кто уже ушёл, лишь отводят взгляд от непонимания.",
-    "Местные деревья начинают покидать свои корни и медленно стягиваться к реке, словно та манит их в объятия разрушения.",
-    "Под покровом ночи дождь из черных перьев накрывает деревню, и все, кто дотронется до этих перьев, становятся скупо разглагольствующими, словно удаляются в собственное безумие.",
-    "Сквозь заросли мха и папоротников проскользнуло нечто, завидев мышь, и свет от его глаз пробился сквозь толщу листвы — это существо стало навлекать страх среди диких животных.",
-    "Старый изгородь вдруг начинает шуметь, будто звук одной чёрной воронки, взывая к старым временам, когда местные жители еще помнили о своих предках.",
-    "Заброшенный трактир снова раскрыл свои двери, но его гости окаменели в жутком ожидании, и только глухие разговоры медленно сливались с лунным светом.",
-    "Несколько дней подряд вечерний воздух наполняется сладким ароматом цветущей сирени, но те, кто решился прийти к ним, теряли свои голоса навсегда.",
-    "Сквозь туман на лугу, изрытом шрамистами дюнами, стали появляться тени, наводя на мысли о том, что некогда здесь были битвы, оставившие лишь эхо.",
+__all__ = [
+    "LOGO_COLORS", "RIP_COLORS", "MAX_DANGER_LEVEL", "XP_MULTIPLIER", "DAMAGE_MULTIPLIER", "HEALING_MULTIPLIER",
+    *CATEGORIES,
 ]
 
-STORY_PROGRESS = [
-    "Пролог: Пробуждение",
-    "Глава 1: Первые шаги",
-    "Глава 2: Угроза некромантов",
-    "Глава 3: Тайны древних руин",
-    "Глава 4: Драконья ярость",
-    "Глава 5: Финал: Битва за Цитадель",
-]
 
-XP_MULTIPLIER = 1.15
-DAMAGE_MULTIPLIER = 1.3
-HEALING_MULTIPLIER = 0.9
+def __getattr__(name: str):
+    if name in CATEGORIES:
+        # Дальше значение берется из модуля напрямую, без повторного обращения к кэшу
+        value = globals()[name] = load_category(name)
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,151 @@
+import marshal
+import os
+import struct
+from pathlib import Path
+
+# Категории контента; схема каждой - в gamecore.content.compiler.SCHEMA
+CATEGORIES = (
+    "RACES", "CLASSES", "FRACTIONS", "CITIES", "ELEMENTS", "TERRAINS", "TERRAIN_EFFECTS",
+    "ENEMIES", "ENEMY_TAGS", "ENEMY_TAG_ABILITIES", "DANGER_ABILITIES", "EFFECTS",
+    "WEAPONS", "ARMOR", "CRAFT_RECIPES", "QUESTS", "QUEST_CHAINS",
+    "DIALOGUES", "ACTIONS", "STORY_PROGRESS", "CLASS_ABILITY_MESSAGES", "ENEMY_ABILITY_MESSAGES",
+)
+
+# События, которые продвигают квесты, и поле триггера, по которому событие ищется в индексе
+QUEST_EVENTS = {"kill": "tag", "explore": "terrain", "pickup": "item", "talk": "npc"}
+# Повторное наложение эффекта: обновить длительность, наложить заново, добавить стак
+EFFECT_STACKING = ("refresh", "replace", "stack")
+
+CACHE_MAGIC = b"ZCNT"
+CACHE_VERSION = 1
+# magic, version, хэш исходников, количество категорий, размер индекса
+CACHE_HEADER = struct.Struct("<4sH16sII")
+# offset, length, длина имени; за записью идет имя категории
+CACHE_ENTRY = struct.Struct("<QIH")
+# Служебная категория: отметки исходных файлов для быстрой проверки свежести кэша
+SOURCES_KEY = "__sources__"
+
+BASE_PACK = Path(__file__).parent / "base"
+CACHE_PATH = Path(__file__).parent / "content.cache"
+
+
+class ContentError(ValueError):
+    pass
+
+
+def content_packs():
+    packs = os.environ.get("ZITADELLE_CONTENT_PACKS", "")
+    return [pack for pack in packs.split(os.pathsep) if pack]
+
+
+def pack_files(packs):
+    # Базовый набор всегда первый, моды накладываются в порядке перечисления
+    files = []
+    for pack in [BASE_PACK, *packs]:
+        pack = Path(pack)
+        if not pack.is_dir():
+            raise ContentError(f"{pack}: набор контента не найден")
+        files += sorted(pack.glob("*.json"))
+    return files
+
+
+def source_stamps(files):
+    stamps = []
+    for path in files:
+        stat = os.stat(path)
+        stamps.append((str(path), stat.st_mtime_ns, stat.st_size))
+    return tuple(stamps)
+
+
+class ContentCache:
+    # При открытии читается только индекс; категории распаковываются по одной при обращении
+    def __init__(self, path: str):
+        self.path = Path(path)
+        self.index = {}
+        self.fd = os.open(self.path, os.O_RDONLY)
+        try:
+            header = os.pread(self.fd, CACHE_HEADER.size, 0)
+            magic, version, self.digest, count, index_size = CACHE_HEADER.unpack(header)
+            if magic != CACHE_MAGIC or version != CACHE_VERSION:
+                raise ValueError(f"{path}: неизвестный формат кэша контента")
+
+            index = os.pread(self.fd, index_size, CACHE_HEADER.size)
+            position = 0
+            for _ in range(count):
+                offset, length, name_length = CACHE_ENTRY.unpack_from(index, position)
+                position += CACHE_ENTRY.size
+                self.index[index[position:position + name_length].decode("utf-8")] = (offset, length)
+                position += name_length
+        except BaseException:
+            os.close(self.fd)
+            raise
+
+    def read(self, name: str):
+        offset, length = self.index[name]
+        return marshal.loads(os.pread(self.fd, length, offset))
+
+    def close(self):
+        os.close(self.fd)
+
+
+class Content:
+    def __init__(self, packs=(), cache_path: str = CACHE_PATH):
+        self.packs = list(packs)
+        self.cache_path = cache_path
+        self.values = {}
+        self.cache = None
+        self.compiled = None
+
+    def open(self):
+        files = pack_files(self.packs)
+        try:
+            cache = ContentCache(self.cache_path)
+        except (OSError, ValueError):
+            cache = None
+        # Отметки файлов совпали - исходники не трогали, компилятор не нужен
+        if cache is not None and cache.read(SOURCES_KEY) == source_stamps(files):
+            self.cache = cache
+            return
+
+        from gamecore.content.compiler import build_cache, compile_content, restamp_cache, source_hash
+
+        # Файлы трогали (checkout, копирование) - сверяем содержимое по хэшу
+        if cache is not None and cache.digest == source_hash(files):
+            try:
+                restamp_cache(self.cache_path, cache, cache.digest, files)
+            except OSError:
+                # Папка только для чтения: кэш верен, просто проверка по хэшу повторится
+                pass
+            self.cache = cache
+            return
+        if cache is not None:
+            cache.close()
+
+        try:
+            self.compiled = build_cache(self.cache_path, self.packs)
+        except OSError:
+            # Папка только для чтения: работаем без кэша
+            self.compiled = compile_content(files)
+
+    def get(self, category: str):
+        value = self.values.get(category)
+        if value is None:
+            if self.cache is None and self.compiled is None:
+                self.open()
+            value = self.compiled[category] if self.compiled is not None else self.cache.read(category)
+            self.values[category] = value
+        return value
+
+
+_content = None
+
+
+def get_content():
+    global _content
+    if _content is None:
+        _content = Content(content_packs())
+    return _content
+
+
+def load_category(category: str):
+    return get_content().get(category)
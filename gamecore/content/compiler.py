@@ -0,0 +1,291 @@
+import argparse
+import json
+import marshal
+import os
+from hashlib import blake2b
+from pathlib import Path
+from gamecore.content import (
+    CACHE_ENTRY, CACHE_HEADER, CACHE_MAGIC, CACHE_PATH, CACHE_VERSION, CATEGORIES, EFFECT_STACKING, QUEST_EVENTS,
+    SOURCES_KEY, ContentError, content_packs, pack_files, source_stamps,
+)
+
+
+def fail(where: str, message: str):
+    raise ContentError(f"{where}: {message}")
+
+
+def check_type(where: str, value, expected):
+    if not isinstance(value, expected):
+        names = " или ".join(t.__name__ for t in (expected if isinstance(expected, tuple) else (expected,)))
+        fail(where, f"ожидается {names}, получено {type(value).__name__}")
+    return value
+
+
+def strings(where: str, value):
+    check_type(where, value, list)
+    for index, item in enumerate(value):
+        check_type(f"{where}[{index}]", item, str)
+    return list(value)
+
+
+def mapping(convert_value, convert_key=None):
+    def convert(where: str, value):
+        check_type(where, value, dict)
+        result = {}
+        for key, item in value.items():
+            if convert_key is not None:
+                try:
+                    key = convert_key(key)
+                except ValueError:
+                    fail(where, f"недопустимый ключ {key!r}")
+            result[key] = convert_value(f"{where}[{key!r}]", item)
+        return result
+    return convert
+
+
+def text(where: str, value):
+    return check_type(where, value, str)
+
+
+def integer(where: str, value):
+    if isinstance(value, bool):
+        fail(where, "ожидается int, получено bool")
+    return check_type(where, value, int)
+
+
+def number(where: str, value):
+    if isinstance(value, bool):
+        fail(where, "ожидается число, получено bool")
+    return check_type(where, value, (int, float))
+
+
+def record(required: dict, optional: dict = None):
+    optional = optional or {}
+
+    def convert(where: str, value):
+        check_type(where, value, dict)
+        for key in required:
+            if key not in value:
+                fail(where, f"нет поля {key!r}")
+        result = {}
+        for key, item in value.items():
+            field = required.get(key) or optional.get(key)
+            if field is None:
+                fail(where, f"неизвестное поле {key!r}")
+            result[key] = field(f"{where}.{key}", item)
+        return result
+    return convert
+
+
+def tuple_of_strings(where: str, value):
+    return tuple(strings(where, value))
+
+
+def sequence(convert_item):
+    def convert(where: str, value):
+        check_type(where, value, list)
+        return [convert_item(f"{where}[{index}]", item) for index, item in enumerate(value)]
+    return convert
+
+
+REWARD = record({}, {"xp": number, "money": number, "item": text, "reputation": mapping(integer)})
+TRIGGER = record({"event": text}, {"tag": text, "terrain": text, "item": text, "npc": text, "amount": integer})
+
+# Категория -> функция проверки и приведения типов (JSON не знает кортежей и числовых ключей)
+SCHEMA = {
+    "RACES": strings,
+    "CLASSES": strings,
+    "FRACTIONS": mapping(record({"добро": integer, "зло": integer, "отношение": integer})),
+    "CITIES": strings,
+    "ELEMENTS": strings,
+    "TERRAINS": strings,
+    "TERRAIN_EFFECTS": mapping(mapping(number)),
+    "ENEMIES": strings,
+    "ENEMY_TAGS": mapping(tuple_of_strings),
+    "ENEMY_TAG_ABILITIES": mapping(text),
+    "DANGER_ABILITIES": mapping(text, int),
+    "EFFECTS": mapping(record({"duration": integer, "stacking": text}, {"max_stacks": integer})),
+    "WEAPONS": strings,
+    "ARMOR": strings,
+    "CRAFT_RECIPES": mapping(mapping(integer)),
+    "QUESTS": mapping(record(
+        {"name": text, "description": text, "reward": REWARD},
+        {"required_level": integer, "faction": text, "required": integer, "triggers": sequence(TRIGGER)},
+    )),
+    "QUEST_CHAINS": mapping(text),
+    "DIALOGUES": mapping(strings),
+    "ACTIONS": strings,
+    "STORY_PROGRESS": strings,
+    "CLASS_ABILITY_MESSAGES": mapping(text),
+    "ENEMY_ABILITY_MESSAGES": mapping(text),
+}
+
+
+def source_hash(files):
+    digest = blake2b(digest_size=16)
+    for path in files:
+        digest.update(str(path).encode("utf-8") + b"\0")
+        digest.update(Path(path).read_bytes())
+    return digest.digest()
+
+
+def merge(content: dict, category: str, value):
+    # Списки дополняются без повторов, словари перекрываются по ключам
+    if category not in content:
+        content[category] = value
+    elif isinstance(value, list):
+        content[category] += [item for item in value if item not in content[category]]
+    else:
+        content[category].update(value)
+
+
+def validate_trigger(content: dict, where: str, trigger: dict):
+    event = trigger["event"]
+    key = QUEST_EVENTS.get(event)
+    if key is None:
+        fail(where, f"неизвестное событие {event!r}, допустимы: {', '.join(QUEST_EVENTS)}")
+    # Ключевое поле обязательно, кроме убийства: триггер без тега срабатывает на любого врага
+    if event != "kill" and key not in trigger:
+        fail(where, f"для события {event!r} нужно поле {key!r}")
+    for field in ("tag", "item", "npc"):
+        if field in trigger and field != key:
+            fail(where, f"поле {field!r} не используется событием {event!r}")
+    if "terrain" in trigger and event not in ("kill", "explore"):
+        fail(where, f"поле 'terrain' не используется событием {event!r}")
+
+    tags = {tag for tags in content["ENEMY_TAGS"].values() for tag in tags}
+    if "tag" in trigger and trigger["tag"] not in tags:
+        fail(where, f"неизвестный тег врага {trigger['tag']!r}")
+    if "terrain" in trigger and trigger["terrain"] not in content["TERRAINS"]:
+        fail(where, f"неизвестная местность {trigger['terrain']!r}")
+    if "npc" in trigger and trigger["npc"] not in content["DIALOGUES"]:
+        fail(where, f"неизвестный NPC {trigger['npc']!r}")
+    if trigger.get("amount", 1) < 1:
+        fail(where, "amount должен быть положительным")
+
+
+def validate(content: dict):
+    missing = [category for category in CATEGORIES if category not in content]
+    if missing:
+        fail("контент", f"нет категорий: {', '.join(missing)}")
+
+    # Сохранения пишут эти таблицы однобайтовыми индексами; 0xFF - значение строкой,
+    # стихии - знаковый байт
+    materials = {material for recipe in content["CRAFT_RECIPES"].values() for material in recipe}
+    for category, size, limit in (
+        ("RACES", len(content["RACES"]), 255),
+        ("CLASSES", len(content["CLASSES"]), 255),
+        ("FRACTIONS", len(content["FRACTIONS"]), 255),
+        ("CRAFT_RECIPES (материалы)", len(materials), 255),
+        ("QUESTS", len(content["QUESTS"]), 255),
+        ("ELEMENTS", len(content["ELEMENTS"]), 127),
+    ):
+        if size > limit:
+            fail(category, f"не больше {limit} значений, а их {size}")
+
+    for name, effect in content["EFFECTS"].items():
+        stacking = effect["stacking"]
+        if stacking not in EFFECT_STACKING:
+            fail(f"EFFECTS[{name!r}].stacking", f"неизвестный режим {stacking!r}, допустимы: {', '.join(EFFECT_STACKING)}")
+        if effect.get("max_stacks", 1) < 1:
+            fail(f"EFFECTS[{name!r}].max_stacks", "max_stacks должен быть положительным")
+
+    # Ссылки между категориями
+    for quest_id, quest in content["QUESTS"].items():
+        faction = quest.get("faction")
+        if faction is not None and faction not in content["FRACTIONS"]:
+            fail(f"QUESTS[{quest_id!r}].faction", f"неизвестная фракция {faction!r}")
+        for faction in quest["reward"].get("reputation", {}):
+            if faction not in content["FRACTIONS"]:
+                fail(f"QUESTS[{quest_id!r}].reward.reputation", f"неизвестная фракция {faction!r}")
+        for index, trigger in enumerate(quest.get("triggers", ())):
+            validate_trigger(content, f"QUESTS[{quest_id!r}].triggers[{index}]", trigger)
+    for quest_id, next_quest in content["QUEST_CHAINS"].items():
+        for reference in (quest_id, next_quest):
+            if reference not in content["QUESTS"]:
+                fail(f"QUEST_CHAINS[{quest_id!r}]", f"неизвестный квест {reference!r}")
+    for terrain in content["TERRAIN_EFFECTS"]:
+        if terrain not in content["TERRAINS"]:
+            fail(f"TERRAIN_EFFECTS[{terrain!r}]", "местности нет в TERRAINS")
+    for player_class in content["CLASS_ABILITY_MESSAGES"]:
+        if player_class not in content["CLASSES"]:
+            fail(f"CLASS_ABILITY_MESSAGES[{player_class!r}]", "класса нет в CLASSES")
+
+
+def compile_content(files):
+    content = {}
+    for path in files:
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except json.JSONDecodeError as e:
+            fail(str(path), f"некорректный JSON: {e}")
+        check_type(str(path), data, dict)
+
+        for category, value in data.items():
+            convert = SCHEMA.get(category)
+            if convert is None:
+                fail(str(path), f"неизвестная категория {category!r}")
+            merge(content, category, convert(f"{path}: {category}", value))
+
+    validate(content)
+    return content
+
+
+def write_cache(output: str, content: dict, digest: bytes, stamps):
+    blobs = [(SOURCES_KEY, marshal.dumps(stamps))]
+    blobs += [(category, marshal.dumps(value)) for category, value in content.items()]
+
+    index_size = sum(CACHE_ENTRY.size + len(name.encode("utf-8")) for name, _ in blobs)
+    offset = CACHE_HEADER.size + index_size
+
+    tmp_path = f"{output}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(CACHE_HEADER.pack(CACHE_MAGIC, CACHE_VERSION, digest, len(blobs), index_size))
+        for name, blob in blobs:
+            encoded = name.encode("utf-8")
+            f.write(CACHE_ENTRY.pack(offset, len(blob), len(encoded)))
+            f.write(encoded)
+            offset += len(blob)
+        for _, blob in blobs:
+            f.write(blob)
+    os.replace(tmp_path, output)
+
+
+def restamp_cache(output: str, cache, digest: bytes, files):
+    # Содержимое не изменилось, обновляются только отметки файлов, чтобы следующий запуск
+    # обошелся без хэширования исходников
+    content = {category: cache.read(category) for category in cache.index if category != SOURCES_KEY}
+    write_cache(output, content, digest, source_stamps(files))
+
+
+def build_cache(output: str, packs=()):
+    files = pack_files(packs)
+    content = compile_content(files)
+    write_cache(output, content, source_hash(files), source_stamps(files))
+    return content
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Проверка наборов контента и сборка кэша")
+    parser.add_argument("packs", nargs="*", help="папки модов поверх базового набора (по умолчанию ZITADELLE_CONTENT_PACKS)")
+    parser.add_argument("-o", "--output", default=str(CACHE_PATH), help="путь к кэшу")
+    parser.add_argument("--check", action="store_true", help="только проверить, не записывая кэш")
+    args = parser.parse_args()
+
+    packs = args.packs or content_packs()
+    try:
+        if args.check:
+            content = compile_content(pack_files(packs))
+        else:
+            content = build_cache(args.output, packs)
+    except ContentError as e:
+        raise SystemExit(f"Ошибка контента: {e}")
+
+    print(f"Категорий: {len(content)}, записей: {sum(len(value) for value in content.values())}")
+    if not args.check:
+        print(f"{args.output}: {os.path.getsize(args.output)} байт")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+from functools import lru_cache
+from types import MappingProxyType
+from gamecore import constants
+
+# Вид создаваемого предмета по началу названия рецепта; рецепты без вида скрафтить нельзя
+CRAFT_KINDS = (("Зелье", "consumable"), ("Стальной", "weapon"), ("Мифриловые", "armor"))
+
+
+def craft_kind(item_name: str):
+    for prefix, kind in CRAFT_KINDS:
+        if item_name.startswith(prefix):
+            return kind
+    return None
+
+
+@lru_cache(maxsize=None)
+def craftable_recipes():
+    return MappingProxyType({
+        item_name: recipe for item_name, recipe in constants.CRAFT_RECIPES.items() if craft_kind(item_name) is not None
+    })
+
+
+@lru_cache(maxsize=None)
+def recipe_order():
+    return MappingProxyType({item_name: index for index, item_name in enumerate(craftable_recipes())})
+
+
+def build_material_index(recipes):
+    # Материал -> рецепты, в которые он входит
+    index = {}
+    for item_name, recipe in recipes.items():
+        for material in recipe:
+            index.setdefault(material, []).append(item_name)
+    return MappingProxyType({material: tuple(names) for material, names in index.items()})
+
+
+@lru_cache(maxsize=None)
+def recipes_by_material():
+    return build_material_index(craftable_recipes())
+
+
+def max_crafts(recipe: dict, materials: dict):
+    return min((materials.get(material, 0) // amount for material, amount in recipe.items()), default=0)
+
+
+class CraftingIndex:
+    # Сколько раз можно скрафтить каждый рецепт прямо сейчас. В словаре только доступные рецепты;
+    # при изменении материала пересчитываются только рецепты с этим материалом
+    __slots__ = ("materials", "counts")
+
+    def __init__(self, materials: dict):
+        self.materials = materials
+        self.counts = {}
+        self.refresh(materials)
+
+    def refresh(self, changed):
+        recipes, by_material = craftable_recipes(), recipes_by_material()
+        for material in changed:
+            for item_name in by_material.get(material, ()):
+                count = max_crafts(recipes[item_name], self.materials)
+                if count:
+                    self.counts[item_name] = count
+                else:
+                    self.counts.pop(item_name, None)
+
+    def count(self, item_name: str):
+        return self.counts.get(item_name, 0)
+
+    def craftable(self):
+        # Порядок как в книге рецептов, сортируются только доступные
+        return [(item_name, self.counts[item_name]) for item_name in sorted(self.counts, key=recipe_order().__getitem__)]
@@ -0,0 +1,80 @@
+import heapq
+from dataclasses import dataclass
+from gamecore import constants
+
+DEFAULT_EFFECT = {"duration": 3, "stacking": "refresh", "max_stacks": 1}
+
+
+def stack_limit(spec: dict):
+    # Стаки копятся только в режиме "stack"; "refresh" и "replace" держат один стак
+    return spec.get("max_stacks", 1) if spec["stacking"] == "stack" else 1
+
+
+@dataclass(slots=True)
+class StatusEffect:
+    name: str
+    damage: float
+    expires_at: int
+    stacks: int = 1
+
+
+class StatusEffects:
+    __slots__ = ("turn", "active", "expiry")
+
+    def __init__(self):
+        self.turn = 0
+        self.active = {}
+        self.expiry = []
+
+    def __len__(self):
+        return len(self.active)
+
+    def __bool__(self):
+        return bool(self.active)
+
+    def __iter__(self):
+        return iter(self.active.values())
+
+    def __contains__(self, name: str):
+        return name in self.active
+
+    def get(self, name: str):
+        return self.active.get(name)
+
+    def apply(self, name: str, damage: float, duration: int = None):
+        spec = constants.EFFECTS.get(name, DEFAULT_EFFECT)
+        expires_at = self.turn + (duration or spec["duration"])
+        effect = self.active.get(name)
+
+        if effect is None or spec["stacking"] == "replace":
+            effect = StatusEffect(name, damage, expires_at)
+            self.active[name] = effect
+        else:
+            effect.stacks = min(stack_limit(spec), effect.stacks + 1)
+            effect.damage = max(effect.damage, damage)
+            effect.expires_at = expires_at
+
+        heapq.heappush(self.expiry, (expires_at, name))
+        return effect
+
+    def remove(self, name: str):
+        return self.active.pop(name, None)
+
+    def clear(self):
+        self.active.clear()
+        self.expiry.clear()
+
+    def tick(self):
+        self.turn += 1
+        ticking = list(self.active.values())
+
+        expired = []
+        while self.expiry and self.expiry[0][0] <= self.turn:
+            expires_at, name = heapq.heappop(self.expiry)
+            effect = self.active.get(name)
+            # Устаревшие записи кучи после обновления длительности пропускаем
+            if effect is not None and effect.expires_at == expires_at:
+                del self.active[name]
+                expired.append(effect)
+
+        return ticking, expired
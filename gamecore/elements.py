@@ -0,0 +1,34 @@
+from array import array
+from gamecore.constants import ELEMENTS
+
+NO_ELEMENT = -1
+ELEMENT_IDS = {element: index for index, element in enumerate(ELEMENTS)}
+
+# Устойчивости хранятся как signed char, множители урона считаем заранее для всего диапазона
+RESIST_MIN, RESIST_MAX = -128, 127
+RESIST_OFFSET = -RESIST_MIN
+DAMAGE_MULTIPLIERS = tuple(1.0 - resist / 100.0 for resist in range(RESIST_MIN, RESIST_MAX + 1))
+
+
+def element_id(element: str):
+    if not element:
+        return NO_ELEMENT
+    return ELEMENT_IDS.get(element, NO_ELEMENT)
+
+
+def resistance_vector(values=None):
+    # values: словарь {стихия: %} или последовательность по индексам ELEMENTS
+    vector = array("b", bytes(len(ELEMENTS)))
+    if not values:
+        return vector
+
+    items = values.items() if isinstance(values, dict) else zip(ELEMENTS, values)
+    for element, resist in items:
+        index = element_id(element)
+        if index != NO_ELEMENT:
+            vector[index] = max(RESIST_MIN, min(RESIST_MAX, int(resist)))
+    return vector
+
+
+def damage_multiplier(resist: int):
+    return DAMAGE_MULTIPLIERS[resist + RESIST_OFFSET]
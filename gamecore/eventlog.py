@@ -0,0 +1,413 @@
+import argparse
+import os
+import struct
+from dataclasses import dataclass, field
+from functools import lru_cache
+from types import SimpleNamespace
+from gamecore import constants
+from gamecore.constants import RACES, CLASSES, ELEMENTS, TERRAINS
+from gamecore.classes import Player
+from gamecore.bestiary import ENEMY_ABILITIES
+from gamecore.combat import BattleEvent
+from gamecore.elements import resistance_vector
+from gamecore.ids import HOBBIT, race_id
+from gamecore.output import print
+from gamecore.quests import quest_registry
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# fight_id, turn, kind, code, value
+RECORD = struct.Struct("<IHBBf")
+NO_CODE = 255
+READ_CHUNK = RECORD.size * 65536
+
+EVENT_KINDS = (
+    "battle_start",
+    "terrain",
+    "player",
+    "player_class",
+    "loot",
+    "fortitude",
+    "crit",
+    "element",
+    "attack",
+    "heal",
+    "block",
+    "block_failed",
+    "flee",
+    "flee_failed",
+    "item_used",
+    "equipped",
+    "no_mana",
+    "spell",
+    "spell_heal",
+    "spell_mana",
+    "spell_damage",
+    "teleport",
+    "class_ability",
+    "class_ability_unavailable",
+    "analyze",
+    "dodge",
+    "enemy_attack",
+    "enemy_heal",
+    "enemy_ability",
+    "effect_tick",
+    "victory",
+    "mana_loot",
+    "fire_aura",
+    "quest_completed",
+    "defeat",
+    "battle_end",
+    "effect_expired",
+    "player_effect_tick",
+    "player_effect_expired",
+)
+KIND_CODES = {kind: code for code, kind in enumerate(EVENT_KINDS)}
+
+# Только для отрисовки, в лог не пишутся
+RENDER_ONLY_KINDS = ("enemy_turn", "turn_end")
+
+OUTCOMES = ("victory", "defeat", "fled", "draw")
+
+
+@lru_cache(maxsize=None)
+def spell_names():
+    names = []
+    for player_class in CLASSES:
+        spells = Player.get_class_spells(SimpleNamespace(lvl=1, player_class=player_class))
+        for spell in spells.values():
+            if spell.spell_name not in names:
+                names.append(spell.spell_name)
+    return tuple(names)
+
+
+@lru_cache(maxsize=None)
+def detail_tables():
+    effect_names = tuple(constants.EFFECTS)
+    return {
+        "battle_start": tuple(constants.ENEMIES),
+        "terrain": tuple(TERRAINS),
+        "player": tuple(RACES),
+        "player_class": tuple(CLASSES),
+        "element": tuple(ELEMENTS),
+        "no_mana": spell_names(),
+        "spell": spell_names(),
+        "class_ability": tuple(CLASSES),
+        "enemy_ability": ENEMY_ABILITIES,
+        "effect_tick": effect_names,
+        "effect_expired": effect_names,
+        "player_effect_tick": effect_names,
+        "player_effect_expired": effect_names,
+        "quest_completed": tuple(constants.QUESTS),
+        "battle_end": OUTCOMES,
+    }
+
+
+@lru_cache(maxsize=None)
+def detail_codes():
+    return {kind: {name: code for code, name in enumerate(table)} for kind, table in detail_tables().items()}
+
+
+def encode_detail(kind: str, detail: str):
+    codes = detail_codes().get(kind)
+    if codes is None or detail is None:
+        return NO_CODE
+    return codes.get(detail, NO_CODE)
+
+
+def decode_detail(kind: str, code: int):
+    table = detail_tables().get(kind)
+    if table is None or code >= len(table):
+        return None
+    return table[code]
+
+
+def next_fight_id(path: str):
+    if not os.path.exists(path):
+        return 0
+
+    size = os.path.getsize(path)
+    size -= size % RECORD.size
+    if size == 0:
+        return 0
+
+    with open(path, "rb") as f:
+        f.seek(size - RECORD.size)
+        return RECORD.unpack(f.read(RECORD.size))[0] + 1
+
+
+class BattleRecorder:
+    def __init__(self, path: str, buffer_size: int = 64 * 1024):
+        self.path = path
+        self.buffer_size = buffer_size
+        self.buffer = bytearray()
+        self.fight_id = next_fight_id(path)
+        self.battle = None
+
+        directory = os.path.dirname(path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory)
+
+    def __call__(self, event, battle):
+        if event.kind in RENDER_ONLY_KINDS:
+            return
+
+        if battle is not self.battle:
+            self.battle = battle
+            self.begin(battle)
+
+        self.write(event.kind, battle.turn, event.value, event.detail)
+
+        if event.kind == "battle_end":
+            self.fight_id += 1
+            self.battle = None
+            if len(self.buffer) >= self.buffer_size:
+                self.flush()
+
+    def begin(self, battle):
+        player, enemy = battle.player, battle.enemy
+        self.write("battle_start", 0, enemy.max_hp, enemy.name)
+        self.write("terrain", 0, enemy.danger_level, enemy.terrain)
+        self.write("player", 0, player.lvl, player.race)
+        self.write("player_class", 0, player.max_hp, player.player_class)
+        self.write("loot", 0, battle.loot)
+
+    def write(self, kind: str, turn: int, value: float = 0.0, detail: str = None):
+        self.buffer += RECORD.pack(
+            self.fight_id & 0xFFFFFFFF,
+            min(turn, 0xFFFF),
+            KIND_CODES[kind],
+            encode_detail(kind, detail),
+            value,
+        )
+
+    def flush(self):
+        if not self.buffer:
+            return
+        with open(self.path, "ab") as f:
+            f.write(self.buffer)
+        self.buffer.clear()
+
+    def close(self):
+        self.flush()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def decode_record(record):
+    fight_id, turn, kind_code, code, value = record
+    kind = EVENT_KINDS[kind_code]
+    return fight_id, turn, BattleEvent(kind, value, decode_detail(kind, code))
+
+
+def iter_records(path: str):
+    with open(path, "rb") as f:
+        tail = b""
+        while chunk := f.read(READ_CHUNK):
+            chunk = tail + chunk
+            usable = len(chunk) - len(chunk) % RECORD.size
+            yield from RECORD.iter_unpack(chunk[:usable])
+            tail = chunk[usable:]
+
+
+def iter_events(path: str):
+    for record in iter_records(path):
+        yield decode_record(record)
+
+
+def find_fight(path: str, fight_id: int):
+    # Записи идут по возрастанию fight_id, поэтому начало боя ищем бинарным поиском
+    count = os.path.getsize(path) // RECORD.size
+    with open(path, "rb") as f:
+        def fight_at(index):
+            f.seek(index * RECORD.size)
+            return RECORD.unpack(f.read(RECORD.size))[0]
+
+        low, high = 0, count
+        while low < high:
+            middle = (low + high) // 2
+            if fight_at(middle) < fight_id:
+                low = middle + 1
+            else:
+                high = middle
+
+        events = []
+        f.seek(low * RECORD.size)
+        while record := f.read(RECORD.size):
+            if len(record) < RECORD.size:
+                break
+            current, turn, event = decode_record(RECORD.unpack(record))
+            if current != fight_id:
+                break
+            events.append((turn, event))
+        return events
+
+
+class ReplayBattle:
+    # Бой, восстановленный по журналу: игрок и враг - только то, что записано в начале боя
+    # и видно из событий. Этого хватает слушателям боя, в том числе отрисовке игры
+    def __init__(self):
+        self.turn = 0
+        self.loot = 0.0
+        self.xp_gain = 0.0
+        self.player = SimpleNamespace(race=None, player_class=None, lvl=0, max_hp=0.0, quests=quest_registry())
+        self.enemy = SimpleNamespace(
+            name=None, terrain=None, hp=0.0, max_hp=0.0, damage=0.0, danger_level=0, element_resistances=resistance_vector(),
+        )
+
+    def apply(self, turn: int, event):
+        player, enemy = self.player, self.enemy
+        kind, value, detail = event.kind, event.value, event.detail
+        self.turn = turn
+
+        if kind == "battle_start":
+            enemy.name, enemy.hp, enemy.max_hp = detail, value, value
+        elif kind == "terrain":
+            enemy.terrain, enemy.danger_level = detail, int(value)
+        elif kind == "player":
+            player.race, player.lvl = detail, int(value)
+        elif kind == "player_class":
+            player.player_class, player.max_hp = detail, value
+        elif kind == "loot":
+            self.loot = value
+            # Опыт считается от добычи до бонуса хоббитов
+            base_loot = value / 1.3 if race_id(player.race) == HOBBIT else value
+            self.xp_gain = max(5, base_loot / 2)
+        elif kind in ("attack", "spell_damage", "effect_tick"):
+            enemy.hp -= value
+        elif kind == "enemy_heal":
+            enemy.hp += value
+        elif kind == "enemy_attack":
+            enemy.damage = value
+        elif kind == "element" and detail is not None:
+            enemy.element_resistances[ELEMENTS.index(detail)] = int(value)
+
+
+def replay(path: str, fight_id: int, listener):
+    # Слушатель получает события так же, как от Battle: listener(event, battle)
+    events = find_fight(path, fight_id)
+    battle = ReplayBattle()
+    for turn, event in events:
+        battle.apply(turn, event)
+        listener(event, battle)
+    return events
+
+
+@dataclass
+class EventLogStats:
+    fights: int = 0
+    outcomes: dict = field(default_factory=dict)
+    mean_turns: float = 0.0
+    counts: dict = field(default_factory=dict)
+    totals: dict = field(default_factory=dict)
+    enemy_abilities: dict = field(default_factory=dict)
+
+
+def aggregate(path: str):
+    if np is not None:
+        return aggregate_numpy(path)
+
+    counts = [0] * len(EVENT_KINDS)
+    totals = [0.0] * len(EVENT_KINDS)
+    outcomes = [0] * len(OUTCOMES)
+    abilities = [0] * len(ENEMY_ABILITIES)
+    turns = 0
+    end_code = KIND_CODES["battle_end"]
+    ability_code = KIND_CODES["enemy_ability"]
+
+    for _, turn, kind, code, value in iter_records(path):
+        counts[kind] += 1
+        totals[kind] += value
+        if kind == end_code:
+            turns += turn
+            if code < len(OUTCOMES):
+                outcomes[code] += 1
+        elif kind == ability_code and code < len(ENEMY_ABILITIES):
+            abilities[code] += 1
+
+    return build_stats(counts, totals, outcomes, abilities, turns)
+
+
+def aggregate_numpy(path: str):
+    dtype = np.dtype([("fight", "<u4"), ("turn", "<u2"), ("kind", "u1"), ("code", "u1"), ("value", "<f4")])
+    count = os.path.getsize(path) // RECORD.size
+    data = np.fromfile(path, dtype=dtype, count=count)
+
+    kinds = data["kind"]
+    ends = data[kinds == KIND_CODES["battle_end"]]
+    ability_codes = data["code"][kinds == KIND_CODES["enemy_ability"]]
+
+    return build_stats(
+        np.bincount(kinds, minlength=len(EVENT_KINDS)).tolist(),
+        np.bincount(kinds, weights=data["value"], minlength=len(EVENT_KINDS)).tolist(),
+        np.bincount(ends["code"][ends["code"] < len(OUTCOMES)], minlength=len(OUTCOMES)).tolist(),
+        np.bincount(ability_codes[ability_codes < len(ENEMY_ABILITIES)], minlength=len(ENEMY_ABILITIES)).tolist(),
+        int(ends["turn"].sum()),
+    )
+
+
+def build_stats(counts, totals, outcomes, abilities, turns):
+    fights = counts[KIND_CODES["battle_end"]]
+    return EventLogStats(
+        fights=fights,
+        outcomes=dict(zip(OUTCOMES, outcomes)),
+        mean_turns=turns / fights if fights else 0.0,
+        counts={kind: counts[code] for kind, code in KIND_CODES.items() if counts[code]},
+        totals={kind: totals[code] for kind, code in KIND_CODES.items() if counts[code]},
+        enemy_abilities=dict(zip(ENEMY_ABILITIES, abilities)),
+    )
+
+
+def print_event(event, battle):
+    detail = event.detail if event.detail is not None else ""
+    print(f"[{battle.turn:>3}] {event.kind:<26} {event.value:>12.2f}  {detail}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Бинарный журнал боев")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    stats_parser = subparsers.add_parser("stats", help="сводная статистика по журналу")
+    stats_parser.add_argument("path")
+
+    replay_parser = subparsers.add_parser("replay", help="показать события одного боя")
+    replay_parser.add_argument("path")
+    replay_parser.add_argument("fight", type=int)
+    replay_parser.add_argument("--raw", action="store_true", help="таблица событий вместо боевого вывода игры")
+
+    args = parser.parse_args()
+
+    if args.command == "replay":
+        if args.raw:
+            listener = print_event
+        else:
+            # Тот же вывод, что и в игре; отрисовка тянет rich, поэтому импорт только здесь
+            from gamecore.ui import screen
+            from gamecore.ui.battle import render_battle_event
+            screen.reset()
+            listener = render_battle_event
+        if not replay(args.path, args.fight, listener):
+            print(f"Бой {args.fight} не найден")
+        return
+
+    stats = aggregate(args.path)
+    print(f"Боев: {stats.fights}, ходов в среднем: {stats.mean_turns:.2f}")
+    for outcome, count in stats.outcomes.items():
+        print(f"  {outcome}: {count}")
+    print("События:")
+    for kind, count in stats.counts.items():
+        print(f"  {kind:<26} {count:>10} {stats.totals[kind]:>16.2f}")
+    print("Способности врагов:")
+    for ability, count in stats.enemy_abilities.items():
+        print(f"  {ability:<26} {count:>10}")
+
+
+if __name__ == "__main__":
+    main()
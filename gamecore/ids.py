@@ -0,0 +1,44 @@
+from functools import lru_cache
+from gamecore import constants
+from gamecore.constants import RACES, CLASSES, TERRAINS
+from gamecore.elements import NO_ELEMENT
+
+# Строки рас, классов, местностей и стихий нужны только для вывода и сохранений,
+# в игровой логике сравниваются плотные int ID (индексы в списках контента)
+NO_ID = NO_ELEMENT
+RACE_IDS = {race: index for index, race in enumerate(RACES)}
+CLASS_IDS = {player_class: index for index, player_class in enumerate(CLASSES)}
+TERRAIN_IDS = {terrain: index for index, terrain in enumerate(TERRAINS)}
+
+
+def race_id(race: str):
+    return RACE_IDS.get(race, NO_ID)
+
+
+def class_id(player_class: str):
+    return CLASS_IDS.get(player_class, NO_ID)
+
+
+def terrain_id(terrain: str):
+    return TERRAIN_IDS.get(terrain, NO_ID)
+
+
+def dense(ids: dict, values: dict, default=None):
+    # Данные по ID одним кортежем; лишний последний элемент - значение для NO_ID (индекс -1)
+    table = [default] * (len(ids) + 1)
+    for name, value in values.items():
+        index = ids.get(name, NO_ID)
+        if index != NO_ID:
+            table[index] = value
+    return tuple(table)
+
+
+# Расы и классы с особыми правилами; если набор контента их убрал, ID равен NO_ID и правило не срабатывает
+HUMAN, HOBBIT, ORC, ELF, GNOME, DWARF, DEMON = map(race_id, ("человек", "хоббит", "орк", "эльф", "гном", "дварф", "демон"))
+WARRIOR, MAGE, ARCHER, ROGUE, PRIEST, NECROMANCER, PALADIN, DRUID = map(
+    class_id, ("воин", "маг", "лучник", "плут", "жрец", "некромант", "паладин", "друид"),
+)
+
+@lru_cache(maxsize=None)
+def terrain_effects_by_id():
+    return dense(TERRAIN_IDS, constants.TERRAIN_EFFECTS, {})
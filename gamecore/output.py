@@ -0,0 +1,110 @@
+import io
+import sys
+
+SINKS = ("rich", "buffered", "null")
+
+
+class RichSink:
+    renders = True
+
+    def __init__(self, console=None):
+        if console is None:
+            from rich import get_console
+            console = get_console()
+        self.console = console
+
+    def write(self, *objects, sep: str = " ", end: str = "\n"):
+        self.console.print(*objects, sep=sep, end=end)
+
+    def event(self, event):
+        pass
+
+    def flush(self):
+        self.console.file.flush()
+
+
+class BufferedSink(RichSink):
+    # Весь вывод хода копится в памяти и уходит в терминал одной записью
+    def __init__(self, file=None):
+        from rich.console import Console
+        self.target = file or sys.stdout
+        self.buffer = io.StringIO()
+        is_terminal = hasattr(self.target, "isatty") and self.target.isatty()
+        super().__init__(Console(file=self.buffer, force_terminal=is_terminal or None))
+
+    def flush(self):
+        text = self.buffer.getvalue()
+        if text:
+            self.buffer.seek(0)
+            self.buffer.truncate()
+            self.target.write(text)
+        self.target.flush()
+
+
+class NullSink:
+    # Для симуляций и серверов: текст не рендерится, остаются только события боя
+    renders = False
+    console = None
+
+    def __init__(self, record_events: bool = True):
+        self.events = [] if record_events else None
+
+    def write(self, *objects, sep: str = " ", end: str = "\n"):
+        pass
+
+    def event(self, event):
+        if self.events is not None:
+            self.events.append(event)
+
+    def flush(self):
+        pass
+
+
+_sink = None
+
+
+def make_sink(kind: str):
+    if kind == "rich":
+        return RichSink()
+    if kind == "buffered":
+        return BufferedSink()
+    if kind == "null":
+        return NullSink()
+    raise ValueError(f"Неизвестный вывод: {kind}")
+
+
+def get_sink():
+    global _sink
+    if _sink is None:
+        _sink = RichSink()
+    return _sink
+
+
+def set_sink(sink):
+    global _sink
+    if _sink is not None:
+        _sink.flush()
+    _sink = sink
+    return sink
+
+
+def print(*objects, sep: str = " ", end: str = "\n"):
+    get_sink().write(*objects, sep=sep, end=end)
+
+
+def flush():
+    get_sink().flush()
+
+
+def ask(prompt_type, *args, **kwargs):
+    # Перед чтением ввода выводим все, что накопилось за ход
+    get_sink().flush()
+    return prompt_type.ask(*args, **kwargs)
+
+
+def pause(message: str = ""):
+    sink = get_sink()
+    if sink.renders:
+        sink.write(message, end="")
+    sink.flush()
+    return input()
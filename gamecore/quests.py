@@ -0,0 +1,104 @@
+from dataclasses import dataclass
+from functools import lru_cache
+from types import MappingProxyType
+from gamecore import constants
+from gamecore.content import QUEST_EVENTS
+from gamecore.ids import NO_ID, terrain_id
+
+
+@dataclass(frozen=True, slots=True)
+class QuestTrigger:
+    quest_id: str
+    event: str
+    # Значение, по которому событие находит триггер в индексе: тег врага, ID местности, предмет, NPC.
+    # None у убийства - любой враг
+    key: object
+    # Дополнительное условие на местность для убийств; NO_ID - любая
+    terrain_id: int
+    amount: int
+
+    @classmethod
+    def compile(cls, quest_id: str, data: dict):
+        event = data["event"]
+        key = data.get(QUEST_EVENTS[event])
+        terrain = NO_ID
+        if event == "explore":
+            key = terrain_id(key)
+        elif "terrain" in data:
+            terrain = terrain_id(data["terrain"])
+        return cls(quest_id, event, key, terrain, data.get("amount", 1))
+
+
+@dataclass(frozen=True, slots=True)
+class QuestDefinition:
+    # Неизменяемое описание квеста, одно на процесс; у игрока хранится только прогресс
+    id: str
+    index: int
+    name: str
+    description: str
+    reward: MappingProxyType
+    required: int
+    required_level: int
+    faction: str
+    next_quest: str
+    triggers: tuple
+
+    @classmethod
+    def compile(cls, quest_id: str, index: int):
+        data = constants.QUESTS[quest_id]
+        reward = {
+            key: MappingProxyType(dict(value)) if isinstance(value, dict) else value
+            for key, value in data["reward"].items()
+        }
+        return cls(
+            quest_id,
+            index,
+            data["name"],
+            data["description"],
+            MappingProxyType(reward),
+            data.get("required", 1),
+            data.get("required_level", 1),
+            data.get("faction"),
+            constants.QUEST_CHAINS.get(quest_id),
+            tuple(QuestTrigger.compile(quest_id, trigger) for trigger in data.get("triggers", ())),
+        )
+
+
+# Реестр и индекс триггеров строятся при первом обращении, а не при импорте:
+# экрану запуска квесты не нужны
+@lru_cache(maxsize=None)
+def quest_registry():
+    return MappingProxyType({
+        quest_id: QuestDefinition.compile(quest_id, index) for index, quest_id in enumerate(constants.QUESTS)
+    })
+
+
+@lru_cache(maxsize=None)
+def quest_ids():
+    return tuple(quest_registry())
+
+
+def build_trigger_index(registry):
+    # (событие, ключ) -> триггеры: событие проверяет только квесты, которые может продвинуть
+    index = {}
+    for definition in registry.values():
+        for trigger in definition.triggers:
+            index.setdefault((trigger.event, trigger.key), []).append(trigger)
+    return MappingProxyType({key: tuple(triggers) for key, triggers in index.items()})
+
+
+@lru_cache(maxsize=None)
+def quest_triggers():
+    return build_trigger_index(quest_registry())
+
+
+def get_quest(quest_id: str):
+    return quest_registry()[quest_id]
+
+
+def find_triggers(event: str, keys=(), terrain: int = NO_ID):
+    index = quest_triggers()
+    triggers = list(index.get((event, None), ()))
+    for key in keys:
+        triggers += index.get((event, key), ())
+    return [trigger for trigger in triggers if trigger.terrain_id in (NO_ID, terrain)]
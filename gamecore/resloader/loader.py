@@ -1,13 +1,38 @@
+import os
+import struct
+import threading
+from collections import OrderedDict
 from pathlib import Path
-from rich import print
+from gamecore.output import get_sink, print
+from gamecore.resloader.pack import ResourcePack
+
+def file_stamp(path):
+    stat = os.stat(path)
+    return stat.st_mtime_ns, stat.st_size, stat.st_ino
 
 class ResourceLoader:
-    def __init__(self, resources_dir: str):
+    def __init__(self, resources_dir: str, rendered_cache_size: int = 32, pack_path: str = None):
         self.resources_dir = Path(resources_dir)
         self.resources = {}
         self.cache = {}
+        self.pack = None
+        self.pack_path = None
+        self.pack_stamp = None
+        # Отметки (mtime, размер, inode) загруженных файлов и номер версии каждого ресурса
+        self.stamps = {}
+        self.generations = {}
+        self.reload_lock = threading.Lock()
+        self.watcher = None
+        # Готовый ANSI-вывод: (ресурс, версия, цвета, фон, ширина, цвета терминала) -> текст
+        self.rendered = OrderedDict()
+        self.rendered_cache_size = rendered_cache_size
 
-        if not self.resources_dir.exists():
+        # Собранный архив (res.pack рядом с папкой) имеет приоритет над отдельными файлами
+        self.pack_path = Path(pack_path) if pack_path else self.resources_dir.with_suffix(".pack")
+        if self.pack_path.exists():
+            self.pack_stamp = file_stamp(self.pack_path)
+            self.pack = ResourcePack(self.pack_path)
+        elif not self.resources_dir.exists():
             self.resources_dir.mkdir()
 
     def add_resource(self, filename: str, short_name: str = None):
@@ -22,21 +47,111 @@ class ResourceLoader:
         if short_name not in self.resources:
             return None
 
-        file_path = self.resources_dir / self.resources[short_name]
+        filename = self.resources[short_name]
+        pack = self.pack
+        if pack is not None and filename in pack:
+            return pack.text(filename)
+
+        file_path = self.resources_dir / filename
         if not file_path.exists():
             return None
 
+        stamp = file_stamp(file_path)
         with open(file_path, "r", encoding="utf-8") as file:
             content = file.read()
+            self.stamps[short_name] = stamp
             self.cache[short_name] = content
             return content
 
+    def reload_changed(self):
+        # Новое содержимое читается целиком и подменяется одним присваиванием,
+        # поэтому параллельная отрисовка видит либо старую, либо новую версию
+        changed = []
+        with self.reload_lock:
+            if self.pack_path is not None and self.pack_path.exists():
+                stamp = file_stamp(self.pack_path)
+                if stamp != self.pack_stamp:
+                    changed += self.reload_pack(stamp)
+
+            for short_name, stamp in list(self.stamps.items()):
+                file_path = self.resources_dir / self.resources[short_name]
+                if not file_path.exists():
+                    continue
+                new_stamp = file_stamp(file_path)
+                if new_stamp == stamp:
+                    continue
+                with open(file_path, "r", encoding="utf-8") as file:
+                    content = file.read()
+                self.stamps[short_name] = new_stamp
+                self.cache[short_name] = content
+                changed.append(short_name)
+
+            changed = list(dict.fromkeys(changed))
+            for short_name in changed:
+                self.generations[short_name] = self.generations.get(short_name, 0) + 1
+        return changed
+
+    def reload_pack(self, stamp):
+        old_pack = self.pack
+        try:
+            new_pack = ResourcePack(self.pack_path)
+        except (OSError, ValueError, struct.error):
+            # Архив еще дописывается - попробуем на следующей проверке
+            return []
+        self.pack = new_pack
+        self.pack_stamp = stamp
+
+        # Ресурсы, которые теперь есть в архиве, больше не читаются из отдельных файлов
+        for short_name, filename in self.resources.items():
+            if filename in new_pack:
+                self.cache.pop(short_name, None)
+                self.stamps.pop(short_name, None)
+
+        # Старый mmap не закрываем: его могут читать прямо сейчас, он освободится сам
+        changed = []
+        for short_name, filename in self.resources.items():
+            old_entry = old_pack.index.get(filename) if old_pack is not None else None
+            new_entry = new_pack.index.get(filename)
+            if (old_entry and old_entry[2]) != (new_entry and new_entry[2]):
+                changed.append(short_name)
+        return changed
+
+    def watch(self, interval: float = 1.0, on_reload=None):
+        from gamecore.resloader.watch import ResourceWatcher
+        if self.watcher is None:
+            self.watcher = ResourceWatcher(self, interval, on_reload)
+            self.watcher.start()
+        return self.watcher
+
+    def stop_watching(self):
+        if self.watcher is not None:
+            self.watcher.stop()
+            self.watcher = None
+
     def print_resource_content(self, short_name: str, colors: dict = {}, background: str = None):
-        content = self.load_resource(short_name)
-        if content is None:
-            print(f"[red]Ресурс {short_name} не найден[/red]")
+        console = get_sink().console
+        if console is None:
             return
 
+        generation = self.generations.get(short_name, 0)
+        key = (short_name, generation, tuple(colors.items()), background, console.width, console.color_system)
+        rendered = self.rendered.get(key)
+        if rendered is None:
+            content = self.load_resource(short_name)
+            if content is None:
+                print(f"[red]Ресурс {short_name} не найден[/red]")
+                return
+
+            rendered = self.render_resource_content(console, content, colors, background)
+            self.rendered[key] = rendered
+            if len(self.rendered) > self.rendered_cache_size:
+                self.rendered.popitem(last=False)
+        else:
+            self.rendered.move_to_end(key)
+
+        console.file.write(rendered)
+
+    def render_resource_content(self, console, content: str, colors: dict, background: str = None):
         if colors:
             for key, value in colors.items():
                 if key == "*":
@@ -45,6 +160,8 @@ class ResourceLoader:
                     content = content.replace(key, f"[{value}]{key}[/{value}]")
 
         if background:
-            print(f"[on {background}]{content}[/on {background}]")
-        else:
-            print(content)
+            content = f"[on {background}]{content}[/on {background}]"
+
+        with console.capture() as capture:
+            console.print(content)
+        return capture.get()
@@ -0,0 +1,122 @@
+import argparse
+import mmap
+import os
+import struct
+from hashlib import blake2b
+from pathlib import Path
+
+MAGIC = b"ZRES"
+VERSION = 1
+# magic, version, количество записей, размер индекса
+HEADER = struct.Struct("<4sHIQ")
+# offset, length, hash, длина имени; за записью идет имя в UTF-8
+ENTRY = struct.Struct("<QI8sH")
+
+
+def content_hash(data):
+    return blake2b(data, digest_size=8).digest()
+
+
+class ResourcePack:
+    def __init__(self, path: str):
+        self.path = Path(path)
+        self.index = {}
+        with open(self.path, "rb") as f:
+            self.data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, version, count, index_size = HEADER.unpack_from(self.data, 0)
+        if magic != MAGIC or version != VERSION:
+            self.data.close()
+            raise ValueError(f"{path}: неизвестный формат архива ресурсов")
+
+        position = HEADER.size
+        for _ in range(count):
+            offset, length, digest, name_length = ENTRY.unpack_from(self.data, position)
+            position += ENTRY.size
+            name = bytes(self.data[position:position + name_length]).decode("utf-8")
+            position += name_length
+            self.index[name] = (offset, length, digest)
+
+    def __contains__(self, name: str):
+        return name in self.index
+
+    def __iter__(self):
+        return iter(self.index)
+
+    def __len__(self):
+        return len(self.index)
+
+    def get(self, name: str):
+        # Срез mmap без копирования; байты читаются с диска только при обращении
+        entry = self.index.get(name)
+        if entry is None:
+            return None
+        offset, length, _ = entry
+        return memoryview(self.data)[offset:offset + length]
+
+    def text(self, name: str):
+        data = self.get(name)
+        if data is None:
+            return None
+        return str(data, "utf-8")
+
+    def verify(self, name: str = None):
+        names = [name] if name is not None else list(self.index)
+        return all(content_hash(self.get(entry)) == self.index[entry][2] for entry in names)
+
+    def close(self):
+        self.data.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def build_pack(source_dir: str, output: str):
+    source_dir = Path(source_dir)
+    files = sorted(path for path in source_dir.rglob("*") if path.is_file())
+    names = [path.relative_to(source_dir).as_posix() for path in files]
+
+    index_size = sum(ENTRY.size + len(name.encode("utf-8")) for name in names)
+    offset = HEADER.size + index_size
+
+    entries = []
+    for name, path in zip(names, files):
+        data = path.read_bytes()
+        entries.append((name, data, offset))
+        offset += len(data)
+
+    tmp_path = f"{output}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(HEADER.pack(MAGIC, VERSION, len(entries), index_size))
+        for name, data, data_offset in entries:
+            encoded = name.encode("utf-8")
+            f.write(ENTRY.pack(data_offset, len(data), content_hash(data), len(encoded)))
+            f.write(encoded)
+        for _, data, _ in entries:
+            f.write(data)
+    os.replace(tmp_path, output)
+    return len(entries)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Сборка архива ресурсов")
+    parser.add_argument("source", nargs="?", default="res", help="папка с ресурсами")
+    parser.add_argument("-o", "--output", default=None, help="путь к архиву (по умолчанию <source>.pack)")
+    parser.add_argument("--verify", action="store_true", help="проверить хэши собранного архива")
+    args = parser.parse_args()
+
+    output = args.output or f"{Path(args.source)}.pack"
+    count = build_pack(args.source, output)
+    print(f"{output}: {count} ресурсов, {os.path.getsize(output)} байт")
+
+    if args.verify:
+        with ResourcePack(output) as pack:
+            if not pack.verify():
+                raise SystemExit(f"{output}: хэши не совпадают")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+import ctypes
+import ctypes.util
+import os
+import select
+import sys
+import threading
+
+IN_MODIFY = 0x00000002
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+WATCH_MASK = IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE | IN_DELETE
+
+
+def open_inotify(paths):
+    if not sys.platform.startswith("linux"):
+        return None
+
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+        fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+    except (OSError, AttributeError):
+        return None
+    if fd < 0:
+        return None
+
+    watched = 0
+    for path in paths:
+        if os.path.isdir(path) and libc.inotify_add_watch(fd, os.fsencode(path), WATCH_MASK) >= 0:
+            watched += 1
+    if not watched:
+        os.close(fd)
+        return None
+    return fd
+
+
+class ResourceWatcher(threading.Thread):
+    # inotify только будит поток; что именно изменилось, решает ResourceLoader.reload_changed по stat
+    def __init__(self, loader, interval: float = 1.0, on_reload=None):
+        super().__init__(name="resource-watcher", daemon=True)
+        self.loader = loader
+        self.interval = interval
+        self.on_reload = on_reload
+        self.stopped = threading.Event()
+
+        directories = {str(loader.resources_dir)}
+        if loader.pack_path is not None:
+            directories.add(str(loader.pack_path.parent))
+        self.fd = open_inotify(sorted(directories))
+
+    @property
+    def uses_inotify(self):
+        return self.fd is not None
+
+    def wait(self):
+        if self.fd is None:
+            return not self.stopped.wait(self.interval)
+
+        readable, _, _ = select.select([self.fd], [], [], self.interval)
+        if readable:
+            try:
+                while os.read(self.fd, 4096):
+                    pass
+            except BlockingIOError:
+                pass
+        return not self.stopped.is_set()
+
+    def run(self):
+        try:
+            while self.wait():
+                changed = self.loader.reload_changed()
+                if changed and self.on_reload is not None:
+                    self.on_reload(changed)
+        finally:
+            if self.fd is not None:
+                os.close(self.fd)
+                self.fd = None
+
+    def stop(self, timeout: float = None):
+        self.stopped.set()
+        if self.is_alive() and threading.current_thread() is not self:
+            self.join(timeout)
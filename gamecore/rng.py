@@ -0,0 +1,110 @@
+import random
+from bisect import bisect
+from hashlib import blake2b
+from itertools import accumulate
+
+STREAMS = ("combat", "spawn", "loot", "shop", "world")
+
+MASK64 = (1 << 64) - 1
+
+
+def derive_seed(seed: int, name: str):
+    digest = blake2b(f"{seed}/{name}".encode(), digest_size=8).digest()
+    return int.from_bytes(digest, "little")
+
+
+class StreamRandom:
+    # splitmix64: состояние - одно 64-битное число вместо ~2.5КБ у random.Random
+    __slots__ = ("state",)
+
+    def __init__(self, seed: int = 0):
+        self.state = seed & MASK64
+
+    def next64(self):
+        self.state = z = (self.state + 0x9E3779B97F4A7C15) & MASK64
+        z = ((z ^ (z >> 30)) * 0xBF58476D1CE4E5B9) & MASK64
+        z = ((z ^ (z >> 27)) * 0x94D049BB133111EB) & MASK64
+        return z ^ (z >> 31)
+
+    def getrandbits(self, k: int):
+        bits = 0
+        for shift in range(0, k, 64):
+            bits |= self.next64() << shift
+        return bits & ((1 << k) - 1)
+
+    def below(self, n: int):
+        # Без смещения: отбрасываем значения из неполного последнего интервала
+        if n <= 0:
+            raise ValueError("empty range")
+        limit = (1 << 64) - (1 << 64) % n
+        while (value := self.next64()) >= limit:
+            pass
+        return value % n
+
+    def random(self):
+        return (self.next64() >> 11) * (1.0 / (1 << 53))
+
+    def randint(self, a: int, b: int):
+        return a + self.below(b - a + 1)
+
+    def uniform(self, a: float, b: float):
+        return a + (b - a) * self.random()
+
+    def choice(self, seq):
+        return seq[self.below(len(seq))]
+
+    def choices(self, population, weights=None, k: int = 1):
+        if weights is None:
+            n = len(population)
+            return [population[self.below(n)] for _ in range(k)]
+
+        cum_weights = list(accumulate(weights))
+        total = cum_weights[-1]
+        hi = len(population) - 1
+        return [population[bisect(cum_weights, self.random() * total, 0, hi)] for _ in range(k)]
+
+    def shuffle(self, items):
+        for i in reversed(range(1, len(items))):
+            j = self.below(i + 1)
+            items[i], items[j] = items[j], items[i]
+
+    def getstate(self):
+        return self.state
+
+    def setstate(self, state: int):
+        self.state = state & MASK64
+
+
+class SessionRandom:
+    __slots__ = ("seed",) + STREAMS
+
+    def __init__(self, seed: int = None):
+        if seed is None:
+            seed = random.SystemRandom().getrandbits(63)
+        self.seed = seed
+        self.combat = StreamRandom(derive_seed(seed, "combat"))
+        self.spawn = StreamRandom(derive_seed(seed, "spawn"))
+        self.loot = StreamRandom(derive_seed(seed, "loot"))
+        self.shop = StreamRandom(derive_seed(seed, "shop"))
+        self.world = StreamRandom(derive_seed(seed, "world"))
+
+    @classmethod
+    def restore(cls, seed: int, states):
+        rng = cls.__new__(cls)
+        rng.seed = seed
+        for name, state in zip(STREAMS, states):
+            setattr(rng, name, StreamRandom(state))
+        return rng
+
+    def getstate(self):
+        return tuple(self.stream(name).getstate() for name in STREAMS)
+
+    def setstate(self, states):
+        for name, state in zip(STREAMS, states):
+            self.stream(name).setstate(state)
+
+    def stream(self, name: str):
+        return getattr(self, name)
+
+    def fork(self, key):
+        return SessionRandom(derive_seed(self.seed, f"fork:{key}"))
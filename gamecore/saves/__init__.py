@@ -0,0 +1,6 @@
+from gamecore.saves.codec import SAVE_VERSION, decode_player, encode_player
+from gamecore.saves.store import SAVES_DIR, list_saves, read_save, save_path, write_save
+from gamecore.saves.catalog import SaveCatalog, SaveEntry, get_catalog
+from gamecore.saves.journal import SaveJournal
+from gamecore.saves.backends import BACKENDS, FileSaveStore, make_store
+from gamecore.saves.writer import BackgroundSaver
@@ -0,0 +1,56 @@
+import os
+from gamecore.saves.catalog import get_catalog
+from gamecore.saves.journal import SaveJournal
+from gamecore.saves.codec import SAVE_EXTENSION
+from gamecore.saves.store import LEGACY_EXTENSION, SAVES_DIR, read_save, save_name, write_save
+
+BACKENDS = ("files", "sqlite")
+
+
+class FileSaveStore:
+    # Файл на персонажа, журнал автосохранений и каталог для меню
+    def __init__(self, directory: str = SAVES_DIR, writer=None):
+        self.directory = directory
+        self.writer = writer
+
+    def exists(self, name: str):
+        stem = os.path.join(self.directory, save_name(name))
+        return any(os.path.exists(stem + extension) for extension in (SAVE_EXTENSION, LEGACY_EXTENSION))
+
+    def entries(self, limit: int = -1):
+        catalog = get_catalog(self.directory)
+        while True:
+            entries = catalog.find(limit=limit if limit >= 0 else None)
+            # Файлы, удаленные мимо игры, убираем из каталога, иначе "Продолжить" вечно выбирает их
+            missing = [entry for entry in entries if not os.path.exists(entry.path)]
+            if not missing:
+                return entries
+            for entry in missing:
+                catalog.remove(entry.path)
+
+    def load(self, entry, rng=None):
+        try:
+            return read_save(entry.path, rng)
+        except FileNotFoundError:
+            get_catalog(self.directory).remove(entry.path)
+            raise
+
+    def save(self, player):
+        return write_save(player, self.directory)
+
+    def autosaver(self, player):
+        return SaveJournal(player, self.directory, writer=self.writer)
+
+    def close(self):
+        # Каталог и журнал сбрасывают данные на диск после каждой записи
+        pass
+
+
+def make_store(kind: str, directory: str = SAVES_DIR, writer=None):
+    # writer - BackgroundSaver, общий для всех сессий процесса; без него запись синхронная
+    if kind == "files":
+        return FileSaveStore(directory, writer)
+    if kind == "sqlite":
+        from gamecore.saves.database import DATABASE_FILE, SqliteSaveStore
+        return SqliteSaveStore(os.path.join(directory, DATABASE_FILE), writer)
+    raise ValueError(f"Неизвестное хранилище сохранений: {kind}")
@@ -0,0 +1,278 @@
+import os
+import struct
+import threading
+from dataclasses import dataclass
+from functools import lru_cache
+from hashlib import blake2b
+from gamecore.constants import RACES, CLASSES
+from gamecore.saves.codec import INLINE, SAVE_EXTENSION, table_hash
+from gamecore.saves.store import LEGACY_EXTENSION, list_saves, read_save, save_name
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+CATALOG_MAGIC = b"ZCAT"
+CATALOG_VERSION = 1
+CATALOG_FILE = "catalog.idx"
+NAMES_FILE = "catalog.names"
+# magic, version и хэши RACES и CLASSES: раса и класс в записях - индексы в этих таблицах,
+# при их изменении каталог пересобирается
+CATALOG_HEADER = struct.Struct("<4sHQQ")
+# ключ (хэш имени файла), mtime в нс, смещение и длина имени в catalog.names,
+# уровень, прогресс истории, раса, класс, флаги
+RECORD = struct.Struct("<QqIHHhBBB3x")
+LEGACY_FLAG = 1
+
+if np is not None:
+    RECORD_DTYPE = np.dtype({
+        "names": ["key", "mtime", "name_offset", "name_length", "lvl", "story_progress", "race", "player_class", "flags"],
+        "formats": ["<u8", "<i8", "<u4", "<u2", "<u2", "<i2", "u1", "u1", "u1"],
+        "offsets": [0, 8, 16, 20, 22, 24, 26, 27, 28],
+        "itemsize": RECORD.size,
+    })
+
+
+def catalog_key(stem: str):
+    return int.from_bytes(blake2b(stem.encode("utf-8"), digest_size=8).digest(), "little")
+
+
+@lru_cache(maxsize=None)
+def catalog_header():
+    return CATALOG_MAGIC, CATALOG_VERSION, table_hash(RACES), table_hash(CLASSES)
+
+
+def table_code(table, value: str):
+    return table.index(value) if value in table else INLINE
+
+
+@dataclass(slots=True)
+class SaveEntry:
+    name: str
+    race: str
+    player_class: str
+    lvl: int
+    story_progress: int
+    mtime: float
+    path: str
+
+
+class SaveCatalog:
+    # Индекс сохранений из записей фиксированного размера: меню загрузки, фильтры и
+    # "продолжить" работают без чтения самих сохранений
+    def __init__(self, directory: str):
+        self.directory = directory
+        self.path = os.path.join(directory, CATALOG_FILE)
+        self.names_path = os.path.join(directory, NAMES_FILE)
+        self.records = bytearray()
+        self.names = bytearray()
+        self.slots = {}
+        self.index_file = None
+        self.names_file = None
+        # Обновления приходят и из игрового цикла, и из фоновой записи сохранений
+        self.lock = threading.RLock()
+
+        if not self.load():
+            self.rebuild()
+
+    def __len__(self):
+        return len(self.records) // RECORD.size
+
+    def load(self):
+        try:
+            with open(self.path, "rb") as f:
+                data = f.read()
+            with open(self.names_path, "rb") as f:
+                names = f.read()
+        except FileNotFoundError:
+            return False
+
+        if len(data) < CATALOG_HEADER.size or CATALOG_HEADER.unpack_from(data, 0) != catalog_header():
+            return False
+        records = data[CATALOG_HEADER.size:]
+        # Оборванная запись после сбоя: индекс проще пересобрать
+        if len(records) % RECORD.size:
+            return False
+
+        self.records = bytearray(records)
+        self.names = bytearray(names)
+        # Имя дописывается раньше записи, поэтому ссылка за конец catalog.names - признак порчи
+        if np is not None:
+            view = np.frombuffer(records, dtype=RECORD_DTYPE)
+            ends = view["name_offset"].astype(np.int64) + view["name_length"]
+            if len(view) and ends.max() > len(names):
+                return False
+        elif any(offset + length > len(names) for _, _, offset, length, *_ in RECORD.iter_unpack(records)):
+            return False
+        # Таблица ключей нужна только для записи, строится при первом обновлении
+        self.slots = None
+        self.open()
+        return True
+
+    def key_slots(self):
+        if self.slots is None:
+            if np is not None:
+                keys = np.frombuffer(bytes(self.records), dtype=RECORD_DTYPE)["key"].tolist()
+            else:
+                keys = [key for key, *_ in RECORD.iter_unpack(self.records)]
+            self.slots = dict(zip(keys, range(len(keys))))
+        return self.slots
+
+    def open(self):
+        self.close()
+        self.index_file = open(self.path, "r+b")
+        self.names_file = open(self.names_path, "ab")
+
+    def close(self):
+        for f in (self.index_file, self.names_file):
+            if f is not None:
+                f.close()
+        self.index_file = self.names_file = None
+
+    def rebuild(self):
+        self.close()
+        self.records = bytearray()
+        self.names = bytearray()
+        self.slots = {}
+        if not os.path.exists(self.directory):
+            os.makedirs(self.directory)
+        with open(self.path, "wb") as f:
+            f.write(CATALOG_HEADER.pack(*catalog_header()))
+        with open(self.names_path, "wb"):
+            pass
+        self.open()
+
+        for path in list_saves(self.directory):
+            try:
+                player = read_save(path)
+            except Exception:
+                continue
+            self.update(player, path)
+
+    def update(self, player, path: str, mtime: int = None):
+        return self.put(path, player.name, player.race, player.player_class, player.lvl, player.story_progress, mtime)
+
+    def put(self, path: str, name: str, race: str, player_class: str, lvl: int, story_progress: int, mtime: int = None):
+        stem, extension = os.path.splitext(os.path.basename(path))
+        key = catalog_key(stem)
+        if mtime is None:
+            mtime = os.stat(path).st_mtime_ns
+        with self.lock:
+            slot = self.key_slots().get(key)
+            encoded = name.encode("utf-8")
+            if slot is not None:
+                _, _, name_offset, name_length, *_ = RECORD.unpack_from(self.records, slot * RECORD.size)
+                if self.names[name_offset:name_offset + name_length] != encoded:
+                    name_offset = None
+            else:
+                slot = len(self)
+                self.records += bytes(RECORD.size)
+                self.slots[key] = slot
+                name_offset = None
+
+            if name_offset is None:
+                name_offset, name_length = len(self.names), len(encoded)
+                self.names += encoded
+                self.names_file.write(encoded)
+                self.names_file.flush()
+
+            flags = LEGACY_FLAG if extension != SAVE_EXTENSION else 0
+            record = RECORD.pack(
+                key, mtime, name_offset, name_length, lvl, story_progress,
+                table_code(RACES, race), table_code(CLASSES, player_class), flags,
+            )
+            # Запись обновляется на месте, имя дописывается раньше записи, которая на него ссылается
+            position = slot * RECORD.size
+            self.records[position:position + RECORD.size] = record
+            self.index_file.seek(CATALOG_HEADER.size + position)
+            self.index_file.write(record)
+            self.index_file.flush()
+            return slot
+
+    def remove(self, path: str):
+        # Сохранение удалили: на место записи переносится последняя, файл укорачивается
+        key = catalog_key(os.path.splitext(os.path.basename(path))[0])
+        with self.lock:
+            slots = self.key_slots()
+            slot = slots.pop(key, None)
+            if slot is None:
+                return False
+            last = len(self) - 1
+            if slot != last:
+                record = bytes(self.records[last * RECORD.size:])
+                self.records[slot * RECORD.size:(slot + 1) * RECORD.size] = record
+                slots[RECORD.unpack(record)[0]] = slot
+                self.index_file.seek(CATALOG_HEADER.size + slot * RECORD.size)
+                self.index_file.write(record)
+            del self.records[last * RECORD.size:]
+            self.index_file.truncate(CATALOG_HEADER.size + last * RECORD.size)
+            self.index_file.flush()
+            return True
+
+    def entry(self, slot: int):
+        _, mtime, name_offset, name_length, lvl, story_progress, race, player_class, flags = RECORD.unpack_from(
+            self.records, slot * RECORD.size
+        )
+        name = self.names[name_offset:name_offset + name_length].decode("utf-8")
+        extension = LEGACY_EXTENSION if flags & LEGACY_FLAG else SAVE_EXTENSION
+        path = os.path.join(self.directory, save_name(name) + extension)
+        return SaveEntry(
+            name,
+            RACES[race] if race != INLINE else "?",
+            CLASSES[player_class] if player_class != INLINE else "?",
+            lvl,
+            story_progress,
+            mtime / 1e9,
+            path,
+        )
+
+    def find(self, race: str = None, player_class: str = None, min_level: int = 0, max_level: int = None, limit: int = None):
+        # Фильтр и сортировка по времени последней игры (новые первыми) идут по самим записям;
+        # объекты создаются только для попавших в выдачу
+        if np is not None:
+            # Копия, чтобы не держать экспорт буфера, который растет при добавлении записей
+            with self.lock:
+                records = np.frombuffer(bytes(self.records), dtype=RECORD_DTYPE)
+            mask = records["lvl"] >= min_level
+            if max_level is not None:
+                mask &= records["lvl"] <= max_level
+            if race is not None:
+                mask &= records["race"] == table_code(RACES, race)
+            if player_class is not None:
+                mask &= records["player_class"] == table_code(CLASSES, player_class)
+            slots = np.flatnonzero(mask)
+            order = np.argsort(-records["mtime"][slots], kind="stable")
+            slots = slots[order][:limit].tolist()
+        else:
+            race_code = table_code(RACES, race) if race is not None else None
+            class_code = table_code(CLASSES, player_class) if player_class is not None else None
+            matches = [
+                (mtime, slot)
+                for slot, (_, mtime, _, _, lvl, _, race_index, class_index, _) in enumerate(RECORD.iter_unpack(bytes(self.records)))
+                if lvl >= min_level
+                and (max_level is None or lvl <= max_level)
+                and (race_code is None or race_index == race_code)
+                and (class_code is None or class_index == class_code)
+            ]
+            matches.sort(key=lambda match: -match[0])
+            slots = [slot for _, slot in matches[:limit]]
+        return [self.entry(slot) for slot in slots]
+
+    def last(self):
+        entries = self.find(limit=1)
+        return entries[0] if entries else None
+
+
+_catalogs = {}
+_catalogs_lock = threading.Lock()
+
+
+def get_catalog(directory: str):
+    # Один экземпляр на папку, чтобы ручное сохранение и автосохранение писали в одни файлы
+    key = os.path.abspath(directory)
+    with _catalogs_lock:
+        catalog = _catalogs.get(key)
+        if catalog is None:
+            catalog = _catalogs[key] = SaveCatalog(directory)
+    return catalog
@@ -0,0 +1,350 @@
+import struct
+from array import array
+from functools import lru_cache
+from hashlib import blake2b
+from gamecore import constants
+from gamecore.constants import RACES, CLASSES, ELEMENTS
+from gamecore.classes import Player, Item, Weapon, Armor, Quest
+from gamecore.effects import StatusEffects
+from gamecore.elements import NO_ELEMENT, resistance_vector
+from gamecore.quests import quest_ids
+from gamecore.rng import STREAMS, SessionRandom
+
+MAGIC = b"ZSAV"
+SAVE_VERSION = 1
+SAVE_EXTENSION = ".sav"
+
+HEADER = struct.Struct("<4sH")
+# длина и хэш каждой из content_tables() на момент записи
+CONTENT = struct.Struct("<" + "HQ" * 7)
+U8 = struct.Struct("<B")
+U16 = struct.Struct("<H")
+PLAYER_FIELDS = (
+    "lvl", "xp", "xp_to_next", "hp", "max_hp", "mana", "max_mana", "power", "agility", "wisdom",
+    "money", "damage", "crit_chance", "crit_multiplier", "hp_mult", "mana_mult", "story_progress",
+)
+PLAYER = struct.Struct("<Hddddddhhhddddddh")
+STATS = ("enemies_killed", "quests_completed", "gold_earned", "damage_dealt")
+STAT_VALUES = struct.Struct("<IIdd")
+# seed и состояние каждого потока
+RNG_STATE = struct.Struct(f"<Q{len(STREAMS)}Q")
+# вид, тип, стоимость, стихия, длина имени
+ITEM = struct.Struct("<BBdbH")
+# durability, level, crit_chance, max_durability
+WEAPON = struct.Struct("<dHdd")
+# квест, завершен, прогресс
+QUEST = struct.Struct("<BBH")
+RELATION = struct.Struct("<h")
+MATERIAL = struct.Struct("<I")
+ABILITY = struct.Struct("<d")
+
+ITEM_KIND, WEAPON_KIND, ARMOR_KIND = 0, 1, 2
+NO_ITEM = 0xFF
+INLINE = 0xFF
+
+ITEM_TYPES = ("consumable", "weapon", "armor", "material", "amulet", "ring")
+EQUIPMENT_SLOTS = ("weapon", "armor", "amulet", "ring")
+
+
+@lru_cache(maxsize=None)
+def faction_names():
+    return tuple(constants.FRACTIONS)
+
+
+@lru_cache(maxsize=None)
+def material_names():
+    return tuple(dict.fromkeys(material for recipe in constants.CRAFT_RECIPES.values() for material in recipe))
+
+
+def table_hash(table):
+    return int.from_bytes(blake2b("\0".join(table).encode("utf-8"), digest_size=8).digest(), "little")
+
+
+@lru_cache(maxsize=None)
+def content_tables():
+    # Таблицы, индексы которых пишутся в сохранение
+    return (RACES, CLASSES, quest_ids(), faction_names(), material_names(), ELEMENTS, ITEM_TYPES)
+
+
+@lru_cache(maxsize=None)
+def content_stamp():
+    stamp = []
+    for table in content_tables():
+        stamp += (len(table), table_hash(table))
+    return tuple(stamp)
+
+
+@lru_cache(maxsize=None)
+def content_matches(stamp: tuple):
+    # Моды только дописывают таблицы, поэтому индексы сохранения верны, пока его таблицы - начало текущих
+    for table, length, digest in zip(content_tables(), stamp[::2], stamp[1::2]):
+        if length > len(table) or table_hash(table[:length]) != digest:
+            return False
+    return True
+
+
+def check_content(stamp):
+    if not content_matches(tuple(stamp)):
+        raise ValueError("Сохранение сделано с другим набором контента (моды изменились)")
+
+
+class SaveWriter:
+    def __init__(self):
+        self.buffer = bytearray()
+
+    def pack(self, record: struct.Struct, *values):
+        self.buffer += record.pack(*values)
+
+    def string(self, value: str):
+        encoded = value.encode("utf-8")
+        self.buffer += U16.pack(len(encoded))
+        self.buffer += encoded
+
+    def code(self, table, value: str):
+        # Значения из статических таблиц пишем индексом, остальные - строкой
+        try:
+            self.buffer += U8.pack(table.index(value))
+        except ValueError:
+            self.buffer += U8.pack(INLINE)
+            self.string(value)
+
+
+class SaveReader:
+    def __init__(self, data):
+        self.data = memoryview(data)
+        self.offset = 0
+
+    def unpack(self, record: struct.Struct):
+        values = record.unpack_from(self.data, self.offset)
+        self.offset += record.size
+        return values
+
+    def count(self):
+        return self.unpack(U16)[0]
+
+    def records(self, record: struct.Struct, count: int):
+        end = self.offset + record.size * count
+        values = record.iter_unpack(self.data[self.offset:end])
+        self.offset = end
+        return values
+
+    def text(self, length: int):
+        value = str(self.data[self.offset:self.offset + length], "utf-8")
+        self.offset += length
+        return value
+
+    def string(self):
+        return self.text(self.count())
+
+    def code(self, table):
+        (index,) = self.unpack(U8)
+        return self.string() if index == INLINE else table[index]
+
+
+def write_item(writer: SaveWriter, item):
+    if item is None:
+        writer.pack(U8, NO_ITEM)
+        return
+
+    if isinstance(item, Weapon):
+        kind = WEAPON_KIND
+    elif isinstance(item, Armor):
+        kind = ARMOR_KIND
+    else:
+        kind = ITEM_KIND
+
+    name = item.name.encode("utf-8")
+    type_index = ITEM_TYPES.index(item.type) if item.type in ITEM_TYPES else INLINE
+    writer.pack(ITEM, kind, type_index, item.value, item.element_id, len(name))
+    writer.buffer += name
+    if type_index == INLINE:
+        writer.string(item.type)
+
+    if kind == WEAPON_KIND:
+        writer.pack(WEAPON, item.durability, item.level, item.crit_chance, item.max_durability)
+    elif kind == ARMOR_KIND:
+        writer.string(item.armor_type)
+        writer.buffer += item.element_resist.tobytes()
+
+
+def read_item(reader: SaveReader):
+    if reader.data[reader.offset] == NO_ITEM:
+        reader.offset += 1
+        return None
+
+    kind, type_index, value, element_id, name_length = reader.unpack(ITEM)
+    name = reader.text(name_length)
+    item_type = reader.string() if type_index == INLINE else ITEM_TYPES[type_index]
+
+    # Конструкторы дописывают к имени префиксы, поэтому собираем объект напрямую
+    cls = Weapon if kind == WEAPON_KIND else Armor if kind == ARMOR_KIND else Item
+    item = cls.__new__(cls)
+    item.name = name
+    item.type = item_type
+    item.value = value
+    item.element_id = element_id
+    item.element = ELEMENTS[element_id] if element_id != NO_ELEMENT else None
+
+    if kind == WEAPON_KIND:
+        item.durability, item.level, item.crit_chance, item.max_durability = reader.unpack(WEAPON)
+    elif kind == ARMOR_KIND:
+        item.armor_type = reader.string()
+        item.element_resist = array("b", bytes(reader.data[reader.offset:reader.offset + len(ELEMENTS)]))
+        reader.offset += len(ELEMENTS)
+    return item
+
+
+def write_state(writer: SaveWriter, player):
+    writer.pack(
+        PLAYER,
+        player.lvl, player.xp, player.xp_to_next, player.hp, player.max_hp, player.mana, player.max_mana,
+        player.power, player.agility, player.wisdom, player.money,
+        player.damage, player.crit_chance, player.crit_multiplier, player.hp_mult, player.mana_mult,
+        player.story_progress,
+    )
+    writer.pack(STAT_VALUES, *(player.stats.get(key, 0) for key in STATS))
+
+
+def read_state(reader: SaveReader, player):
+    (
+        player.lvl, player.xp, player.xp_to_next, player.hp, player.max_hp, player.mana, player.max_mana,
+        player.power, player.agility, player.wisdom, player.money,
+        player.damage, player.crit_chance, player.crit_multiplier, player.hp_mult, player.mana_mult,
+        player.story_progress,
+    ) = reader.unpack(PLAYER)
+    player.stats = dict(zip(STATS, reader.unpack(STAT_VALUES)))
+
+
+def make_quest(index: int, completed: int, progress: int):
+    return Quest(quest_ids()[index], progress, bool(completed))
+
+
+def make_faction(faction: str, relation: int):
+    return {**constants.FRACTIONS.get(faction, {}), "отношение": relation}
+
+
+def encode_player(player):
+    writer = SaveWriter()
+    writer.pack(HEADER, MAGIC, SAVE_VERSION)
+    writer.pack(CONTENT, *content_stamp())
+
+    writer.string(player.name)
+    writer.code(RACES, player.race)
+    writer.code(CLASSES, player.player_class)
+    write_state(writer, player)
+    writer.pack(RNG_STATE, player.rng.seed & 0xFFFFFFFFFFFFFFFF, *player.rng.getstate())
+
+    # Сами способности задаются расой и классом, сохраняем только их текущие значения
+    writer.pack(U16, len(player.passive_abilities))
+    for ability in player.passive_abilities:
+        writer.pack(ABILITY, ability.value)
+
+    for slot in EQUIPMENT_SLOTS:
+        write_item(writer, player.equipment.get(slot))
+
+    writer.pack(U16, len(player.inventory))
+    for item in player.inventory.values():
+        write_item(writer, item)
+
+    writer.pack(U16, len(player.quests))
+    for quest in player.quests.values():
+        writer.pack(QUEST, quest.definition.index, quest.completed, quest.progress)
+
+    writer.pack(U16, len(player.factions))
+    for faction, data in player.factions.items():
+        writer.code(faction_names(), faction)
+        writer.pack(RELATION, data["отношение"])
+
+    writer.pack(U16, len(player.crafting_materials))
+    for material, count in player.crafting_materials.items():
+        writer.code(material_names(), material)
+        writer.pack(MATERIAL, count)
+
+    return bytes(writer.buffer)
+
+
+def decode_player(data, rng: SessionRandom = None):
+    reader = SaveReader(data)
+    magic, version = reader.unpack(HEADER)
+    if magic != MAGIC:
+        raise ValueError("Файл не является сохранением")
+    decoder = DECODERS.get(version)
+    if decoder is None:
+        raise ValueError(f"Неподдерживаемая версия сохранения: {version}")
+    return decoder(reader, rng)
+
+
+def new_player(name: str, race: str, player_class: str):
+    # Быстрый путь: объект собирается напрямую, без Player.__init__ и стартовых квестов
+    player = Player.__new__(Player)
+    player.name = name
+    player.set_origin(race, player_class)
+
+    # Пассивные способности задаются расой и классом, из сохранения берутся только их значения
+    player.lvl = 1
+    player.passive_abilities = []
+    player.apply_race_class_abilities()
+
+    player.element_resistances = resistance_vector()
+    player.enter_terrain(None)
+    player.class_ability_available = True
+    player.negative_effects = StatusEffects()
+    return player
+
+
+def restore_rng(seed: int, states, rng: SessionRandom = None):
+    if rng is None:
+        return SessionRandom.restore(seed, states)
+    rng.setstate(states)
+    return rng
+
+
+def restore_abilities(player, values):
+    # Вызывается после восстановления уровня: от него зависят заклинания
+    for ability, value in zip(player.passive_abilities, values):
+        ability.value = value
+    player.rebuild_modifiers()
+    player.spells = player.get_class_spells()
+
+
+def decode_player_v1(reader: SaveReader, rng: SessionRandom = None):
+    check_content(reader.unpack(CONTENT))
+    player = new_player(reader.string(), reader.code(RACES), reader.code(CLASSES))
+    read_state(reader, player)
+
+    seed, *states = reader.unpack(RNG_STATE)
+    player.rng = restore_rng(seed, states, rng)
+    restore_abilities(player, [value for (value,) in reader.records(ABILITY, reader.count())])
+
+    player.equipment = {}
+    for slot in EQUIPMENT_SLOTS:
+        player.equipment[slot] = read_item(reader)
+
+    player.inventory = {}
+    for _ in range(reader.count()):
+        item = read_item(reader)
+        player.inventory[item.name] = item
+
+    player.quests = {}
+    for index, completed, progress in reader.records(QUEST, reader.count()):
+        quest = make_quest(index, completed, progress)
+        player.quests[quest.id] = quest
+
+    player.factions = {}
+    for _ in range(reader.count()):
+        faction = reader.code(faction_names())
+        (relation,) = reader.unpack(RELATION)
+        player.factions[faction] = make_faction(faction, relation)
+
+    materials = {}
+    for _ in range(reader.count()):
+        material = reader.code(material_names())
+        materials[material] = reader.unpack(MATERIAL)[0]
+    player.set_materials(materials)
+
+    return player
+
+
+DECODERS = {
+    1: decode_player_v1,
+}
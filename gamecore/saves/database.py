@@ -0,0 +1,286 @@
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from functools import partial
+from gamecore.classes import Quest
+from gamecore.saves.catalog import SaveEntry
+from gamecore.saves.journal import capture
+from gamecore.saves.writer import run_now
+from gamecore.saves.codec import (
+    ABILITY, CONTENT, EQUIPMENT_SLOTS, PLAYER_FIELDS, RNG_STATE, STATS, SaveReader, SaveWriter,
+    check_content, content_stamp, make_faction, new_player, read_item, restore_abilities, restore_rng, write_item,
+)
+
+DATABASE_FILE = "saves.db"
+
+# Числовые колонки без объявленного типа: SQLite хранит значения как есть, int не превращается в float
+SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS players (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE,
+    race TEXT NOT NULL,
+    class TEXT NOT NULL,
+    {", ".join(f"{field} NOT NULL" for field in PLAYER_FIELDS)},
+    rng BLOB NOT NULL,
+    abilities BLOB NOT NULL,
+    equipment BLOB NOT NULL,
+    updated REAL NOT NULL,
+    content BLOB NOT NULL
+);
+CREATE INDEX IF NOT EXISTS players_updated ON players (updated);
+CREATE TABLE IF NOT EXISTS inventory (
+    player_id INTEGER NOT NULL REFERENCES players (id) ON DELETE CASCADE,
+    position INTEGER NOT NULL,
+    item BLOB NOT NULL,
+    PRIMARY KEY (player_id, position)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS quests (
+    player_id INTEGER NOT NULL REFERENCES players (id) ON DELETE CASCADE,
+    quest_id TEXT NOT NULL,
+    completed INTEGER NOT NULL,
+    progress INTEGER NOT NULL,
+    PRIMARY KEY (player_id, quest_id)
+);
+CREATE TABLE IF NOT EXISTS stats (
+    player_id INTEGER NOT NULL REFERENCES players (id) ON DELETE CASCADE,
+    key TEXT NOT NULL,
+    value NOT NULL,
+    PRIMARY KEY (player_id, key)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS factions (
+    player_id INTEGER NOT NULL REFERENCES players (id) ON DELETE CASCADE,
+    faction TEXT NOT NULL,
+    relation INTEGER NOT NULL,
+    PRIMARY KEY (player_id, faction)
+);
+CREATE TABLE IF NOT EXISTS materials (
+    player_id INTEGER NOT NULL REFERENCES players (id) ON DELETE CASCADE,
+    material TEXT NOT NULL,
+    count INTEGER NOT NULL,
+    PRIMARY KEY (player_id, material)
+);
+"""
+
+# Тексты запросов постоянные: sqlite3 держит их подготовленными в кэше соединения
+UPSERT_PLAYER = f"""
+INSERT INTO players (name, race, class, {", ".join(PLAYER_FIELDS)}, rng, abilities, equipment, updated, content)
+VALUES (?, ?, ?, {", ".join("?" for _ in PLAYER_FIELDS)}, ?, ?, ?, ?, ?)
+ON CONFLICT (name) DO UPDATE SET
+    race = excluded.race, class = excluded.class,
+    {", ".join(f"{field} = excluded.{field}" for field in PLAYER_FIELDS)},
+    rng = excluded.rng, abilities = excluded.abilities, equipment = excluded.equipment, updated = excluded.updated,
+    content = excluded.content
+"""
+SELECT_PLAYER_ID = "SELECT id FROM players WHERE name = ?"
+SELECT_PLAYER = f"SELECT id, name, race, class, {', '.join(PLAYER_FIELDS)}, rng, abilities, equipment, content FROM players WHERE name = ?"
+SELECT_ENTRIES = "SELECT name, race, class, lvl, story_progress, updated FROM players ORDER BY updated DESC LIMIT ?"
+CHILD_TABLES = ("inventory", "quests", "stats", "factions", "materials")
+DELETE_CHILDREN = {table: f"DELETE FROM {table} WHERE player_id = ?" for table in CHILD_TABLES}
+INSERT_CHILDREN = {
+    "inventory": "INSERT INTO inventory (player_id, position, item) VALUES (?, ?, ?)",
+    "quests": "INSERT INTO quests (player_id, quest_id, completed, progress) VALUES (?, ?, ?, ?)",
+    "stats": "INSERT INTO stats (player_id, key, value) VALUES (?, ?, ?)",
+    "factions": "INSERT INTO factions (player_id, faction, relation) VALUES (?, ?, ?)",
+    "materials": "INSERT INTO materials (player_id, material, count) VALUES (?, ?, ?)",
+}
+SELECT_INVENTORY = "SELECT item FROM inventory WHERE player_id = ? ORDER BY position"
+SELECT_QUESTS = "SELECT quest_id, completed, progress FROM quests WHERE player_id = ? ORDER BY rowid"
+SELECT_STATS = "SELECT key, value FROM stats WHERE player_id = ?"
+SELECT_FACTIONS = "SELECT faction, relation FROM factions WHERE player_id = ? ORDER BY rowid"
+SELECT_MATERIALS = "SELECT material, count FROM materials WHERE player_id = ? ORDER BY rowid"
+
+
+def encode_items(items):
+    writer = SaveWriter()
+    for item in items:
+        write_item(writer, item)
+    return bytes(writer.buffer)
+
+
+def player_rows(player, updated: float):
+    # Снимок игрока в виде готовых строк; id игрока подставляется при записи
+    writer = SaveWriter()
+    writer.pack(RNG_STATE, player.rng.seed & 0xFFFFFFFFFFFFFFFF, *player.rng.getstate())
+    abilities = b"".join(ABILITY.pack(ability.value) for ability in player.passive_abilities)
+    row = (
+        player.name, player.race, player.player_class,
+        *(getattr(player, field) for field in PLAYER_FIELDS),
+        bytes(writer.buffer), abilities,
+        encode_items(player.equipment.get(slot) for slot in EQUIPMENT_SLOTS),
+        updated,
+        # Предметы и способности записаны индексами таблиц контента
+        CONTENT.pack(*content_stamp()),
+    )
+    children = {
+        "inventory": [(position, encode_items([item])) for position, item in enumerate(player.inventory.values())],
+        "quests": [(quest.id, quest.completed, quest.progress) for quest in player.quests.values()],
+        "stats": list(player.stats.items()),
+        "factions": [(faction, data["отношение"]) for faction, data in player.factions.items()],
+        "materials": list(player.crafting_materials.items()),
+    }
+    return row, children
+
+
+class SqliteSaveStore:
+    # Все персонажи в одной базе: строка на игрока и дочерние таблицы для коллекций.
+    # WAL позволяет читать список сохранений, пока другой процесс пишет
+    def __init__(self, path: str, writer=None):
+        directory = os.path.dirname(path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory)
+        self.path = path
+        # Транзакции открываются явно в transaction()
+        self.db = sqlite3.connect(path, isolation_level=None, check_same_thread=False)
+        self.db.execute("PRAGMA journal_mode = WAL")
+        self.db.execute("PRAGMA synchronous = NORMAL")
+        self.db.execute("PRAGMA foreign_keys = ON")
+        self.db.executescript(SCHEMA)
+        self.depth = 0
+        # Соединение общее для игрового цикла и фоновой записи
+        self.lock = threading.RLock()
+        self.writer = writer
+
+    @contextmanager
+    def transaction(self):
+        # Вложенные вызовы входят во внешнюю транзакцию: обмен между игроками
+        # или сохранение группы фиксируются целиком или не фиксируются вовсе
+        with self.lock:
+            if self.depth == 0:
+                self.db.execute("BEGIN IMMEDIATE")
+            self.depth += 1
+            try:
+                yield self
+            except BaseException:
+                self.depth -= 1
+                if self.depth == 0:
+                    self.db.execute("ROLLBACK")
+                raise
+            self.depth -= 1
+            if self.depth == 0:
+                self.db.execute("COMMIT")
+
+    def save(self, player):
+        self.save_many([player])
+        return self.path
+
+    def save_many(self, players):
+        updated = time.time()
+        return self.write_rows([player_rows(player, updated) for player in players])
+
+    def submit(self, player):
+        # Строки собираются сразу, запись в базу - в фоне; повторные сохранения игрока склеиваются
+        job = partial(self.write_rows, [player_rows(player, time.time())])
+        if self.writer is None:
+            return run_now(job)
+        return self.writer.submit(player.name, job)
+
+    def write_rows(self, snapshots):
+        with self.transaction():
+            # Сначала строки игроков, затем все дочерние записи пачками через executemany
+            self.db.executemany(UPSERT_PLAYER, [row for row, _ in snapshots])
+            ids = [self.db.execute(SELECT_PLAYER_ID, (row[0],)).fetchone()[0] for row, _ in snapshots]
+
+            for table in CHILD_TABLES:
+                self.db.executemany(DELETE_CHILDREN[table], [(player_id,) for player_id in ids])
+                self.db.executemany(INSERT_CHILDREN[table], [
+                    (player_id, *values)
+                    for player_id, (_, children) in zip(ids, snapshots)
+                    for values in children[table]
+                ])
+        return self.path
+
+    def load(self, entry: SaveEntry, rng=None):
+        return self.load_player(entry.name, rng)
+
+    def load_player(self, name: str, rng=None):
+        with self.lock:
+            return self.read_player(name, rng)
+
+    def read_player(self, name: str, rng=None):
+        row = self.db.execute(SELECT_PLAYER, (name,)).fetchone()
+        if row is None:
+            raise KeyError(name)
+
+        player_id, name, race, player_class, *values = row
+        rng_state, abilities, equipment, content = values[len(PLAYER_FIELDS):]
+        check_content(CONTENT.unpack(content))
+        player = new_player(name, race, player_class)
+        for field, value in zip(PLAYER_FIELDS, values):
+            setattr(player, field, value)
+
+        seed, *states = RNG_STATE.unpack(rng_state)
+        player.rng = restore_rng(seed, states, rng)
+        restore_abilities(player, [value for (value,) in ABILITY.iter_unpack(abilities)])
+
+        reader = SaveReader(equipment)
+        player.equipment = {slot: read_item(reader) for slot in EQUIPMENT_SLOTS}
+
+        player.inventory = {}
+        for (data,) in self.db.execute(SELECT_INVENTORY, (player_id,)):
+            item = read_item(SaveReader(data))
+            player.inventory[item.name] = item
+
+        player.quests = {}
+        for quest_id, completed, progress in self.db.execute(SELECT_QUESTS, (player_id,)):
+            player.quests[quest_id] = Quest(quest_id, progress, bool(completed))
+
+        stats = dict(self.db.execute(SELECT_STATS, (player_id,)))
+        player.stats = {key: stats.get(key, 0) for key in STATS}
+        player.factions = {
+            faction: make_faction(faction, relation) for faction, relation in self.db.execute(SELECT_FACTIONS, (player_id,))
+        }
+        player.set_materials(dict(self.db.execute(SELECT_MATERIALS, (player_id,))))
+        return player
+
+    def exists(self, name: str):
+        with self.lock:
+            return self.db.execute(SELECT_PLAYER_ID, (name,)).fetchone() is not None
+
+    def entries(self, limit: int = -1):
+        with self.lock:
+            rows = self.db.execute(SELECT_ENTRIES, (limit,)).fetchall()
+        return [
+            SaveEntry(name, race, player_class, lvl, story_progress, updated, self.path)
+            for name, race, player_class, lvl, story_progress, updated in rows
+        ]
+
+    def autosaver(self, player):
+        return DatabaseAutosave(self, player)
+
+    def close(self):
+        self.db.close()
+
+
+class DatabaseAutosave:
+    # Аналог SaveJournal для базы: после хода строка игрока перезаписывается, только если что-то изменилось
+    def __init__(self, store: SqliteSaveStore, player):
+        self.store = store
+        self.player = player
+        # Первая запись - на первом ходе, как у SaveJournal
+        self.shadow = None
+        self.pending = None
+
+    def autosave(self):
+        current = capture(self.player)
+        if current == self.shadow:
+            return 0
+        self.shadow = current
+        self.submit()
+        return 1
+
+    def compact(self):
+        self.shadow = capture(self.player)
+        return self.submit()
+
+    def submit(self):
+        # Ошибка предыдущей фоновой записи всплывает в игровом цикле
+        if self.pending is not None and self.pending.done():
+            self.pending.result()
+        self.pending = self.store.submit(self.player)
+        return self.pending
+
+    def close(self):
+        if self.pending is not None:
+            self.pending.result()
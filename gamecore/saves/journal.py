@@ -0,0 +1,290 @@
+import os
+import struct
+import zlib
+from functools import partial
+from gamecore.saves.codec import (
+    ABILITY, CONTENT, EQUIPMENT_SLOTS, MATERIAL, QUEST, RELATION, U8, U16,
+    SaveReader, SaveWriter, check_content, content_stamp, encode_player, faction_names, material_names, make_faction, make_quest, read_item, read_state, write_item, write_state,
+)
+from gamecore.saves.catalog import get_catalog
+from gamecore.saves.store import SAVES_DIR, save_path, write_atomic
+from gamecore.saves.writer import run_now
+from gamecore.quests import get_quest
+from gamecore.rng import STREAMS
+
+JOURNAL_MAGIC = b"ZJRN"
+JOURNAL_VERSION = 1
+JOURNAL_EXTENSION = ".journal"
+# magic, version, crc32 снимка, к которому относится журнал; за ним - таблицы контента (CONTENT)
+JOURNAL_HEADER = struct.Struct("<4sHI")
+# длина и crc32 записи; запись - набор операций одного хода
+FRAME = struct.Struct("<II")
+RNG_STREAMS = struct.Struct(f"<{len(STREAMS)}Q")
+
+# Все операции - "установить значение", поэтому повторное применение ничего не ломает
+OP_STATE, OP_RNG, OP_ABILITIES, OP_EQUIP, OP_PUT, OP_DROP, OP_QUEST, OP_FACTION, OP_MATERIAL = range(9)
+
+COMPACT_EVERY = 50
+JOURNAL_LIMIT = 64 * 1024
+
+
+def journal_path(snapshot_path: str):
+    return os.path.splitext(snapshot_path)[0] + JOURNAL_EXTENSION
+
+
+def encode_item(item):
+    writer = SaveWriter()
+    write_item(writer, item)
+    return bytes(writer.buffer)
+
+
+def capture(player):
+    # Теневая копия в виде уже закодированных значений: сравнение и запись без лишних преобразований
+    writer = SaveWriter()
+    write_state(writer, player)
+    return {
+        "state": bytes(writer.buffer),
+        "rng": player.rng.getstate(),
+        "abilities": tuple(ability.value for ability in player.passive_abilities),
+        "equipment": {slot: encode_item(player.equipment.get(slot)) for slot in EQUIPMENT_SLOTS},
+        "inventory": {name: encode_item(item) for name, item in player.inventory.items()},
+        "quests": {quest_id: (quest.completed, quest.progress) for quest_id, quest in player.quests.items()},
+        "factions": {faction: data["отношение"] for faction, data in player.factions.items()},
+        "materials": dict(player.crafting_materials),
+    }
+
+
+def diff(shadow, current):
+    writer = SaveWriter()
+
+    if current["state"] != shadow["state"]:
+        writer.pack(U8, OP_STATE)
+        writer.buffer += current["state"]
+
+    if current["rng"] != shadow["rng"]:
+        writer.pack(U8, OP_RNG)
+        writer.pack(RNG_STREAMS, *current["rng"])
+
+    if current["abilities"] != shadow["abilities"]:
+        writer.pack(U8, OP_ABILITIES)
+        writer.pack(U16, len(current["abilities"]))
+        for value in current["abilities"]:
+            writer.pack(ABILITY, value)
+
+    for index, slot in enumerate(EQUIPMENT_SLOTS):
+        encoded = current["equipment"][slot]
+        if encoded != shadow["equipment"][slot]:
+            writer.pack(U8, OP_EQUIP)
+            writer.pack(U8, index)
+            writer.buffer += encoded
+
+    for name in shadow["inventory"].keys() - current["inventory"].keys():
+        writer.pack(U8, OP_DROP)
+        writer.string(name)
+    for name, encoded in current["inventory"].items():
+        if shadow["inventory"].get(name) != encoded:
+            writer.pack(U8, OP_PUT)
+            writer.buffer += encoded
+
+    for quest_id, (completed, progress) in current["quests"].items():
+        if shadow["quests"].get(quest_id) != (completed, progress):
+            writer.pack(U8, OP_QUEST)
+            writer.pack(QUEST, get_quest(quest_id).index, completed, progress)
+
+    for faction, relation in current["factions"].items():
+        if shadow["factions"].get(faction) != relation:
+            writer.pack(U8, OP_FACTION)
+            writer.code(faction_names(), faction)
+            writer.pack(RELATION, relation)
+
+    # Нулевое количество означает, что материал закончился
+    materials = current["materials"]
+    for material in shadow["materials"].keys() | materials.keys():
+        count = materials.get(material, 0)
+        if shadow["materials"].get(material, 0) != count:
+            writer.pack(U8, OP_MATERIAL)
+            writer.code(material_names(), material)
+            writer.pack(MATERIAL, count)
+
+    return bytes(writer.buffer)
+
+
+def apply_frame(player, payload):
+    reader = SaveReader(payload)
+    while reader.offset < len(payload):
+        (op,) = reader.unpack(U8)
+        if op == OP_STATE:
+            read_state(reader, player)
+        elif op == OP_RNG:
+            player.rng.setstate(reader.unpack(RNG_STREAMS))
+        elif op == OP_ABILITIES:
+            for ability, (value,) in zip(player.passive_abilities, reader.records(ABILITY, reader.count())):
+                ability.value = value
+            player.rebuild_modifiers()
+        elif op == OP_EQUIP:
+            (index,) = reader.unpack(U8)
+            player.equipment[EQUIPMENT_SLOTS[index]] = read_item(reader)
+        elif op == OP_PUT:
+            item = read_item(reader)
+            player.inventory[item.name] = item
+        elif op == OP_DROP:
+            player.inventory.pop(reader.string(), None)
+        elif op == OP_QUEST:
+            quest = make_quest(*reader.unpack(QUEST))
+            player.quests[quest.id] = quest
+        elif op == OP_FACTION:
+            faction = reader.code(faction_names())
+            (relation,) = reader.unpack(RELATION)
+            player.factions[faction] = make_faction(faction, relation)
+        elif op == OP_MATERIAL:
+            material = reader.code(material_names())
+            (count,) = reader.unpack(MATERIAL)
+            player.set_material(material, count)
+        else:
+            raise ValueError(f"Неизвестная операция журнала: {op}")
+
+
+def read_frames(data, snapshot_crc: int):
+    offset = JOURNAL_HEADER.size + CONTENT.size
+    if len(data) < offset:
+        return
+    # Журнал от другого снимка (сбой между записью снимка и журнала) уже учтен в снимке
+    if JOURNAL_HEADER.unpack_from(data, 0) != (JOURNAL_MAGIC, JOURNAL_VERSION, snapshot_crc):
+        return
+    check_content(CONTENT.unpack_from(data, JOURNAL_HEADER.size))
+
+    while offset + FRAME.size <= len(data):
+        length, crc = FRAME.unpack_from(data, offset)
+        start = offset + FRAME.size
+        payload = data[start:start + length]
+        # Оборванная или испорченная запись - последний ход, который не успел сохраниться
+        if len(payload) < length or zlib.crc32(payload) != crc:
+            return
+        yield payload
+        offset = start + length
+
+
+def replay_journal(player, snapshot, path: str):
+    try:
+        with open(path, "rb") as f:
+            data = f.read()
+    except FileNotFoundError:
+        return 0
+
+    frames = 0
+    for payload in read_frames(data, zlib.crc32(snapshot)):
+        apply_frame(player, payload)
+        frames += 1
+    if frames:
+        # Уровень мог вырасти после снимка, а от него зависят заклинания; пересчет один на весь журнал
+        player.spells = player.get_class_spells()
+    return frames
+
+
+class SaveJournal:
+    def __init__(self, player, directory: str = SAVES_DIR, compact_every: int = COMPACT_EVERY,
+                 journal_limit: int = JOURNAL_LIMIT, writer=None):
+        self.player = player
+        self.directory = directory
+        self.compact_every = compact_every
+        self.journal_limit = journal_limit
+        self.writer = writer
+        self.path = save_path(player.name, directory)
+        self.journal_path = journal_path(self.path)
+        self.file = None
+        self.frames = 0
+        self.size = 0
+        self.shadow = None
+        # Сжатие, которое еще пишется в фоне, и записи ходов, сделанных за это время
+        self.pending = None
+        self.backlog = []
+
+    def autosave(self):
+        # Первый снимок пишется после первого хода, а не при открытии игры:
+        # создание персонажа само по себе не трогает существующее сохранение
+        if self.shadow is None:
+            self.compact()
+            return 0
+
+        # Пишется только то, что изменилось за ход
+        current = capture(self.player)
+        payload = diff(self.shadow, current)
+        self.shadow = current
+        if not payload:
+            return 0
+
+        frame = FRAME.pack(len(payload), zlib.crc32(payload)) + payload
+        self.frames += 1
+        self.size += len(frame)
+
+        if self.frames >= self.compact_every or self.size >= self.journal_limit:
+            self.compact()
+        elif self.reopen():
+            self.file.write(frame)
+            self.file.flush()
+            # Время последней игры - это время последней записи в журнал
+            get_catalog(self.directory).update(self.player, self.path, os.fstat(self.file.fileno()).st_mtime_ns)
+        else:
+            self.backlog.append(frame)
+        return len(payload)
+
+    def reopen(self):
+        # Новый журнал появляется только вместе со снимком; до этого ходы копятся в памяти,
+        # а на диске остается прежняя согласованная пара снимок + журнал
+        if self.file is not None:
+            return True
+        if self.pending is not None:
+            if not self.pending.done():
+                return False
+            pending, self.pending = self.pending, None
+            pending.result()
+
+        self.file = open(self.journal_path, "ab")
+        for frame in self.backlog:
+            self.file.write(frame)
+        self.backlog = []
+        self.file.flush()
+        return True
+
+    def compact(self):
+        # Кодирование - на вызывающем потоке, чтобы снимок был согласован; запись на диск -
+        # в фоне, если есть writer. Возвращает Future с путем к снимку
+        snapshot = encode_player(self.player)
+        info = (self.player.name, self.player.race, self.player.player_class, self.player.lvl, self.player.story_progress)
+        # Накопленные ходы уже вошли в новый снимок
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+        self.backlog = []
+        self.frames = 0
+        self.size = 0
+        self.shadow = capture(self.player)
+
+        job = partial(self.write_snapshot, snapshot, info)
+        if self.writer is None:
+            self.pending = run_now(job)
+            self.reopen()
+        else:
+            # Повторные сжатия, пока запись не началась, склеиваются в одно
+            self.pending = self.writer.submit(self.path, job)
+        return self.pending
+
+    def write_snapshot(self, snapshot, info):
+        # Снимок и новый журнал заменяются атомарно; после сбоя между ними
+        # старый журнал не совпадет по crc с новым снимком и будет пропущен
+        if not os.path.exists(self.directory):
+            os.makedirs(self.directory)
+        write_atomic(self.path, snapshot)
+        header = JOURNAL_HEADER.pack(JOURNAL_MAGIC, JOURNAL_VERSION, zlib.crc32(snapshot)) + CONTENT.pack(*content_stamp())
+        write_atomic(self.journal_path, header)
+        get_catalog(self.directory).put(self.path, *info)
+        return self.path
+
+    def close(self):
+        # Дожидаемся фонового сжатия и дописываем накопленные ходы
+        if self.file is None and self.pending is not None:
+            self.pending.result()
+            self.reopen()
+        if self.file is not None:
+            self.file.close()
+            self.file = None
@@ -0,0 +1,52 @@
+import json
+from gamecore import constants
+from gamecore.classes import Player, Item, Weapon, Armor, Quest
+
+
+def load_json_save(path: str, rng=None):
+    # Старый формат: JSON с полными описаниями квестов, типы предметов угадываются по названию
+    with open(path, "r") as f:
+        data = json.load(f)
+
+    player = Player(data["name"], data["race"], data["class"], rng=rng)
+
+    player.lvl = data["lvl"]
+    player.xp = data["xp"]
+    player.xp_to_next = data["xp_to_next"]
+    player.hp = data["hp"]
+    player.max_hp = data["max_hp"]
+    player.mana = data["mana"]
+    player.max_mana = data["max_mana"]
+    player.power = data["power"]
+    player.agility = data["agility"]
+    player.wisdom = data["wisdom"]
+    player.money = data["money"]
+    player.story_progress = data.get("story_progress", 0)
+    player.factions = data.get("factions", constants.FRACTIONS.copy())
+    player.set_materials(data.get("crafting_materials", {}))
+    player.stats = data.get("stats", {
+        "enemies_killed": 0,
+        "quests_completed": 0,
+        "gold_earned": 0,
+        "damage_dealt": 0,
+    })
+
+    if data["weapon"]:
+        player.equipment["weapon"] = Weapon(data["weapon"], 10)
+    if data["armor"]:
+        player.equipment["armor"] = Armor(data["armor"], 5, "armor")
+
+    for item_name in data.get("inventory", []):
+        if "Зелье" in item_name:
+            player.inventory[item_name] = Item(item_name, "consumable", player.rng.loot.randint(20, 50))
+        elif any(x in item_name for x in ["меч", "топор", "щит"]):
+            player.inventory[item_name] = Weapon(item_name, player.rng.loot.randint(5, 15))
+        else:
+            player.inventory[item_name] = Item(item_name, "armor", player.rng.loot.randint(3, 10))
+
+    for qid, qdata in data.get("quests", {}).items():
+        if qid in constants.QUESTS:
+            quest = Quest.from_dict(qdata, qid)
+            player.quests[qid] = quest
+
+    return player
@@ -0,0 +1,62 @@
+import os
+from gamecore.saves.codec import SAVE_EXTENSION, decode_player, encode_player
+from gamecore.saves.legacy import load_json_save
+
+SAVES_DIR = "saves"
+LEGACY_EXTENSION = ".json"
+
+
+def save_name(player_name: str):
+    return player_name.lower().replace(" ", "_")
+
+
+def save_path(player_name: str, directory: str = SAVES_DIR):
+    return os.path.join(directory, save_name(player_name) + SAVE_EXTENSION)
+
+
+def write_atomic(path: str, data: bytes):
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+def write_save(player, directory: str = SAVES_DIR):
+    if not os.path.exists(directory):
+        os.makedirs(directory)
+
+    path = save_path(player.name, directory)
+    write_atomic(path, encode_player(player))
+
+    from gamecore.saves.catalog import get_catalog
+    get_catalog(directory).update(player, path)
+    return path
+
+
+def list_saves(directory: str = SAVES_DIR):
+    if not os.path.exists(directory):
+        return []
+
+    # Если персонаж уже пересохранен в новом формате, старый JSON не показываем
+    saves = {}
+    for filename in sorted(os.listdir(directory)):
+        name, extension = os.path.splitext(filename)
+        if extension == SAVE_EXTENSION or (extension == LEGACY_EXTENSION and name not in saves):
+            saves[name] = os.path.join(directory, filename)
+    return list(saves.values())
+
+
+def read_save(path: str, rng=None):
+    if path.endswith(LEGACY_EXTENSION):
+        return load_json_save(path, rng)
+
+    with open(path, "rb") as f:
+        snapshot = f.read()
+    player = decode_player(snapshot, rng)
+
+    # Ходы после последнего снимка досчитываются из журнала автосохранений
+    from gamecore.saves.journal import journal_path, replay_journal
+    replay_journal(player, snapshot, journal_path(path))
+    return player
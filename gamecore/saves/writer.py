@@ -0,0 +1,80 @@
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
+
+
+def run_now(job):
+    # Синхронный путь с тем же интерфейсом, что и у фоновой записи
+    future = Future()
+    future.set_running_or_notify_cancel()
+    try:
+        future.set_result(job())
+    except BaseException as e:
+        future.set_exception(e)
+    return future
+
+
+class BackgroundSaver(threading.Thread):
+    # Запись сохранений вне игрового цикла. Задания с одинаковым ключом (персонаж) склеиваются:
+    # пока запись не началась, в очереди остается только последний снимок, а вызывающие
+    # получают один и тот же Future. Очередь ограничена: при переполнении submit ждет
+    def __init__(self, max_pending: int = 16):
+        super().__init__(name="save-writer", daemon=True)
+        self.max_pending = max_pending
+        self.jobs = OrderedDict()
+        self.condition = threading.Condition()
+        self.busy = False
+        self.closed = False
+        self.start()
+
+    def submit(self, key, job):
+        with self.condition:
+            while True:
+                if self.closed:
+                    raise RuntimeError("Запись сохранений остановлена")
+                pending = self.jobs.get(key)
+                if pending is not None:
+                    # Место в очереди сохраняется, снимок заменяется более новым
+                    self.jobs[key] = (job, pending[1])
+                    return pending[1]
+                if len(self.jobs) < self.max_pending:
+                    break
+                self.condition.wait()
+
+            future = Future()
+            self.jobs[key] = (job, future)
+            self.condition.notify_all()
+            return future
+
+    def run(self):
+        while True:
+            with self.condition:
+                while not self.jobs and not self.closed:
+                    self.condition.wait()
+                if not self.jobs:
+                    return
+                _, (job, future) = self.jobs.popitem(last=False)
+                self.busy = True
+                self.condition.notify_all()
+
+            if future.set_running_or_notify_cancel():
+                try:
+                    future.set_result(job())
+                except BaseException as e:
+                    future.set_exception(e)
+
+            with self.condition:
+                self.busy = False
+                self.condition.notify_all()
+
+    def flush(self):
+        with self.condition:
+            while self.jobs or self.busy:
+                self.condition.wait()
+
+    def close(self):
+        # Все принятые задания дописываются до остановки потока
+        with self.condition:
+            self.closed = True
+            self.condition.notify_all()
+        self.join()
@@ -0,0 +1,239 @@
+from dataclasses import dataclass
+import numpy as np
+from gamecore.constants import DAMAGE_MULTIPLIER, ELEMENTS, TERRAINS, EFFECTS
+from gamecore.bestiary import ENEMY_ABILITIES, RESISTANCE_ROLLS, get_archetype, max_danger_level, terrain_modifiers_by_id
+from gamecore.effects import DEFAULT_EFFECT, stack_limit
+from gamecore.elements import DAMAGE_MULTIPLIERS, NO_ELEMENT, RESIST_OFFSET
+from gamecore.ids import HOBBIT, ORC, TERRAIN_IDS
+
+DEFEAT, VICTORY, DRAW = 0, 1, 2
+
+FIRE_BREATH, POISON_CLOUD, SUMMON_SKELETON, LIFE_DRAIN = range(len(ENEMY_ABILITIES))
+NO_ABILITY = -1
+
+POISON = EFFECTS.get("Яд", DEFAULT_EFFECT)
+POISON_MAX_STACKS = stack_limit(POISON)
+
+ELEMENT_MULT = np.array(DAMAGE_MULTIPLIERS)
+RESISTANCE_VALUES = np.array(RESISTANCE_ROLLS, dtype=np.int8)
+
+# Модификаторы по ID местности, без последнего элемента для NO_ID
+TERRAIN_MODIFIERS = terrain_modifiers_by_id()[:len(TERRAINS)]
+TERRAIN_DAMAGE_MULT = np.array([damage_mult or 1.0 for damage_mult, _ in TERRAIN_MODIFIERS])
+TERRAIN_HP_MULT = np.array([hp_mult or 1.0 for _, hp_mult in TERRAIN_MODIFIERS])
+TERRAIN_HAS_DAMAGE = np.array([damage_mult is not None for damage_mult, _ in TERRAIN_MODIFIERS])
+TERRAIN_HAS_HP = np.array([hp_mult is not None for _, hp_mult in TERRAIN_MODIFIERS])
+
+
+@dataclass
+class SimulationResult:
+    outcome: np.ndarray
+    turns: np.ndarray
+    player_hp: np.ndarray
+    enemy_hp: np.ndarray
+    loot: np.ndarray
+    terrain: np.ndarray
+
+    def __len__(self):
+        return len(self.outcome)
+
+    def subset(self, mask):
+        return SimulationResult(
+            self.outcome[mask],
+            self.turns[mask],
+            self.player_hp[mask],
+            self.enemy_hp[mask],
+            self.loot[mask],
+            self.terrain[mask],
+        )
+
+    @property
+    def won(self):
+        return self.outcome == VICTORY
+
+    @property
+    def win_rate(self):
+        return float(self.won.mean()) if len(self) else 0.0
+
+    @property
+    def mean_turns_to_kill(self):
+        won = self.won
+        return float(self.turns[won].mean()) if won.any() else float("nan")
+
+    @property
+    def mean_hp_remaining(self):
+        won = self.won
+        return float(self.player_hp[won].mean()) if won.any() else 0.0
+
+
+def round_values(values):
+    return np.round(values, 2)
+
+
+def spawn_enemies(rng, lvl: int, name: str, n: int, terrain: str = None, terrain_idx=None):
+    if terrain_idx is None:
+        if terrain is None:
+            terrain_idx = rng.integers(0, len(TERRAINS), n)
+        else:
+            terrain_idx = np.full(n, TERRAIN_IDS[terrain])
+
+    danger = rng.integers(1, max_danger_level(lvl) + 1, n)
+    max_hp = np.maximum(50, rng.integers(15, 61, n) * lvl * danger * DAMAGE_MULTIPLIER)
+    damage = np.maximum(3, rng.integers(3, 26, n) * lvl * danger * DAMAGE_MULTIPLIER)
+
+    damage = np.where(TERRAIN_HAS_DAMAGE[terrain_idx], round_values(damage * TERRAIN_DAMAGE_MULT[terrain_idx]), damage)
+    hp = np.where(TERRAIN_HAS_HP[terrain_idx], round_values(max_hp * TERRAIN_HP_MULT[terrain_idx]), max_hp)
+
+    resistances = rng.choice(RESISTANCE_VALUES, (n, len(ELEMENTS)))
+    table, counts = ability_table(name)
+
+    return {
+        "terrain": terrain_idx,
+        "danger": danger,
+        "max_hp": max_hp,
+        "hp": hp,
+        "damage": damage,
+        "abilities": table[danger],
+        "ability_count": counts[danger],
+        "resistances": resistances,
+    }
+
+
+def ability_table(name: str):
+    # Строка на каждый уровень опасности из каталога архетипов, как Enemy.abilities
+    archetype = get_archetype(name)
+    table = np.full((len(archetype.abilities), len(ENEMY_ABILITIES)), NO_ABILITY, dtype=np.int8)
+    counts = np.zeros(len(archetype.abilities), dtype=np.int8)
+    for danger_level, abilities in enumerate(archetype.abilities):
+        for slot, ability in enumerate(abilities):
+            table[danger_level, slot] = ENEMY_ABILITIES.index(ability)
+        counts[danger_level] = len(abilities)
+    return table, counts
+
+
+def player_take_damage(hp, damage, reduction):
+    damage = np.maximum(1, damage * (1 - reduction))
+    return round_values(np.maximum(0, hp - damage))
+
+
+def simulate_battles(player, enemy_name: str, n: int, terrain: str = None, seed: int = None, rng=None, max_turns: int = 200, terrain_idx=None):
+    rng = rng or np.random.default_rng(seed)
+    lvl = player.lvl
+    enemies = spawn_enemies(rng, lvl, enemy_name, n, terrain, terrain_idx)
+
+    weapon = player.equipment["weapon"]
+    reduction = player.get_modifier("damage_reduction")
+    dodge_chance = player.get_modifier("dodge_chance") * 100
+    fortitude = None
+    if "health_fortitude" in player.modifiers:
+        fortitude = player.modifier_sources["health_fortitude"].value * lvl
+
+    loot = np.maximum(10, (enemies["hp"] * (lvl * enemies["danger"])) / 8)
+    if player.race_id == HOBBIT:
+        loot *= 1.3
+
+    enemy_hp = enemies["hp"].astype(float)
+    if player.race_id == ORC:
+        enemy_hp -= enemy_hp * 0.05
+    enemy_max_hp = enemies["max_hp"]
+    enemy_damage = enemies["damage"]
+    abilities = enemies["abilities"]
+    ability_count = enemies["ability_count"]
+
+    if weapon.element_id != NO_ELEMENT:
+        element_mod = ELEMENT_MULT[enemies["resistances"][:, weapon.element_id].astype(np.int64) + RESIST_OFFSET]
+    else:
+        element_mod = np.ones(n)
+
+    player_hp = np.full(n, float(player.hp))
+    weapon_value = np.full(n, float(weapon.value))
+    durability = np.full(n, float(weapon.durability))
+    has_fortitude = np.full(n, fortitude is not None)
+    poison_stacks = np.zeros(n, dtype=np.int64)
+    poison_expires = np.zeros(n, dtype=np.int64)
+
+    outcome = np.full(n, DRAW, dtype=np.int8)
+    turns = np.zeros(n, dtype=np.int64)
+    active = np.arange(n)
+
+    for turn in range(max_turns + 1):
+        if not len(active):
+            break
+
+        hp = player_hp[active]
+        dead = hp <= 0
+        if dead.any():
+            revive = dead & has_fortitude[active]
+            player_hp[active[revive]] = fortitude
+            has_fortitude[active[revive]] = False
+            lost = dead & ~revive
+            outcome[active[lost]] = DEFEAT
+            active = active[~lost]
+
+        if turn == max_turns:
+            break
+
+        m = len(active)
+        turns[active] += 1
+
+        # Ход игрока: Player.calc_damage + модификатор стихии + Weapon.use
+        base = player.power + weapon_value[active]
+        crit = rng.integers(1, 101, m) <= player.crit_chance * 100
+        damage = np.where(crit, round_values(base * player.crit_multiplier), round_values(base)) * element_mod[active]
+        e_hp = round_values(np.maximum(0, enemy_hp[active] - damage))
+
+        wear = np.maximum(0, durability[active] - rng.integers(1, 4, m))
+        durability[active] = wear
+        weapon_value[active] = np.maximum(1, weapon_value[active] * (wear / 100))
+
+        # Ход врага: Enemy.choose_action / damage_attack / use_ability
+        p_hp = player_hp[active]
+        e_damage = enemy_damage[active]
+        count = ability_count[active]
+        use_ability = (count > 0) & (rng.integers(1, 101, m) > 60)
+
+        low = np.floor(e_damage * 0.8)
+        high = np.floor(e_damage * 1.2)
+        hit = np.floor(low + rng.random(m) * (high - low + 1))
+        enemy_crit = rng.integers(1, 101, m) <= 10
+        hit = np.where(enemy_crit, round_values(hit * 1.5), hit)
+        dodged = rng.integers(1, 101, m) <= dodge_chance
+        attack = ~use_ability & ~dodged
+        p_hp = np.where(attack, player_take_damage(p_hp, hit, reduction), p_hp)
+
+        slot = np.floor(rng.random(m) * np.maximum(count, 1)).astype(np.int64)
+        ability = np.where(use_ability, abilities[active, slot], NO_ABILITY)
+
+        breath = ability == FIRE_BREATH
+        p_hp = np.where(breath, player_take_damage(p_hp, e_damage * 1.8, reduction), p_hp)
+
+        # StatusEffects.apply: стак до POISON_MAX_STACKS и обновление длительности
+        poisoned = ability == POISON_CLOUD
+        if poisoned.any():
+            target = active[poisoned]
+            poison_stacks[target] = np.minimum(POISON_MAX_STACKS, poison_stacks[target] + 1)
+            poison_expires[target] = turns[target] - 1 + POISON["duration"]
+
+        e_hp = np.where(ability == SUMMON_SKELETON, e_hp + enemy_max_hp[active] * 0.2, e_hp)
+
+        drain = ability == LIFE_DRAIN
+        drained = p_hp * 0.15
+        p_hp = np.where(drain, player_take_damage(p_hp, drained, reduction), p_hp)
+        e_hp = np.where(drain, round_values(np.minimum(enemy_max_hp[active], e_hp + drained)), e_hp)
+
+        # Тик яда: damage * stacks * randint(80, 120) / 100, затем истечение
+        stacks = poison_stacks[active]
+        if stacks.any():
+            rolls = rng.integers(80, 121, m)
+            e_hp = round_values(np.maximum(0, e_hp - e_damage * 0.15 * stacks * rolls / 100))
+            expired = active[(stacks > 0) & (poison_expires[active] <= turns[active])]
+            poison_stacks[expired] = 0
+
+        player_hp[active] = p_hp
+        enemy_hp[active] = e_hp
+
+        won = e_hp <= 0
+        outcome[active[won]] = VICTORY
+        active = active[~won]
+
+    return SimulationResult(outcome, turns, player_hp, enemy_hp, loot, enemies["terrain"])
@@ -1,12 +1,18 @@
-import os
 from rich.panel import Panel
-from rich import print
+from gamecore.output import print
 from rich.progress import ProgressBar
+from gamecore.ui.screen import Screen
+
+screen = Screen()
 
 def clear():
-    os.system("cls" if os.name == "nt" else "clear")
+    screen.clear()
 
 def print_player_panel(player, skip_submenu: bool = False):
+    for panel in player_panels(player, skip_submenu):
+        print(panel)
+
+def player_panels(player, skip_submenu: bool = False):
     hp_percent = player.hp / player.max_hp if player.max_hp > 0 else 0
     mana_percent = player.mana / player.max_mana if player.max_mana > 0 else 0
 
@@ -29,10 +35,10 @@ def print_player_panel(player, skip_submenu: bool = False):
         f"Оружие: [red]{weapon}[/red]  Броня: [blue]{armor}[/blue]"
     )
 
-    print(Panel(main_panel, border_style="blue"))
+    main = Panel(main_panel, border_style="blue")
 
     if skip_submenu:
-        return
+        return [main]
 
     passive_abilities = (
         "\n".join([f"[bold cyan]{ability.name}[/bold cyan] - {ability.desc}" for ability in player.passive_abilities]) or "Нет"
@@ -57,4 +63,4 @@ def print_player_panel(player, skip_submenu: bool = False):
         f"[bold]Заклинания:[/bold]\n{spells}"
     )
 
-    print(Panel(sub_panel, border_style="cyan"))
\ No newline at end of file
+    return [main, Panel(sub_panel, border_style="cyan")]
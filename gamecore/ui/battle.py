@@ -0,0 +1,99 @@
+from gamecore import constants
+from gamecore.constants import ELEMENTS
+from gamecore.output import get_sink
+from gamecore.ui import screen
+
+
+def render_battle_event(event, battle):
+    sink = get_sink()
+    sink.event(event)
+    if not sink.renders:
+        return
+
+    player, enemy = battle.player, battle.enemy
+    kind, value, detail = event.kind, event.value, event.detail
+
+    if kind == "fortitude":
+        screen.write(f"[[bold]СТОЙКОСТЬ[/bold]] Вы получили {value} HP!")
+    elif kind == "crit":
+        screen.write("[bold yellow]КРИТИЧЕСКИЙ УДАР![/bold yellow]")
+    elif kind == "element":
+        if value > 0:
+            screen.write(f"[yellow]Враг устойчив к {detail}![/yellow] Урон уменьшен")
+        else:
+            screen.write(f"[red]Враг уязвим к {detail}![/red] Урон увеличен")
+    elif kind == "attack":
+        screen.write(f"Вы нанесли [bold red]{value:.2f}[/bold red] урона врагу: {enemy.name}")
+    elif kind == "heal":
+        screen.write(f"Вы восстановили [green]{value}[/green] HP")
+    elif kind == "block":
+        screen.write("[green bold]Успешный блок![/green bold] Вы уменьшили урон")
+    elif kind == "block_failed":
+        screen.write("[red bold]Блок не удался![/red bold]")
+    elif kind == "flee":
+        screen.write("[green]Вы успешно сбежали![/green]")
+    elif kind == "flee_failed":
+        screen.write("[red]Попытка побега не удалась![/red]")
+    elif kind == "item_used":
+        screen.write(f"[green]Использовано {detail}! Восстановлено {value} HP[/green]")
+    elif kind == "equipped":
+        screen.write(f"[green]Экипировано: {detail}[/green]")
+    elif kind == "no_mana":
+        screen.write("[red bold]Недостаточно маны![/red bold]")
+    elif kind == "spell":
+        screen.write(f"Вы используете [magenta]{detail}[/magenta]!")
+    elif kind == "spell_heal":
+        screen.write(f"[green]Восстановлено {value:.2f} HP[/green]")
+    elif kind == "spell_mana":
+        screen.write(f"[cyan]Восстановлено {value:.2f} маны[/cyan]")
+    elif kind == "spell_damage":
+        screen.write(f"Вы нанесли [bold red]{value:.2f} урона врагу")
+    elif kind == "teleport":
+        screen.write("[green]Вы телепортировались из боя![/green]")
+    elif kind == "class_ability":
+        screen.write(constants.CLASS_ABILITY_MESSAGES[detail].format(value=value))
+        screen.write(f"[bold cyan]Вы использовали {detail} умение![/bold cyan]")
+    elif kind == "class_ability_unavailable":
+        screen.write("[red]Особое умение недоступно![/red]")
+    elif kind == "analyze":
+        screen.write(f"[bold]Анализ врага:[/bold] {enemy.name}")
+        screen.write(f"Здоровье: {enemy.hp:.1f}/{enemy.max_hp:.1f}")
+        screen.write(f"Урон: {enemy.damage:.1f}")
+        screen.write("Устойчивости:")
+        for element, resist in zip(ELEMENTS, enemy.element_resistances):
+            if resist != 0:
+                color = "red" if resist < 0 else "yellow"
+                screen.write(f"- {element}: [{color}]{resist}%[/{color}]")
+    elif kind in ("enemy_turn", "turn_end"):
+        screen.write(f"\n{'-' * 64}\n")
+    elif kind == "dodge":
+        screen.write(f"[green]Вы уклонились от атаки {enemy.name}![/green]")
+    elif kind == "enemy_attack":
+        screen.write(f"{enemy.name} [red bold]нанес вам {value:.2f} урона![/red bold]")
+    elif kind == "enemy_heal":
+        screen.write(f"{enemy.name} [green]восстановил {value:.2f} HP![/green]")
+    elif kind == "enemy_ability":
+        message = constants.ENEMY_ABILITY_MESSAGES.get(detail, "[yellow]{name} использует неизвестную способность![/yellow]")
+        screen.write(message.format(name=enemy.name, value=value))
+    elif kind == "effect_tick":
+        screen.write(f'Эффект "{detail}" [red italic]нанес {value:.2f} урона {enemy.name}[/red italic]')
+    elif kind == "effect_expired":
+        screen.write(f'Эффект "{detail}" на {enemy.name} [dim]закончился[/dim]')
+    elif kind == "player_effect_tick":
+        screen.write(f'Эффект "{detail}" [red italic]нанес вам {value:.2f} урона[/red italic]')
+    elif kind == "player_effect_expired":
+        screen.write(f'Эффект "{detail}" на вас [dim]закончился[/dim]')
+    elif kind == "victory":
+        screen.write(f"[bold]Враг {enemy.name} [green]побежден[/green]![/bold]")
+        screen.write(f"Лут: [yellow]{battle.loot:.2f} монет[/yellow] | [cyan]{battle.xp_gain:.2f} XP[/cyan]")
+    elif kind == "quest_completed":
+        screen.write(f"[bold green]Квест выполнен: {player.quests[detail].name}[/bold green]")
+    elif kind == "mana_loot":
+        screen.write(f"[[bold]МАНИЯ МАНЫ[/bold]] +{value:.2f} маны")
+    elif kind == "fire_aura":
+        screen.write("[[bold]ОГНЕННАЯ АУРА[/bold]] Дополнительный урон врагу")
+    elif kind == "defeat":
+        screen.write("[red]Вы проиграли бой![/red]")
+        screen.write("[red]Вы потеряли часть денег и опыта![/red]")
+    elif kind == "battle_end":
+        screen.draw()
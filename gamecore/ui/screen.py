@@ -0,0 +1,103 @@
+from collections import deque
+from gamecore.output import get_sink
+
+# Строки под кадром оставляем под подсказку Prompt.ask и короткие подменю
+PROMPT_RESERVE = 12
+LOG_HISTORY = 200
+
+ERASE_LINE = "\x1b[K"
+ERASE_BELOW = "\x1b[J"
+
+
+def move_to(row: int):
+    return f"\x1b[{row + 1};1H"
+
+
+class Screen:
+    def __init__(self, console=None):
+        self.fixed_console = console
+        self.regions = {}
+        self.log = deque(maxlen=LOG_HISTORY)
+        # Что сейчас нарисовано на терминале, построчно
+        self.frame = []
+        self.valid = False
+
+    @property
+    def console(self):
+        return self.fixed_console or get_sink().console
+
+    @property
+    def incremental(self):
+        return self.console.is_terminal and not self.console.legacy_windows
+
+    def clear(self):
+        if self.console is not None:
+            self.console.clear()
+        self.frame = []
+        self.valid = True
+
+    def invalidate(self):
+        self.valid = False
+
+    def reset(self):
+        self.regions.clear()
+        self.log.clear()
+        self.invalidate()
+
+    def render_lines(self, renderable):
+        with self.console.capture() as capture:
+            self.console.print(renderable)
+        return capture.get().splitlines()
+
+    def set(self, name: str, *renderables):
+        if self.console is None:
+            return
+        lines = []
+        for renderable in renderables:
+            lines += self.render_lines(renderable)
+        self.regions[name] = lines
+
+    def write(self, *renderables):
+        if self.console is None:
+            return
+        for renderable in renderables:
+            lines = self.render_lines(renderable)
+            self.log.extend(lines)
+            if not self.incremental:
+                self.console.file.write("\n".join(lines) + "\n")
+
+    def compose(self):
+        frame = []
+        for lines in self.regions.values():
+            frame += lines
+        log_height = max(0, self.console.height - len(frame) - PROMPT_RESERVE)
+        if log_height:
+            frame += list(self.log)[-log_height:]
+        return frame
+
+    def draw(self):
+        if self.console is None:
+            return
+
+        if not self.incremental:
+            # Без терминала курсором не управляем: печатаем панели целиком, лог уже выведен в write
+            for lines in self.regions.values():
+                self.console.file.write("\n".join(lines) + "\n")
+            return
+
+        frame = self.compose()
+        if not self.valid:
+            self.clear()
+
+        old = self.frame
+        out = []
+        for row, line in enumerate(frame):
+            if row < len(old) and old[row] == line:
+                continue
+            out.append(move_to(row) + line + ERASE_LINE)
+        # Курсор под кадр, стираем остатки прошлых подсказок и подменю
+        out.append(move_to(len(frame)) + ERASE_BELOW)
+
+        self.console.file.write("".join(out))
+        self.console.file.flush()
+        self.frame = frame
@@ -0,0 +1,60 @@
+import copy
+import os
+import tempfile
+import unittest
+from gamecore.content import SOURCES_KEY, Content, ContentCache, ContentError, pack_files, source_stamps
+from gamecore.content.compiler import build_cache, compile_content, source_hash, validate, write_cache
+
+
+class ContentCacheTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        self.path = os.path.join(self.directory.name, "content.cache")
+        self.files = pack_files(())
+
+    def read_stamps(self):
+        cache = ContentCache(self.path)
+        try:
+            return cache.read(SOURCES_KEY)
+        finally:
+            cache.close()
+
+    def test_matching_hash_refreshes_stamps(self):
+        # Как после checkout: содержимое то же, отметки файлов другие
+        stale = tuple((path, mtime + 1, size) for path, mtime, size in source_stamps(self.files))
+        write_cache(self.path, compile_content(self.files), source_hash(self.files), stale)
+
+        content = Content(cache_path=self.path)
+        self.assertEqual(content.get("RACES"), compile_content(self.files)["RACES"])
+        self.assertIsNone(content.compiled)
+        content.cache.close()
+        self.assertEqual(self.read_stamps(), source_stamps(self.files))
+
+    def test_fresh_cache_is_used_as_is(self):
+        build_cache(self.path)
+        content = Content(cache_path=self.path)
+        content.get("QUESTS")
+        self.assertIsNone(content.compiled)
+        content.cache.close()
+
+
+class ValidateTest(unittest.TestCase):
+    def setUp(self):
+        self.content = copy.deepcopy(compile_content(pack_files(())))
+
+    def test_rejects_unknown_stacking(self):
+        self.content["EFFECTS"]["Яд"]["stacking"] = "stak"
+        with self.assertRaises(ContentError):
+            validate(self.content)
+
+    def test_rejects_too_many_quests(self):
+        # Квест в сохранении - однобайтовый индекс
+        quest = next(iter(self.content["QUESTS"].values()))
+        self.content["QUESTS"].update({f"квест {index}": quest for index in range(256)})
+        with self.assertRaises(ContentError):
+            validate(self.content)
+
+
+if __name__ == "__main__":
+    unittest.main()
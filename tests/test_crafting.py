@@ -0,0 +1,80 @@
+import unittest
+from gamecore.classes import Player, Weapon
+from gamecore.crafting import craftable_recipes, max_crafts
+from gamecore.rng import SessionRandom
+
+
+def make_player(materials: dict):
+    player = Player("crafter", "гном", "друид", rng=SessionRandom(1))
+    for material, count in materials.items():
+        player.add_material(material, count)
+    return player
+
+
+class CraftManyTest(unittest.TestCase):
+    def test_bulk_craft_keeps_every_item(self):
+        player = make_player({"травы": 10, "вода": 3})
+        before = len(player.inventory)
+
+        self.assertEqual(player.craft_many("Зелье здоровья", 3), 3)
+        self.assertEqual(len(player.inventory) - before, 3)
+        self.assertEqual(player.crafting_materials, {"травы": 1})
+        self.assertEqual(player.crafting.count("Зелье здоровья"), 0)
+
+    def test_craft_max_is_limited_by_materials(self):
+        player = make_player({"травы": 7, "вода": 5})
+        self.assertEqual(player.craft_many("Зелье здоровья"), 2)
+        self.assertEqual(player.crafting_materials, {"травы": 1, "вода": 3})
+
+    def test_recipe_without_item_keeps_materials(self):
+        player = make_player({"дерево": 6, "огненный кристалл": 4})
+        self.assertEqual(player.crafting.craftable(), [])
+        self.assertEqual(player.craft_many("Огненный посох", 2), 0)
+        self.assertEqual(player.crafting_materials, {"дерево": 6, "огненный кристалл": 4})
+
+    def test_index_matches_full_scan(self):
+        player = make_player({"травы": 9, "вода": 2, "кристалл": 3, "железо": 11, "уголь": 4, "мифрил": 8, "кожа": 4})
+        player.craft_many("Стальной меч", 1)
+        player.add_material("вода", 4)
+        counts = {
+            item_name: max_crafts(recipe, player.crafting_materials) for item_name, recipe in craftable_recipes().items()
+        }
+        self.assertEqual(player.crafting.counts, {item_name: count for item_name, count in counts.items() if count})
+        self.assertEqual(dict(player.crafting.craftable()), {
+            "Зелье здоровья": 3, "Зелье маны": 3, "Мифриловые доспехи": 1,
+        })
+
+
+class InventoryTest(unittest.TestCase):
+    def test_same_object_picked_up_twice(self):
+        # Так покупки в магазине: каждый раз тот же объект
+        player = make_player({})
+        weapon = Weapon("Меч", 10)
+        name = weapon.name
+        player.pickup_item(weapon)
+        player.pickup_item(weapon)
+
+        self.assertEqual(weapon.name, name)
+        items = [item for key, item in player.inventory.items() if key.startswith(name)]
+        self.assertEqual([item.name for item in items], [name, f"{name} (2)"])
+        self.assertIsNot(items[0], items[1])
+        self.assertTrue(all(item is not weapon for item in items))
+        self.assertTrue(all(key == item.name for key, item in player.inventory.items()))
+
+    def test_equip_keeps_duplicates(self):
+        player = make_player({})
+        weapon = Weapon("Меч", 10)
+        for _ in range(3):
+            player.pickup_item(weapon)
+        before = len(player.inventory) + 1
+
+        # Снятое оружие возвращается под свободным именем и не затирает дубликат
+        player.equip_item(weapon.name)
+        player.equip_item(f"{weapon.name} (2)")
+        self.assertEqual(len(player.inventory) + 1, before)
+        self.assertEqual(player.equipment["weapon"].name, f"{weapon.name} (2)")
+        self.assertTrue(all(key == item.name for key, item in player.inventory.items()))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,34 @@
+import unittest
+from unittest import mock
+from gamecore.constants import EFFECTS
+from gamecore.effects import StatusEffects, stack_limit
+
+
+class StatusEffectsTest(unittest.TestCase):
+    def test_stack_without_max_stacks(self):
+        # max_stacks в схеме необязателен
+        with mock.patch.dict(EFFECTS, {"Ожог": {"duration": 2, "stacking": "stack"}}):
+            effects = StatusEffects()
+            effects.apply("Ожог", 3)
+            effect = effects.apply("Ожог", 5)
+        self.assertEqual(effect.stacks, 1)
+        self.assertEqual(effect.damage, 5)
+
+    def test_stack_limit(self):
+        effects = StatusEffects()
+        for _ in range(EFFECTS["Яд"]["max_stacks"] + 2):
+            effect = effects.apply("Яд", 1)
+        self.assertEqual(effect.stacks, EFFECTS["Яд"]["max_stacks"])
+
+    def test_refresh_keeps_one_stack(self):
+        spec = {"duration": 2, "stacking": "refresh", "max_stacks": 4}
+        with mock.patch.dict(EFFECTS, {"Ожог": spec}):
+            effects = StatusEffects()
+            effects.apply("Ожог", 3)
+            effect = effects.apply("Ожог", 3)
+        self.assertEqual(effect.stacks, 1)
+        self.assertEqual(stack_limit(spec), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,41 @@
+import os
+import tempfile
+import unittest
+from gamecore.classes import Enemy, Player
+from gamecore.combat import run_battle
+from gamecore.constants import ENEMIES, TERRAINS
+from gamecore.eventlog import RENDER_ONLY_KINDS, BattleRecorder, replay
+from gamecore.rng import SessionRandom
+
+
+class ReplayTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        self.path = os.path.join(self.directory.name, "battles.log")
+
+    def test_replay_passes_battle_to_listener(self):
+        player = Player("Тест", "хоббит", "воин", rng=SessionRandom(5))
+        enemy = Enemy(player, ENEMIES[0], TERRAINS[0])
+        max_hp = enemy.max_hp
+        with BattleRecorder(self.path) as recorder:
+            result = run_battle(player, enemy, listener=recorder, max_turns=50)
+
+        seen = []
+        events = replay(self.path, 0, lambda event, battle: seen.append((event, battle)))
+        recorded = [event for event in result.events if event.kind not in RENDER_ONLY_KINDS]
+        self.assertEqual([event.kind for _, event in events][5:], [event.kind for event in recorded])
+        self.assertEqual(len(seen), len(events))
+
+        battle = seen[-1][1]
+        self.assertEqual(battle.enemy.name, enemy.name)
+        self.assertAlmostEqual(battle.enemy.max_hp, max_hp, places=3)
+        self.assertEqual(battle.player.race, "хоббит")
+        self.assertEqual(battle.player.lvl, 1)
+        self.assertAlmostEqual(battle.loot, result.loot, places=2)
+        self.assertAlmostEqual(battle.xp_gain, result.xp_gain, places=2)
+        self.assertEqual(battle.turn, result.turns)
+
+
+if __name__ == "__main__":
+    unittest.main()
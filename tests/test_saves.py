@@ -0,0 +1,150 @@
+import os
+import tempfile
+import unittest
+from gamecore.classes import Player
+from gamecore.rng import SessionRandom
+from gamecore.saves.backends import FileSaveStore
+from gamecore.saves.catalog import SaveCatalog
+from gamecore.constants import RACES
+from gamecore.saves.codec import CONTENT, HEADER, check_content, content_stamp, decode_player, encode_player, table_hash
+from gamecore.saves.database import SqliteSaveStore
+from gamecore.saves.journal import SaveJournal
+from gamecore.saves.store import read_save, save_path, write_save
+
+
+def make_player(name: str = "Тест"):
+    player = Player(name, "эльф", "маг", rng=SessionRandom(3))
+    player.add_material("травы", 4)
+    return player
+
+
+class JournalTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+
+    def test_new_journal_does_not_overwrite_existing_save(self):
+        old = make_player()
+        old.money = 12345
+        write_save(old, self.directory.name)
+        self.assertTrue(FileSaveStore(self.directory.name).exists(old.name))
+
+        journal = SaveJournal(make_player(), self.directory.name)
+        journal.close()
+        self.assertEqual(read_save(save_path(old.name, self.directory.name)).money, 12345)
+
+    def test_first_autosave_writes_snapshot(self):
+        player = make_player()
+        journal = SaveJournal(player, self.directory.name)
+        self.assertFalse(os.path.exists(save_path(player.name, self.directory.name)))
+
+        player.money += 10
+        journal.autosave()
+        journal.close()
+        self.assertEqual(read_save(save_path(player.name, self.directory.name)).money, player.money)
+
+    def test_replay_restores_level_up(self):
+        player = make_player()
+        journal = SaveJournal(player, self.directory.name, compact_every=1000)
+        journal.autosave()
+
+        player.level_up()
+        player.add_material("железо", 2)
+        player.quests["начало"].progress = 1
+        journal.autosave()
+        journal.file.close()
+
+        restored = read_save(save_path(player.name, self.directory.name))
+        self.assertEqual(restored.lvl, player.lvl)
+        self.assertEqual(restored.max_hp, player.max_hp)
+        self.assertEqual(restored.crafting_materials, player.crafting_materials)
+        self.assertEqual(restored.quests["начало"].progress, 1)
+        self.assertEqual(dict(restored.spells), dict(player.spells))
+
+
+class CatalogTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        self.store = FileSaveStore(self.directory.name)
+
+    def test_deleted_saves_leave_the_catalog(self):
+        paths = [write_save(make_player(name), self.directory.name) for name in ("Первый", "Второй", "Третий")]
+        self.assertEqual(len(self.store.entries()), 3)
+
+        # Самое новое сохранение удалено мимо игры: "Продолжить" берет следующее
+        os.remove(paths[2])
+        os.remove(paths[0])
+        self.assertEqual([entry.name for entry in self.store.entries(limit=1)], ["Второй"])
+        self.assertEqual([entry.name for entry in self.store.entries()], ["Второй"])
+
+        catalog = SaveCatalog(self.directory.name)
+        self.addCleanup(catalog.close)
+        self.assertEqual([entry.name for entry in catalog.find()], ["Второй"])
+
+
+class CodecTest(unittest.TestCase):
+    def test_round_trip(self):
+        player = make_player()
+        player.level_up()
+        player.money = 321.5
+        player.add_quest("природа")
+        restored = decode_player(encode_player(player))
+
+        for field in ("name", "race", "player_class", "lvl", "xp", "hp", "max_hp", "mana", "money", "story_progress"):
+            self.assertEqual(getattr(restored, field), getattr(player, field), field)
+        self.assertEqual(list(restored.inventory), list(player.inventory))
+        self.assertEqual({quest_id: quest.to_dict() for quest_id, quest in restored.quests.items()},
+                         {quest_id: quest.to_dict() for quest_id, quest in player.quests.items()})
+        self.assertEqual(restored.crafting.counts, player.crafting.counts)
+        self.assertEqual(dict(restored.spells), dict(player.spells))
+        self.assertEqual(restored.rng.getstate(), player.rng.getstate())
+
+    def test_rejects_other_content(self):
+        data = bytearray(encode_player(make_player()))
+        stamp = list(content_stamp())
+        stamp[1] ^= 1
+        CONTENT.pack_into(data, HEADER.size, *stamp)
+        with self.assertRaises(ValueError):
+            decode_player(data)
+
+    def test_accepts_appended_content(self):
+        # Сохранение сделано до мода, который дописал расу в конец таблицы
+        stamp = list(content_stamp())
+        stamp[0:2] = len(RACES) - 1, table_hash(RACES[:-1])
+        check_content(stamp)
+
+        stamp[0:2] = len(RACES) - 1, table_hash(RACES[1:])
+        with self.assertRaises(ValueError):
+            check_content(stamp)
+
+
+class DatabaseTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        self.store = SqliteSaveStore(os.path.join(self.directory.name, "saves.db"))
+        self.addCleanup(self.store.close)
+
+    def test_round_trip(self):
+        player = make_player()
+        player.level_up()
+        self.store.save(player)
+
+        restored = self.store.load_player(player.name)
+        self.assertEqual(restored.lvl, player.lvl)
+        self.assertEqual(restored.crafting_materials, player.crafting_materials)
+        self.assertEqual(dict(restored.spells), dict(player.spells))
+
+    def test_rejects_other_content(self):
+        player = make_player()
+        self.store.save(player)
+        stamp = list(content_stamp())
+        stamp[0] += 1
+        self.store.db.execute("UPDATE players SET content = ?", (CONTENT.pack(*stamp),))
+        with self.assertRaises(ValueError):
+            self.store.load_player(player.name)
+
+
+if __name__ == "__main__":
+    unittest.main()
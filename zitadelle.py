@@ -1,35 +1,56 @@
 from gamecore.resloader.loader import ResourceLoader
-from gamecore.constants import *
-from gamecore.classes import Player, Enemy, Weapon, Armor, Item, Quest
+from gamecore import constants
+from gamecore.constants import (
+    LOGO_COLORS, RIP_COLORS, DAMAGE_MULTIPLIER, RACES, CLASSES, ELEMENTS, TERRAINS, ACTIONS,
+)
+from gamecore.classes import Player, Enemy, Weapon, Armor
+from gamecore.combat import Battle, BattleAction, chain_listeners
+from gamecore.eventlog import BattleRecorder
+from gamecore.ids import terrain_effects_by_id, terrain_id
+from gamecore.rng import SessionRandom
+from gamecore.saves import BackgroundSaver, make_store, write_save
 from rich.panel import Panel
 from rich.prompt import Prompt, Confirm, IntPrompt
-from rich import print
-from gamecore.ui import clear, print_player_panel
-from random import randint, choice
-import json
+from gamecore.output import print, ask, pause, get_sink, set_sink, make_sink
+from gamecore.ui import clear, print_player_panel, player_panels, screen
+from gamecore.ui.battle import render_battle_event
 import os
 import time
 
 loader = ResourceLoader("res")
 loader.add_resource("logo.txt", "logo")
 loader.add_resource("rip.txt", "rip")
+if os.environ.get("ZITADELLE_WATCH_RESOURCES"):
+    loader.watch()
+
+battle_log = BattleRecorder(os.environ["ZITADELLE_BATTLE_LOG"], buffer_size=0) if os.environ.get("ZITADELLE_BATTLE_LOG") else None
+
+BATTLE_ACTIONS = {
+    "1": "attack",
+    "3": "block",
+    "4": "flee",
+    "5": "heal",
+    "7": "class_ability",
+    "8": "analyze",
+}
 
 def game_move(player):
+    loot = player.rng.loot
     player.damage = player.power + player.equipment["weapon"].value
     player.calc_additional_params()
 
-    for passive_ability in player.passive_abilities:
-        if passive_ability.param == "random_additional_param":
-            value = randint(player.lvl, passive_ability.value * player.lvl)
-            if randint(1, 3) == 1:
-                print(f"[[bold]{passive_ability.name}[/bold]] +{value} MANA")
-                player.mana = min(player.max_mana, player.mana + value)
-            elif randint(1, 3) == 2:
-                print(f"[[bold]{passive_ability.name}[/bold]] +{value} MONEY")
-                player.money += value
-            else:
-                print(f"[[bold]{passive_ability.name}[/bold]] +{value} XP")
-                player.xp += value
+    if "random_additional_param" in player.modifiers:
+        passive_ability = player.modifier_sources["random_additional_param"]
+        value = loot.randint(player.lvl, int(player.modifiers["random_additional_param"] * player.lvl))
+        if loot.randint(1, 3) == 1:
+            print(f"[[bold]{passive_ability.name}[/bold]] +{value} MANA")
+            player.mana = min(player.max_mana, player.mana + value)
+        elif loot.randint(1, 3) == 2:
+            print(f"[[bold]{passive_ability.name}[/bold]] +{value} MONEY")
+            player.money += value
+        else:
+            print(f"[[bold]{passive_ability.name}[/bold]] +{value} XP")
+            player.xp += value
 
     if player.is_dead():
         clear()
@@ -39,27 +60,29 @@ def game_move(player):
 
     if player.xp >= player.xp_to_next:
         player.level_up()
+        print(f"[bold green]Вы достигли {player.lvl} уровня![/bold green]")
 
     player.regen_resources()
     return True
 
 def shop(player):
+    rng = player.rng.shop
     clear()
-    terrain = player.terrain or choice(TERRAINS)
-    terrain_effects = TERRAIN_EFFECTS.get(terrain, {})
+    terrain = player.terrain or rng.choice(TERRAINS)
+    terrain_effects = terrain_effects_by_id()[terrain_id(terrain)]
 
     inflation = 1.0 + (player.lvl * 0.03)
-    item_level = max(1, min(9, player.lvl + randint(-1, 2)))
+    item_level = max(1, min(9, player.lvl + rng.randint(-1, 2)))
 
-    weapon_name = choice(WEAPONS)
-    weapon_damage = randint(5, 30) * item_level
-    weapon_element = choice([None] + ELEMENTS)
+    weapon_name = rng.choice(constants.WEAPONS)
+    weapon_damage = rng.randint(5, 30) * item_level
+    weapon_element = rng.choice([None] + ELEMENTS)
     weapon = Weapon(
-        weapon_name, weapon_damage, item_level, randint(0, 30), weapon_element
+        weapon_name, weapon_damage, item_level, rng.randint(0, 30), weapon_element
     )
 
-    armor_name = choice(ARMOR)
-    armor_defense = randint(3, 15) * item_level
+    armor_name = rng.choice(constants.ARMOR)
+    armor_defense = rng.randint(3, 15) * item_level
     armor = Armor(armor_name, armor_defense, "armor")
 
     SHOP_ITEMS = {
@@ -77,26 +100,26 @@ def shop(player):
             "description": f"{armor.name} | Защита: {armor.value:.2f} | Ур. {item_level}",
         },
         "Зелье здоровья": {
-            "price": int(randint(20, 80) * player.lvl * inflation),
+            "price": int(rng.randint(20, 80) * player.lvl * inflation),
             "type": "healing",
-            "healval": randint(25, 60) * player.lvl,
+            "healval": rng.randint(25, 60) * player.lvl,
             "description": "Восстанавливает здоровье",
         },
         "Зелье маны": {
-            "price": int(randint(15, 60) * player.lvl * inflation),
+            "price": int(rng.randint(15, 60) * player.lvl * inflation),
             "type": "manaup",
-            "manaval": randint(20, 50) * player.lvl,
+            "manaval": rng.randint(20, 50) * player.lvl,
             "description": "Восстанавливает ману",
         },
         "Набор трав": {
-            "price": int(randint(5, 15) * player.lvl * inflation),
+            "price": int(rng.randint(5, 15) * player.lvl * inflation),
             "type": "material",
             "material": "травы",
-            "amount": randint(3, 7),
+            "amount": rng.randint(3, 7),
             "description": "Травы для крафта",
         },
         "Железный слиток": {
-            "price": int(randint(10, 25) * player.lvl * inflation),
+            "price": int(rng.randint(10, 25) * player.lvl * inflation),
             "type": "material",
             "material": "железо",
             "amount": 1,
@@ -122,13 +145,12 @@ def shop(player):
         for effect, value in terrain_effects.items():
             print(f"- {effect}: {value * 100:.2f}%")
 
-    for passive_ability in player.passive_abilities:
-        if passive_ability.param == "discount":
-            discount = passive_ability.value
-            print(f"[[bold]СКИДКА[/bold]] {discount}%")
-            for item in SHOP_ITEMS.values():
-                if "price" in item:
-                    item["price"] = int(item["price"] * (1 - discount / 100))
+    discount = player.get_modifier("discount")
+    if discount:
+        print(f"[[bold]СКИДКА[/bold]] {discount}%")
+        for item in SHOP_ITEMS.values():
+            if "price" in item:
+                item["price"] = int(item["price"] * (1 - discount / 100))
 
     items = []
     for name, item in SHOP_ITEMS.items():
@@ -143,7 +165,8 @@ def shop(player):
     print(Panel("\n\n".join(items), title="Товары магазина"))
 
     while True:
-        item_choice = Prompt.ask(
+        item_choice = ask(
+            Prompt,
             "Выберите товар (или 'продать' для продажи предметов)",
             choices=list(SHOP_ITEMS.keys()) + ["продать"],
             default="0",
@@ -164,7 +187,7 @@ def shop(player):
             print("У вас [red bold]не хватает денег[/red bold] на покупку этого товара")
             continue
 
-        if not Confirm.ask(f"Купить {item_choice} за {item['price']} монет?", case_sensitive=False):
+        if not ask(Confirm, f"Купить {item_choice} за {item['price']} монет?", case_sensitive=False):
             print("Покупка отменена")
             continue
 
@@ -186,7 +209,7 @@ def shop(player):
         elif item["type"] == "material":
             material = item["material"]
             amount = item["amount"]
-            player.crafting_materials[material] = player.crafting_materials.get(material, 0) + amount
+            player.add_material(material, amount)
             print(f"Вы получили {amount} единиц материала: {material}")
         elif item["type"] == "upgrade":
             if player.equipment["weapon"]:
@@ -216,7 +239,7 @@ def sell_items(player):
         price = int(item.value * player.lvl * 0.7)
         print(f"{i}. {item_name} - [yellow]{price}[/yellow] монет")
 
-    choice = IntPrompt.ask("Выберите предмет для продажи (0 - отмена)", choices=[str(i) for i in range(0, len(items)+1)], default=0)
+    choice = ask(IntPrompt, "Выберите предмет для продажи (0 - отмена)", choices=[str(i) for i in range(0, len(items)+1)], default=0)
     if choice == 0:
         return
 
@@ -224,358 +247,141 @@ def sell_items(player):
     item = player.inventory[item_name]
     price = int(item.value * player.lvl * 0.7)
 
-    if Confirm.ask(f"Продать {item_name} за {price} монет?"):
+    if ask(Confirm, f"Продать {item_name} за {price} монет?"):
         player.money += price
         player.drop_item(item_name)
         print(f"[green]Вы продали {item_name} за {price} монет![/green]")
 
-def battle(player, enemy=None):
-    if not enemy:
-        terrain = choice(TERRAINS)
-        enemy = Enemy(player, choice(ENEMIES), terrain)
-
-    loot = max(10, (enemy.hp * (player.lvl * enemy.danger_level)) / 8)
-    xp_gain = max(5, loot / 2)
-
-    if player.race == "хоббит":
-        loot *= 1.3
-    if player.race == "орк":
-        enemy.hp -= enemy.hp * 0.05
-
-    has_fortitude = False
-    fortitude = None
-
-    for passive_ability in player.passive_abilities:
-        if passive_ability.param == "health_fortitude":
-            has_fortitude = True
-            fortitude = passive_ability.value * player.lvl
-
-    print(Panel(f"[bold red]БОЙ![/bold red] [cyan]{enemy.name}[/cyan] | [green]HP: {enemy.hp:.2f}[/green] | Локация: [yellow]{enemy.terrain}[/yellow]"))
-
-    terrain_effects = TERRAIN_EFFECTS.get(enemy.terrain, {})
-    if terrain_effects:
-        print("[bold]Эффекты местности:[/bold]")
-        for effect, value in terrain_effects.items():
-            print(f"- {effect}: {value * 100:.2f}%")
-
-    while enemy.hp > 0:
-        if player.hp <= 0 and not has_fortitude:
-            break
-        elif player.hp <= 0 and has_fortitude:
-            print(f"[[bold]СТОЙКОСТЬ[/bold]] Вы получили {fortitude} HP!")
-            player.hp = fortitude
-            has_fortitude = False
+def prompt_battle_action(battle):
+    player, enemy = battle.player, battle.enemy
+
+    screen.set("player", *player_panels(player, skip_submenu=True))
+    screen.set("enemy", Panel(f"Враг: [red bold]{enemy.name}[/red bold] | [green]HP: {enemy.hp:.2f}[/green] | Опасность: {enemy.danger_level}", border_style="red"))
+
+    actions = [
+        "1 - [red italic]Атаковать[/red italic]",
+        "2 - [magenta italic]Заклинание[/magenta italic]",
+        "3 - [blue italic]Блок[/blue italic]",
+        "4 - [dim]Сбежать[/dim]",
+        "5 - [green italic]Лечение[/green italic]",
+        "6 - [yellow italic]Инвентарь[/yellow italic]",
+        "7 - [cyan italic]Особое умение[/cyan italic]",
+        "8 - [white italic]Анализ врага[/white italic]",
+    ]
+
+    screen.set("actions", Panel("\n".join(actions), border_style="cyan"))
+    screen.draw()
+
+    act = ask(
+        Prompt,
+        "Действие",
+        choices=["1", "2", "3", "4", "5", "6", "7", "8"],
+        default="1",
+        case_sensitive=False,
+    )
 
-        print_player_panel(player, skip_submenu=True)
-        print(Panel(f"Враг: [red bold]{enemy.name}[/red bold] | [green]HP: {enemy.hp:.2f}[/green] | Опасность: {enemy.danger_level}", border_style="red"))
+    if act in ("2", "6"):
+        # Подменю может прокрутить терминал, следующий кадр рисуем целиком
+        screen.invalidate()
 
-        actions = [
-            "1 - [red italic]Атаковать[/red italic]",
-            "2 - [magenta italic]Заклинание[/magenta italic]",
-            "3 - [blue italic]Блок[/blue italic]",
-            "4 - [dim]Сбежать[/dim]",
-            "5 - [green italic]Лечение[/green italic]",
-            "6 - [yellow italic]Инвентарь[/yellow italic]",
-            "7 - [cyan italic]Особое умение[/cyan italic]",
-            "8 - [white italic]Анализ врага[/white italic]",
+    if act == "2":
+        spells = [
+            f"[bold magenta]{name}[/bold magenta] - {spell.spell_desc} ({spell.mana_cost:.2f} маны)"
+            for name, spell in player.spells.items()
         ]
-
-        print(Panel("\n".join(actions), border_style="cyan"))
-
-        act = Prompt.ask(
-            "Действие",
-            choices=["1", "2", "3", "4", "5", "6", "7", "8"],
-            default="1",
+        print(Panel("\n".join(spells), title="Заклинания", border_style="magenta"))
+        spell_choice = ask(
+            Prompt,
+            "Выберите заклинание",
+            choices=list(player.spells.keys()) + ["отмена"],
+            default="отмена",
             case_sensitive=False,
         )
+        if spell_choice == "отмена":
+            return BattleAction("pass")
+        return BattleAction("spell", spell_choice)
+    elif act == "6":
+        if not player.inventory:
+            print("Ваш инвентарь пуст")
+            return BattleAction("pass")
+
+        print("[bold]Инвентарь:[/bold]")
+        for item_name in player.inventory:
+            print(f"- {item_name}")
+        item_use = ask(
+            Prompt,
+            "Использовать предмет",
+            choices=list(player.inventory.keys()) + ["отмена"],
+            default="отмена",
+            case_sensitive=False,
+        )
+        if item_use == "отмена":
+            return BattleAction("pass")
+        return BattleAction("item", item_use)
 
-        if act == "1":
-            damage, is_crit = player.calc_damage()
-            if is_crit:
-                print("[bold yellow]КРИТИЧЕСКИЙ УДАР![/bold yellow]")
-
-            element_damage_mod = 1.0
-            if player.equipment["weapon"].element:
-                resistance = enemy.element_resistances.get(player.equipment["weapon"].element, 0)
-                element_damage_mod = 1.0 - (resistance / 100.0)
-                if resistance > 0:
-                    print(f"[yellow]Враг устойчив к {player.equipment['weapon'].element}![/yellow] Урон уменьшен")
-                elif resistance < 0:
-                    print(f"[red]Враг уязвим к {player.equipment['weapon'].element}![/red] Урон увеличен")
-
-            damage = damage * element_damage_mod
-            enemy.take_damage(damage)
-            print(f"Вы нанесли [bold red]{damage:.2f}[/bold red] урона врагу: {enemy.name}")
-            player.equipment["weapon"].use()
-        elif act == "5":
-            heal_amount = randint(5, 15) * player.lvl
-            player.take_health(heal_amount)
-            print(f"Вы восстановили [green]{heal_amount}[/green] HP")
-        elif act == "3":
-            if randint(1, 100) <= player.agility * 5:
-                print("[green bold]Успешный блок![/green bold] Вы уменьшили урон")
-                continue
-            else:
-                print("[red bold]Блок не удался![/red bold]")
-        elif act == "4":
-            escape_chance = player.agility * 5
-            if randint(1, 100) <= escape_chance:
-                print("[green]Вы успешно сбежали![/green]")
-                return
-            else:
-                print("[red]Попытка побега не удалась![/red]")
-        elif act == "6":
-            if player.inventory:
-                print("[bold]Инвентарь:[/bold]")
-                for item_name in player.inventory:
-                    print(f"- {item_name}")
-                item_use = Prompt.ask(
-                    "Использовать предмет",
-                    choices=list(player.inventory.keys()) + ["отмена"],
-                    default="отмена",
-                    case_sensitive=False,
-                )
-                if item_use != "отмена":
-                    item = player.inventory[item_use]
-                    if item.type == "consumable":
-                        player.take_health(item.value)
-                        print(f"[green]Использовано {item_use}! Восстановлено {item.value} HP[/green]")
-                        player.drop_item(item_use)
-                    elif item.type == "weapon" or item.type == "armor":
-                        if player.equip_item(item_use):
-                            print(f"[green]Экипировано: {item_use}[/green]")
-            else:
-                print("Ваш инвентарь пуст")
-        elif act == "2":
-            spells = [
-                f"[bold magenta]{name}[/bold magenta] - {spell.spell_desc} ({spell.mana_cost:.2f} маны)"
-                for name, spell in player.spells.items()
-            ]
-            print(Panel("\n".join(spells), title="Заклинания", border_style="magenta"))
-            spell_choice = Prompt.ask(
-                "Выберите заклинание",
-                choices=list(player.spells.keys()) + ["отмена"],
-                default="отмена",
-                case_sensitive=False,
-            )
-
-            if spell_choice != "отмена":
-                spell = player.spells[spell_choice]
-
-                if player.mana < spell.mana_cost:
-                    print("[red bold]Недостаточно маны![/red bold]")
-                    continue
-
-                player.mana -= spell.mana_cost
-                print(f"Вы используете [magenta]{spell.spell_name}[/magenta]!")
-
-                if spell.spell_type == "HEALTH":
-                    heal_amount = spell.healing * (1 + player.wisdom/100)
-                    player.take_health(heal_amount)
-                    print(f"[green]Восстановлено {heal_amount:.2f} HP[/green]")
-                elif spell.spell_type == "MANA":
-                    mana_amount = spell.mana * (1 + player.wisdom/100)
-                    player.mana = min(player.max_mana, player.mana + mana_amount)
-                    print(f"[cyan]Восстановлено {mana_amount:.2f} маны[/cyan]")
-                elif spell.spell_type == "ATTACK":
-                    damage = spell.spell_damage * (1 + player.wisdom/100)
-
-                    if spell.element:
-                        resistance = enemy.element_resistances.get(spell.element, 0)
-                        damage_mod = 1.0 - (resistance / 100.0)
-                        damage *= damage_mod
-
-                        if resistance > 0:
-                            print(f"[yellow]Враг устойчив к {spell.element}![/yellow] Урон уменьшен")
-                        elif resistance < 0:
-                            print(f"[red]Враг уязвим к {spell.element}![/red] Урон увеличен")
-
-                    enemy.take_damage(damage)
-                    print(f"Вы нанесли [bold red]{damage:.2f} урона врагу")
-
-                    if spell_choice == "ТЕЛЕПОРТАЦИЯ":
-                        print("[green]Вы телепортировались из боя![/green]")
-                        return
-        elif act == "7":
-            if player.class_ability_available:
-                player.use_class_ability(enemy)
-                player.class_ability_available = False
-                print(f"[bold cyan]Вы использовали {player.player_class} умение![/bold cyan]")
-            else:
-                print("[red]Особое умение недоступно![/red]")
-        elif act == "8":
-            print(f"[bold]Анализ врага:[/bold] {enemy.name}")
-            print(f"Здоровье: {enemy.hp:.1f}/{enemy.max_hp:.1f}")
-            print(f"Урон: {enemy.damage:.1f}")
-            print("Устойчивости:")
-            for element, resist in enemy.element_resistances.items():
-                if resist != 0:
-                    color = "red" if resist < 0 else "yellow"
-                    print(f"- {element}: [{color}]{resist}%[/{color}]")
-            continue
+    return BattleAction(BATTLE_ACTIONS[act])
 
-        print(f"\n{'-' * 64}\n")
+def battle(player, enemy=None):
+    if not enemy:
+        spawn = player.rng.spawn
+        terrain = spawn.choice(TERRAINS)
+        enemy = Enemy(player, spawn.choice(constants.ENEMIES), terrain)
 
-        # ИИ врага
-        enemy_action = enemy.choose_action(player)
-        if enemy_action == "attack":
-            dmg = enemy.damage_attack
-            dodge_chance = 0
-            for ability in player.passive_abilities:
-                if ability.param == "dodge_chance":
-                    dodge_chance += ability.value * 100
+    fight = Battle(player, enemy, prompt_battle_action, listener=chain_listeners(render_battle_event, battle_log), record_events=False)
 
-            if randint(1, 100) <= dodge_chance:
-                print(f"[green]Вы уклонились от атаки {enemy.name}![/green]")
-            else:
-                player.take_damage(dmg)
-                print(f"{enemy.name} [red bold]нанес вам {dmg:.2f} урона![/red bold]")
-        elif enemy_action == "heal":
-            heal_amount = enemy.max_hp * 0.15
-            enemy.take_health(heal_amount)
-            print(f"{enemy.name} [green]восстановил {heal_amount:.2f} HP![/green]")
-        elif enemy_action == "ability":
-            ability = enemy.use_ability(player)
-            print(ability)
-
-        for key, value in enemy.negative_effects.items():
-            effect_damage = value * randint(80, 120) / 100
-            enemy.take_damage(effect_damage)
-            print(f'Эффект "{key.split("@")[0]}" [red italic]нанес {effect_damage:.2f} урона {enemy.name}[/red italic]')
-
-        print(f"\n{'-' * 64}\n")
-
-    if enemy.is_dead():
-        print(f"[bold]Враг {enemy.name} [green]побежден[/green]![/bold]")
-        print(f"Лут: [yellow]{loot:.2f} монет[/yellow] | [cyan]{xp_gain:.2f} XP[/cyan]")
-
-        for passive_ability in player.passive_abilities:
-            if passive_ability.param == "mana_loot":
-                mana_gain = loot * passive_ability.value
-                print(f"[[bold]МАНИЯ МАНЫ[/bold]] +{mana_gain:.2f} маны")
-                player.mana = min(player.max_mana, player.mana + mana_gain)
-            if passive_ability.param == "fire_damage" and player.race == "демон":
-                print("[[bold]ОГНЕННАЯ АУРА[/bold]] Дополнительный урон врагу")
-
-        player.money += loot
-        player.xp += xp_gain
-        player.hp += player.max_hp * 0.05
-        player.class_ability_available = True
-        player.stats["enemies_killed"] += 1
-
-        # Автопроверка квестов
-        for quest in player.quests.values():
-            if not quest.completed:
-                if quest.check_completion(enemy, player):
-                    player.complete_quest(quest.id)
-    else:
-        print("[red]Вы проиграли бой![/red]")
-        player.money = max(0, player.money * 0.8)
-        player.xp = max(0, player.xp * 0.9)
-        print("[red]Вы потеряли часть денег и опыта![/red]")
-        player.class_ability_available = True
-
-def save_game(player):
-    if not os.path.exists("saves"):
-        os.makedirs("saves")
-
-    filename = f"saves/{player.name.lower().replace(' ', '_')}.json"
-    data = {
-        "name": player.name,
-        "race": player.race,
-        "class": player.player_class,
-        "lvl": player.lvl,
-        "xp": player.xp,
-        "xp_to_next": player.xp_to_next,
-        "hp": player.hp,
-        "max_hp": player.max_hp,
-        "mana": player.mana,
-        "max_mana": player.max_mana,
-        "power": player.power,
-        "agility": player.agility,
-        "wisdom": player.wisdom,
-        "money": player.money,
-        "weapon": player.equipment["weapon"].name if player.equipment["weapon"] else "",
-        "armor": player.equipment["armor"].name if player.equipment["armor"] else "",
-        "story_progress": player.story_progress,
-        "inventory": list(player.inventory.keys()),
-        "quests": {qid: q.to_dict() for qid, q in player.quests.items()},
-        "factions": player.factions,
-        "crafting_materials": player.crafting_materials,
-        "stats": player.stats,
-    }
+    screen.reset()
+    header = [Panel(f"[bold red]БОЙ![/bold red] [cyan]{enemy.name}[/cyan] | [green]HP: {enemy.hp:.2f}[/green] | Локация: [yellow]{enemy.terrain}[/yellow]")]
 
-    with open(filename, "w") as f:
-        json.dump(data, f, indent=2)
+    terrain_effects = terrain_effects_by_id()[enemy.terrain_id]
+    if terrain_effects:
+        header.append("[bold]Эффекты местности:[/bold]")
+        for effect, value in terrain_effects.items():
+            header.append(f"- {effect}: {value * 100:.2f}%")
+    screen.set("battle", *header)
 
-    print(f"[green]Игра сохранена в {filename}[/green]")
+    return fight.run()
 
-def load_game():
-    if not os.path.exists("saves"):
-        print("[red]Нет сохранений[/red]")
+def save_game(player, journal=None):
+    if journal is None:
+        print(f"[green]Игра сохранена в {write_save(player)}[/green]")
         return None
 
-    saves = [f for f in os.listdir("saves") if f.endswith(".json")]
+    # При ведении журнала ручное сохранение - это внеочередное сжатие в снимок.
+    # Запись идет в фоне, ход не ждет диска
+    handle = journal.compact()
+    if handle.done():
+        print(f"[green]Игра сохранена в {handle.result()}[/green]")
+    else:
+        print("[green]Игра сохраняется...[/green]")
+    return handle
+
+LOAD_MENU_SIZE = 20
+
+def load_game(store, rng=None, resume=False):
+    # Меню строится по каталогу сохранений, сами сохранения читаются только при выборе
+    saves = store.entries(limit=1 if resume else LOAD_MENU_SIZE)
     if not saves:
         print("[red]Нет сохранений[/red]")
         return None
 
-    print("[bold]Доступные сохранения:[/bold]")
-    for i, save in enumerate(saves, 1):
-        print(f"{i}. {save.replace('.json', '').replace('_', ' ')}")
-
-    choice = IntPrompt.ask(
-        "Выберите сохранение",
-        choices=[str(i) for i in range(1, len(saves) + 1)],
-        case_sensitive=False,
-    )
-    filename = f"saves/{saves[int(choice) - 1]}"
+    if resume:
+        entry = saves[0]
+    else:
+        print("[bold]Доступные сохранения:[/bold]")
+        for i, entry in enumerate(saves, 1):
+            played = time.strftime("%d.%m.%Y %H:%M", time.localtime(entry.mtime))
+            print(f"{i}. {entry.name} - {entry.race} {entry.player_class}, {entry.lvl} ур., {played}")
+
+        choice = ask(
+            IntPrompt,
+            "Выберите сохранение",
+            choices=[str(i) for i in range(1, len(saves) + 1)],
+            case_sensitive=False,
+        )
+        entry = saves[int(choice) - 1]
 
     try:
-        with open(filename, "r") as f:
-            data = json.load(f)
-
-        player = Player(data["name"], data["race"], data["class"])
-
-        player.lvl = data["lvl"]
-        player.xp = data["xp"]
-        player.xp_to_next = data["xp_to_next"]
-        player.hp = data["hp"]
-        player.max_hp = data["max_hp"]
-        player.mana = data["mana"]
-        player.max_mana = data["max_mana"]
-        player.power = data["power"]
-        player.agility = data["agility"]
-        player.wisdom = data["wisdom"]
-        player.money = data["money"]
-        player.story_progress = data.get("story_progress", 0)
-        player.factions = data.get("factions", FRACTIONS.copy())
-        player.crafting_materials = data.get("crafting_materials", {})
-        player.stats = data.get("stats", {
-            "enemies_killed": 0,
-            "quests_completed": 0,
-            "gold_earned": 0,
-            "damage_dealt": 0,
-        })
-
-        if data["weapon"]:
-            player.equipment["weapon"] = Weapon(data["weapon"], 10)
-        if data["armor"]:
-            player.equipment["armor"] = Armor(data["armor"], 5)
-
-        for item_name in data.get("inventory", []):
-            if "Зелье" in item_name:
-                player.inventory[item_name] = Item(item_name, "consumable", randint(20, 50))
-            elif any(x in item_name for x in ["меч", "топор", "щит"]):
-                player.inventory[item_name] = Weapon(item_name, randint(5, 15))
-            else:
-                player.inventory[item_name] = Item(item_name, "armor", randint(3, 10))
-
-        for qid, qdata in data.get("quests", {}).items():
-            if qid in QUESTS:
-                quest = Quest.from_dict(qdata, qid)
-                player.quests[qid] = quest
-
+        player = store.load(entry, rng)
         print(f"[green]Игра загружена: {player.name}[/green]")
         return player
     except Exception as e:
@@ -587,13 +393,19 @@ def craft_items(player):
         print("[red]У вас нет материалов для крафта[/red]")
         return
 
+    # Только рецепты, на которые хватает материалов: индекс игрока обновляется при каждом изменении материалов
+    recipes = player.crafting.craftable()
+    if not recipes:
+        print("[red]Материалов не хватает ни на один рецепт[/red]")
+        return
+
     print("[bold]Доступные рецепты:[/bold]")
-    recipes = list(CRAFT_RECIPES.items())
-    for i, (item_name, recipe) in enumerate(recipes, 1):
-        materials = ", ".join([f"{mat} x{count}" for mat, count in recipe.items()])
-        print(f"{i}. {item_name} - {materials}")
+    for i, (item_name, available) in enumerate(recipes, 1):
+        materials = ", ".join([f"{mat} x{count}" for mat, count in constants.CRAFT_RECIPES[item_name].items()])
+        print(f"{i}. {item_name} - {materials} (можно скрафтить: {available})")
 
-    choice = IntPrompt.ask(
+    choice = ask(
+        IntPrompt,
         "Выберите предмет для крафта (0 - отмена)",
         choices=[str(i) for i in range(0, len(recipes) + 1)],
         default=0,
@@ -603,26 +415,35 @@ def craft_items(player):
     if choice == 0:
         return
 
-    item_name, recipe = recipes[choice-1]
+    item_name, available = recipes[choice-1]
+    count = 1
+    if available > 1:
+        count = ask(IntPrompt, f"Сколько скрафтить? (0 - максимум, {available})", default=1)
+        count = available if count <= 0 else count
 
-    if player.craft_item(item_name):
-        print(f"[green]Вы успешно скрафтили {item_name}![/green]")
+    crafted = player.craft_many(item_name, count)
+    if crafted:
+        print(f"[green]Вы успешно скрафтили {item_name} x{crafted}![/green]")
     else:
         print("[red]Недостаточно материалов[/red]")
 
+def print_completed_quests(player, quest_ids):
+    for quest_id in quest_ids:
+        print(f"[bold green]Квест выполнен: {player.quests[quest_id].name}[/bold green]")
+
 def talk_to_npc(player, npc_type):
-    if npc_type not in DIALOGUES:
+    if npc_type not in constants.DIALOGUES:
         return
 
-    dialogues = DIALOGUES[npc_type]
+    dialogues = constants.DIALOGUES[npc_type]
     for i, line in enumerate(dialogues):
         print(f"[italic]{line}[/italic]")
         if i < len(dialogues) - 1:
-            input("Нажмите Enter чтобы продолжить...")
+            pause("Нажмите Enter чтобы продолжить...")
+
+    print_completed_quests(player, player.trigger_quests("talk", (npc_type,)))
 
     if npc_type == "капитан_стражи":
-        if "начало" in player.quests and not player.quests["начало"].completed:
-            player.complete_quest("начало")
         if "некроманты" not in player.quests:
             player.add_quest("некроманты")
             print("[green]Получен новый квест: Угроза некромантов[/green]")
@@ -644,50 +465,69 @@ def talk_to_npc(player, npc_type):
             print("[green]Получен новый квест: Тайны некромантии[/green]")
 
 def main():
+    set_sink(make_sink(os.environ.get("ZITADELLE_OUTPUT", "buffered")))
+    seed = os.environ.get("ZITADELLE_SEED")
+    rng = SessionRandom(int(seed) if seed else None)
+
     clear()
     loader.print_resource_content("logo", colors=LOGO_COLORS, background="black")
     print("Мир Тандерхейма - мрачный мир, где древние силы зла вырвались из Цитадели Тьмы. Только вы можете спасти этот мир...")
-    print(choice(ACTIONS))
-    input("Нажмите Enter чтобы продолжить...")
+    print(rng.world.choice(ACTIONS))
+    pause("Нажмите Enter чтобы продолжить...")
 
     clear()
-    action = Prompt.ask(
-        "1 - Новая игра\n2 - Загрузить игру",
-        choices=["1", "2"],
-        default="1",
+    writer = BackgroundSaver()
+    saves = make_store(os.environ.get("ZITADELLE_SAVES", "files"), writer=writer)
+    last = next(iter(saves.entries(limit=1)), None)
+    menu = "1 - Новая игра\n2 - Загрузить игру"
+    choices = ["1", "2"]
+    if last is not None:
+        menu += f"\n3 - Продолжить ({last.name}, {last.lvl} ур.)"
+        choices.append("3")
+    action = ask(
+        Prompt,
+        menu,
+        choices=choices,
+        default="3" if last is not None else "1",
         case_sensitive=False,
     )
 
-    if action == "2":
-        player = load_game()
+    if action in ("2", "3"):
+        player = load_game(saves, rng, resume=action == "3")
         if not player:
             print("Создание нового персонажа")
             action = "1"
 
     if action == "1":
-        name = Prompt.ask("Ваше имя", default="Альфанелло")
-        race = Prompt.ask("Раса", choices=RACES, default="человек", case_sensitive=False)
-        player_class = Prompt.ask("Класс", choices=CLASSES, default="воин", case_sensitive=False)
+        while True:
+            name = ask(Prompt, "Ваше имя", default="Альфанелло")
+            if not saves.exists(name) or ask(Confirm, f"Сохранение {name} уже есть. Перезаписать его?", default=False):
+                break
+        race = ask(Prompt, "Раса", choices=RACES, default="человек", case_sensitive=False)
+        player_class = ask(Prompt, "Класс", choices=CLASSES, default="воин", case_sensitive=False)
         count = 15
         current_points = count
 
         while True:
             print(Panel(f"[bold]Распределите {count} очков характеристик[/bold]"))
-            power = IntPrompt.ask(
+            power = ask(
+                IntPrompt,
                 f"{current_points}/{count} Сила (влияет на урон)",
                 default=5,
                 choices=[str(i) for i in range(0, count)],
                 case_sensitive=False,
             )
             current_points -= int(power)
-            agility = IntPrompt.ask(
+            agility = ask(
+                IntPrompt,
                 f"{current_points}/{count} Ловкость (влияет на уклонение)",
                 default=3,
                 choices=[str(i) for i in range(0, count)],
                 case_sensitive=False,
             )
             current_points -= int(agility)
-            wisdom = IntPrompt.ask(
+            wisdom = ask(
+                IntPrompt,
                 f"{current_points}/{count} Мудрость (влияет на ману)",
                 default=2,
                 choices=[str(i) for i in range(0, count)],
@@ -701,12 +541,15 @@ def main():
             else:
                 break
 
-        player = Player(name, race, player_class, int(power), int(agility), int(wisdom))
+        player = Player(name, race, player_class, int(power), int(agility), int(wisdom), rng=rng)
 
     clear()
 
+    journal = saves.autosaver(player)
+    world = player.rng.world
+
     while True:
-        player.terrain = choice(TERRAINS)
+        player.enter_terrain(world.choice(TERRAINS))
         print_player_panel(player)
         print(Panel(f"[bold]Прогресс истории:[/bold] [cyan]{player.get_story_progress()}[/cyan]"))
         print(Panel(f"[bold]Локация:[/bold] [yellow]{player.terrain}[/yellow]"))
@@ -724,7 +567,8 @@ def main():
         ]
 
         print(Panel("\n".join(actions)))
-        action = Prompt.ask(
+        action = ask(
+            Prompt,
             "Выберите действие",
             choices=["0", "1", "2", "3", "4", "5", "6", "7", "8", "9"],
             default="1",
@@ -732,23 +576,24 @@ def main():
         )
 
         if action == "0":
-            if Confirm.ask("Точно выйти из игры?"):
+            if ask(Confirm, "Точно выйти из игры?"):
                 print("До новых встреч!")
                 break
         if action == "9":
             player.money += 10000
         elif action == "1":
-            event_chance = randint(1, 10)
-            terrain_effects = TERRAIN_EFFECTS.get(player.terrain, {})
+            event_chance = world.randint(1, 10)
+            terrain_effects = terrain_effects_by_id()[player.terrain_id]
+            print_completed_quests(player, player.trigger_quests("explore", (player.terrain_id,)))
 
             if event_chance <= 4:
                 print(f"Вы встретили монстра в {player.terrain}!")
                 battle(player)
             elif event_chance == 5:
-                city = choice(CITIES)
+                city = world.choice(constants.CITIES)
                 print(f"Вы прибыли в {city}.")
 
-                npc_chance = randint(1, 5)
+                npc_chance = world.randint(1, 5)
                 if npc_chance == 1:
                     print("Вы встретили капитана стражи.")
                     talk_to_npc(player, "капитан_стражи")
@@ -765,27 +610,27 @@ def main():
                     print("Таинственный некромант предлагает вам сделку.")
                     talk_to_npc(player, "некромант")
 
-                shop_chance = randint(1, 2)
+                shop_chance = world.randint(1, 2)
                 if shop_chance == 1:
                     print("Здесь есть магазин, хотите зайти?")
-                    if Confirm.ask("Посетить магазин?", case_sensitive=False):
+                    if ask(Confirm, "Посетить магазин?", case_sensitive=False):
                         shop(player)
             elif event_chance == 6:
-                money = randint(5, 40) * player.lvl
+                money = world.randint(5, 40) * player.lvl
                 print(f"Вы нашли [yellow]{money}[/yellow] монет!")
                 player.money += money
                 player.stats["gold_earned"] += money
             elif event_chance == 7:
-                material = choice(["травы", "железо", "кожа", "кристалл"])
-                amount = randint(1, 5)
-                player.crafting_materials[material] = player.crafting_materials.get(material, 0) + amount
+                material = world.choice(["травы", "железо", "кожа", "кристалл"])
+                amount = world.randint(1, 5)
+                player.add_material(material, amount)
                 print(f"Вы нашли {amount} единиц материала: [green]{material}[/green]")
             elif event_chance == 8:
                 if player.equipment["weapon"] and player.equipment["weapon"].level < 9:
-                    price = randint(40, 150) * player.lvl
+                    price = world.randint(40, 150) * player.lvl
                     print(f"Кузнец предлагает улучшить ваше оружие за [yellow]{price}[/yellow] монет")
 
-                    if Confirm.ask("Улучшить оружие?", case_sensitive=False):
+                    if ask(Confirm, "Улучшить оружие?", case_sensitive=False):
                         if player.money >= price:
                             player.money -= price
                             player.equipment["weapon"].level_up()
@@ -796,8 +641,8 @@ def main():
                 else:
                     print("Ваше оружие уже максимального уровня или отсутствует")
             else:
-                print(choice(ACTIONS))
-                if "ловушки" in terrain_effects and randint(1, 100) <= terrain_effects["ловушки"] * 100:
+                print(world.choice(ACTIONS))
+                if "ловушки" in terrain_effects and world.randint(1, 100) <= terrain_effects["ловушки"] * 100:
                     trap_damage = player.max_hp * 0.1
                     player.take_damage(trap_damage)
                     print(f"[red]Вы попали в ловушку! Получено {trap_damage:.2f} урона[/red]")
@@ -805,7 +650,7 @@ def main():
         elif action == "2":
             shop(player)
         elif action == "3":
-            save_game(player)
+            save_game(player, journal)
         elif action == "4":
             if player.quests:
                 print("[bold]Активные квесты:[/bold]")
@@ -823,7 +668,8 @@ def main():
         elif action == "6":
             craft_items(player)
         elif action == "7":
-            npc = Prompt.ask(
+            npc = ask(
+                Prompt,
                 "Выберите NPC",
                 choices=["капитан_стражи", "гильдия_магов", "воровская_гильдия", "друид", "некромант", "отмена"],
                 default="отмена",
@@ -836,7 +682,8 @@ def main():
                 print("[bold]Инвентарь:[/bold]")
                 for item_name in player.inventory:
                     print(f"- {item_name}")
-                item_use = Prompt.ask(
+                item_use = ask(
+                    Prompt,
                     "Использовать предмет",
                     choices=list(player.inventory.keys()) + ["отмена"],
                     default="отмена",
@@ -856,9 +703,17 @@ def main():
 
         if not game_move(player):
             break
+        journal.autosave()
 
-        input("\nНажмите Enter чтобы продолжить...")
+        pause("\nНажмите Enter чтобы продолжить...")
         clear()
 
+    journal.close()
+    writer.close()
+    saves.close()
+
 if __name__ == "__main__":
-    main()
+    try:
+        main()
+    finally:
+        get_sink().flush()